@@ -0,0 +1,32 @@
+# encoding: utf-8
+"""\
+Space Bar core
+
+Pure-Python part of Space Bar: the font model, the metrics computation and
+the Area/Value data the bar is drawn from. It doesn't import GlyphsApp or
+AppKit, so it runs anywhere, e.g. against a stand-in font on Linux.
+"""
+from __future__ import division, print_function, unicode_literals
+
+from spacinginvadercore.constants import *
+from spacinginvadercore.model import Point, Size, Rect, Axis, Master, Instance, Component, Layer, Glyph, Font
+from spacinginvadercore.areas import Value, Area, isSameLayer
+from spacinginvadercore.axes import AxisTable
+from spacinginvadercore.interpolation import NormalizeMinMax, Interpolate, InterpolateOnAxis, InterpolationPlan
+from spacinginvadercore.snapshot import LayerMetrics, isEmptyLayer, snapshotLayer, snapshotLayers, layerFingerprint
+from spacinginvadercore.cachekeys import CacheKeys, GlyphVersions
+from spacinginvadercore.lru import LRUCache
+from spacinginvadercore.kerning import KerningIndex
+from spacinginvadercore.prefetch import Prefetcher, neighbourPositions
+from spacinginvadercore.tablayers import TabLayers
+from spacinginvadercore.textchanges import TextChanges, textEdit
+from spacinginvadercore.scheduler import ComputeScheduler
+from spacinginvadercore.background import BackgroundCompute, ThreadExecutor, ImmediateExecutor, ManualExecutor
+from spacinginvadercore.render import Backend, RecordingBackend, renderArea
+from spacinginvadercore.compositor import BarLayout, Compositor, areaSignature
+from spacinginvadercore.preferences import PreferenceStore, DictDefaults
+from spacinginvadercore.instrumentation import Instrumentation, STAGES
+from spacinginvadercore.profiling import ProfileCapture, collapsedStacks
+from spacinginvadercore.trace import TraceRecorder, readTrace
+from spacinginvadercore import metrics, synthetic
+from spacinginvadercore.replay import TraceReplay, computeFrame, replayTrace
@@ -0,0 +1,174 @@
+# encoding: utf-8
+from __future__ import division, print_function, unicode_literals
+
+import copy
+
+from spacinginvadercore.constants import *
+from spacinginvadercore.interpolation import Interpolate
+
+
+class Value(object):
+	def __init__(self, x, y, color = (0, 0, 0), size = POINTSIZESMALL, label = None, layer = 'foreground', associatedObject = None):
+		self.x = x
+		self.y = y
+		self.y2 = None
+		self.color = color
+		self.size = size
+		self.label = label
+		self.layer = layer
+		self.associatedObject = associatedObject
+
+	def __repr__(self):
+		return '<Value (%s, %s) %s>' % (self.x, self.y, self.layer)
+
+
+def isSameLayer(a, b):
+	"""\
+	Compare layers by layerId, so that model layers and their GSLayer counterparts match.
+	"""
+	if a is None or b is None:
+		return False
+	if a is b:
+		return True
+	layerId = getattr(a, 'layerId', None)
+	return layerId is not None and layerId == getattr(b, 'layerId', None)
+
+
+class Area(object):
+	"""\
+	A panel of the bar: plotted values plus the geometry to place them.
+	Drawing is attached by the plugin.
+	"""
+	def __init__(self, w, h, title = None, titleAlign = 'left', widthAdjust = 1.0, bgColor = None, infoText = None):
+		self.w = w
+		self.h = h
+		self.widthAdjust = widthAdjust
+		self.title = title
+		self.titleAlign = titleAlign
+		self.bgColor = bgColor
+		self.infoText = infoText
+		self.top = 0
+		self.left = 0
+		self.isMouseOver = False
+		self.values = {'foreground': [], 'background': []}
+		self.xMin = None
+		self.xMax = None
+		self.yMin = None
+		self.yMax = None
+		self.xScope = 0
+		self.yScope = 0
+
+		# Rendered image and the signature it was rendered for, set by the drawing side
+		self.image = None
+		self.imageKey = None
+
+	def __repr__(self):
+		return '<Area %s>' % (self.title)
+
+	def addValue(self, value):
+		if not value.layer in self.values:
+			self.values[value.layer] = []
+
+		self.values[value.layer].append(value)
+
+		if self.xMin == None:
+			self.xMin = value.x
+		if self.xMax == None:
+			self.xMax = value.x
+
+		if self.yMin == None:
+			self.yMin = value.y
+		if self.yMax == None:
+			self.yMax = value.y
+
+		self.xMin = min(self.xMin or 0, value.x or 0)
+		self.xMax = max(self.xMax or 0, value.x or 0)
+		self.yMin = min(self.yMin or 0, value.y or 0)
+		self.yMax = max(self.yMax or 0, value.y or 0)
+		if value.y2:
+			self.yMin = min(self.yMin or 0, value.y2 or 0)
+			self.yMax = max(self.yMax or 0, value.y2 or 0)
+		self.xScope = self.xMax - self.xMin
+		self.yScope = self.yMax - self.yMin
+
+	def height(self):
+		if self.title:
+			return self.h + AREATITLEHEIGHT
+		else:
+			return self.h
+
+	def drawingArea(self):
+		left, bottom, width, height = self.position()
+		# top = bottom + height
+		factor = 3
+		bottom += AREAINNERMARGIN * factor * 1.95
+		left += AREAINNERMARGIN * factor
+		width -= AREAINNERMARGIN * 2 * factor
+		height -= AREAINNERMARGIN * 2 * factor * 1.3
+		if self.title:
+			height -= AREATITLEHEIGHT
+		return left, bottom, width, height
+
+	def position(self):
+		bottom = self.top - self.height()
+		# top = bottom + self.height()
+		width = int(self.w * self.widthAdjust)
+		height = self.height()
+		return round(self.left), bottom, width, height
+
+	def mouseOver(self, mousePosition):
+		left, bottom, width, height = self.position()
+		if left < mousePosition.x < left + width and bottom < mousePosition.y < bottom + height:
+			self.active()
+		else:
+			self.inactive()
+
+	def active(self):
+		return
+
+	def inactive(self):
+		return
+
+	def addMasterValues(self, masterValues, font, activeLayer, glyphSideOnDisplay):
+		activeLayerChosen = False
+		for masterValue in masterValues:
+
+			masterValue = copy.copy(masterValue)
+			instanceValue = self.values['foreground'][int(masterValue.x)]
+			masterValue.y = instanceValue.y
+			nachKomma = masterValue.x % 1.0
+
+			if masterValue.x and nachKomma != 0.0:
+				instanceValue2 = self.values['foreground'][int(masterValue.x) + 1]
+				if instanceValue.y2 and instanceValue2.y2:
+					masterValue.y = Interpolate(instanceValue.y2, instanceValue2.y2, nachKomma)
+				elif instanceValue.y and instanceValue2.y2:
+					masterValue.y = Interpolate(instanceValue.y, instanceValue2.y2, nachKomma)
+				elif instanceValue.y2 and instanceValue2.y:
+					masterValue.y = Interpolate(instanceValue.y2, instanceValue2.y, nachKomma)
+				elif instanceValue.y and instanceValue2.y:
+					masterValue.y = Interpolate(instanceValue.y, instanceValue2.y, nachKomma)
+
+			# Master/layer is active
+			if glyphSideOnDisplay:
+				masterValue.color = INACTIVEMASTERCOLOR[glyphSideOnDisplay]
+			else:
+				masterValue.color = UNSELECTEDMASTERCOLOR
+
+			if isSameLayer(activeLayer, masterValue.associatedObject):
+				masterValue.size = SELECTEDMASTERSIZE
+				if glyphSideOnDisplay:
+					masterValue.color = ACTIVEMASTERCOLOR[glyphSideOnDisplay]
+				else:
+					masterValue.color = SELECTEDMASTERCOLOR
+				activeLayerChosen = True
+
+			if not activeLayerChosen and activeLayer is not None and masterValue.associatedObject is not None and activeLayer.associatedMasterId == getattr(masterValue.associatedObject, 'id', None):
+				masterValue.size = SELECTEDMASTERSIZE
+				if glyphSideOnDisplay:
+					masterValue.color = ACTIVEMASTERCOLOR[glyphSideOnDisplay]
+				else:
+					masterValue.color = SELECTEDMASTERCOLOR
+				activeLayerChosen = True
+
+			self.addValue(masterValue)
@@ -0,0 +1,57 @@
+# encoding: utf-8
+"""\
+Axis table
+
+Designspace coordinates of all masters and instances of a font, read once
+per setup, with the position of the weight axis looked up once.
+"""
+from __future__ import division, print_function, unicode_literals
+
+
+class AxisTable(object):
+	"""\
+	tags: axis tags in font order
+	masters: [(masterId, coordinates), ...]
+	instances: [coordinates, ...] in font order
+	"""
+	def __init__(self, tags, masters, instances):
+		self.tags = tuple(tags)
+		self.masterIds = tuple([masterId for masterId, coordinates in masters])
+		self.masters = dict([(masterId, tuple(coordinates)) for masterId, coordinates in masters])
+		self.instances = tuple([tuple(coordinates) for coordinates in instances])
+		# Weight axis, falls back to the first axis
+		self.weightIndex = 0
+		if 'wght' in self.tags:
+			self.weightIndex = self.tags.index('wght')
+
+	def __repr__(self):
+		return '<AxisTable %s, %s masters, %s instances>' % (', '.join(self.tags), len(self.masters), len(self.instances))
+
+	def __eq__(self, other):
+		return isinstance(other, AxisTable) and self.key == other.key
+
+	def __ne__(self, other):
+		return not self == other
+
+	def __hash__(self):
+		return hash(self.key)
+
+	@property
+	def key(self):
+		return (self.tags, tuple([(masterId, self.masters[masterId]) for masterId in self.masterIds]), self.instances)
+
+	def masterCoordinates(self, masterId):
+		return self.masters[masterId]
+
+	def instanceCoordinates(self, index):
+		return self.instances[index]
+
+	def masterWeight(self, masterId):
+		return self.masters[masterId][self.weightIndex]
+
+	def instanceWeight(self, index):
+		return self.instances[index][self.weightIndex]
+
+
+def axisTableForModel(font):
+	return AxisTable([axis.axisTag for axis in font.axes], [(master.id, master.axes) for master in font.masters], [instance.axes for instance in font.instances])
@@ -0,0 +1,219 @@
+# encoding: utf-8
+"""\
+Background computation
+
+Runs jobs off the main thread and hands their results back to it. Jobs get
+everything they need as arguments (snapshots of the font model, never
+GlyphsApp objects), and their results are only picked up on the main thread
+by collect(). The executor is injectable: ThreadExecutor runs jobs on worker
+threads, ImmediateExecutor and ManualExecutor run them synchronously for
+use without Glyphs.app.
+
+Executors follow the submit()/Future interface of concurrent.futures, so a
+concurrent.futures.ThreadPoolExecutor can be used as well.
+"""
+from __future__ import division, print_function, unicode_literals
+
+import threading, traceback
+
+try:
+	import queue
+except ImportError:
+	# Python 2
+	import Queue as queue
+
+
+class Future(object):
+	"""\
+	Result of a submitted job. Method names follow concurrent.futures.
+	"""
+	def __init__(self):
+		self._event = threading.Event()
+		self._lock = threading.Lock()
+		self._result = None
+		self._exception = None
+		self._callbacks = []
+		self._cancelled = False
+
+	def __repr__(self):
+		return '<Future %s>' % ('cancelled' if self._cancelled else 'done' if self.done() else 'pending')
+
+	def done(self):
+		return self._event.is_set()
+
+	def cancelled(self):
+		return self._cancelled
+
+	def cancel(self):
+		with self._lock:
+			if self._event.is_set():
+				return False
+			self._cancelled = True
+		self._finish(None, None)
+		return True
+
+	def result(self, timeout = None):
+		if not self._event.wait(timeout):
+			raise RuntimeError('Job not finished')
+		if self._exception is not None:
+			raise self._exception
+		return self._result
+
+	def add_done_callback(self, callback):
+		with self._lock:
+			if not self._event.is_set():
+				self._callbacks.append(callback)
+				return
+		callback(self)
+
+	def _finish(self, result, exception):
+		with self._lock:
+			if self._event.is_set():
+				return
+			self._result = result
+			self._exception = exception
+			self._event.set()
+			callbacks = self._callbacks
+			self._callbacks = []
+		for callback in callbacks:
+			try:
+				callback(self)
+			except:
+				print(traceback.format_exc())
+
+	def _run(self, job):
+		if self._cancelled:
+			return
+		try:
+			result = job()
+		except Exception as exception:
+			self._finish(None, exception)
+		else:
+			self._finish(result, None)
+
+
+class ImmediateExecutor(object):
+	"""\
+	Runs jobs right away in submit()
+	"""
+	def submit(self, job):
+		future = Future()
+		future._run(job)
+		return future
+
+
+class ManualExecutor(object):
+	"""\
+	Holds jobs until run() is called
+	"""
+	def __init__(self):
+		self.jobs = []
+
+	def submit(self, job):
+		future = Future()
+		self.jobs.append((future, job))
+		return future
+
+	def run(self):
+		jobs, self.jobs = self.jobs, []
+		for future, job in jobs:
+			future._run(job)
+		return len(jobs)
+
+
+class ThreadExecutor(object):
+	"""\
+	Runs jobs on worker daemon threads, started on first use
+	"""
+	def __init__(self, workers = 1):
+		self.workers = workers
+		self.threads = []
+		self.queue = queue.Queue()
+
+	def submit(self, job):
+		future = Future()
+		if not self.threads:
+			for i in range(self.workers):
+				thread = threading.Thread(target = self._work, name = 'Space Bar %s' % (i + 1))
+				thread.daemon = True
+				thread.start()
+				self.threads.append(thread)
+		self.queue.put((future, job))
+		return future
+
+	def _work(self):
+		while True:
+			future, job = self.queue.get()
+			future._run(job)
+
+
+class BackgroundCompute(object):
+	"""\
+	Jobs by key, at most one running per key, and at most one per slot if
+	they are submitted to one. deliver() is called on the worker thread
+	whenever a job finished, to get collect() called on the main thread.
+	"""
+	def __init__(self, executor, deliver = None):
+		self.executor = executor
+		self.deliver = deliver
+		self.running = {}
+		# {slot: key of its job}
+		self.slots = {}
+		self.submitted = 0
+		self.completed = 0
+		self.failed = 0
+		self.cancelled = 0
+
+	def __repr__(self):
+		return '<BackgroundCompute %s running, %s submitted, %s completed, %s failed, %s cancelled>' % (len(self.running), self.submitted, self.completed, self.failed, self.cancelled)
+
+	def isRunning(self, key):
+		return key in self.running
+
+	def submit(self, key, job, slot = None):
+		"""\
+		Start job for key unless one is running already. True if it was started.
+		A job of another key running in slot is cancelled, so a slot's jobs
+		don't pile up when newer keys keep arriving.
+		"""
+		if key in self.running:
+			return False
+		if slot is not None:
+			previous = self.slots.get(slot)
+			if previous in self.running and self.running.pop(previous).cancel():
+				self.cancelled += 1
+			self.slots[slot] = key
+		future = self.executor.submit(job)
+		self.running[key] = future
+		self.submitted += 1
+		if self.deliver is not None:
+			future.add_done_callback(lambda future: self.deliver())
+		return True
+
+	def collect(self):
+		"""\
+		[(key, result), ...] of the jobs that finished since the last call
+		"""
+		finished = []
+		for key, future in list(self.running.items()):
+			if future.done():
+				del self.running[key]
+				if future.cancelled():
+					continue
+				try:
+					finished.append((key, future.result()))
+					self.completed += 1
+				except:
+					self.failed += 1
+					print(traceback.format_exc())
+		return finished
+
+	def cancel(self):
+		"""\
+		Drop all running jobs. Jobs that already started still run, but their results are ignored.
+		"""
+		for future in self.running.values():
+			future.cancel()
+		self.cancelled += len(self.running)
+		self.running = {}
+		self.slots = {}
@@ -0,0 +1,142 @@
+# encoding: utf-8
+"""\
+Cache keys
+
+Invalidation is decided by comparing small hashable tuples built from
+version information (glyph.lastChange, version counters, ids) instead of
+string fingerprints of the font data.
+"""
+from __future__ import division, print_function, unicode_literals
+
+
+class CacheKeys(object):
+	"""\
+	Remembers the last key seen per slot, counts hits and misses and keeps
+	a version counter per slot that goes up with every miss, so that other
+	keys can refer to a slot by a plain integer.
+	"""
+	def __init__(self):
+		self.keys = {}
+		self.versions = {}
+		self.hits = {}
+		self.misses = {}
+
+	def __repr__(self):
+		return '<CacheKeys %s>' % ', '.join(['%s: %s/%s' % (slot, self.hits.get(slot, 0), self.misses.get(slot, 0)) for slot in sorted(set(self.hits) | set(self.misses))])
+
+	def changed(self, slot, key):
+		"""\
+		True (a miss) if key differs from the last key of slot.
+		"""
+		if slot in self.keys and self.keys[slot] == key:
+			self.hits[slot] = self.hits.get(slot, 0) + 1
+			return False
+		self.keys[slot] = key
+		self.versions[slot] = self.versions.get(slot, 0) + 1
+		self.misses[slot] = self.misses.get(slot, 0) + 1
+		return True
+
+	def count(self, slot, hit):
+		"""\
+		Record a hit or miss of a cache that does its own lookup
+		"""
+		if hit:
+			self.hits[slot] = self.hits.get(slot, 0) + 1
+		else:
+			self.misses[slot] = self.misses.get(slot, 0) + 1
+
+	def version(self, slot):
+		return self.versions.get(slot, 0)
+
+	def bump(self, slot):
+		"""\
+		Invalidate slot and advance its version
+		"""
+		self.keys.pop(slot, None)
+		self.versions[slot] = self.versions.get(slot, 0) + 1
+		return self.versions[slot]
+
+	def invalidate(self, slot = None):
+		if slot is None:
+			for slot in list(self.keys.keys()):
+				self.bump(slot)
+		else:
+			self.bump(slot)
+
+	def statistics(self):
+		"""\
+		{slot: {'hits': int, 'misses': int, 'version': int}}
+		"""
+		statistics = {}
+		for slot in set(self.hits) | set(self.misses) | set(self.versions):
+			statistics[slot] = {
+				'hits': self.hits.get(slot, 0),
+				'misses': self.misses.get(slot, 0),
+				'version': self.versions.get(slot, 0),
+			}
+		return statistics
+
+	def resetStatistics(self):
+		self.hits = {}
+		self.misses = {}
+
+
+def componentNames(glyph):
+	"""\
+	Names of the glyphs used as components in any layer of glyph
+	"""
+	names = set()
+	for layer in glyph.layers:
+		try:
+			# GLYPHS 3
+			shapes = layer.shapes
+		except:
+			# GLYPHS 2
+			shapes = layer.components
+		for shape in shapes:
+			name = getattr(shape, 'componentName', None)
+			if name:
+				names.add(name)
+	return names
+
+
+class GlyphVersions(object):
+	"""\
+	Version keys of glyphs. A glyph's lastChange doesn't move when one of
+	its component base glyphs is edited, so the key also carries the
+	lastChange of all glyphs it uses as components, recursively.
+	The component names are only collected again when the glyph itself changed.
+	"""
+	def __init__(self):
+		# {glyphName: (lastChange, (baseGlyphName, ...))}
+		self.baseGlyphs = {}
+
+	def _baseGlyphNames(self, glyph):
+		if glyph.name in self.baseGlyphs and self.baseGlyphs[glyph.name][0] == glyph.lastChange:
+			return self.baseGlyphs[glyph.name][1]
+
+		font = glyph.parent
+		names = []
+		toDo = list(componentNames(glyph))
+		while toDo:
+			name = toDo.pop()
+			if name in names or name == glyph.name:
+				continue
+			names.append(name)
+			baseGlyph = font.glyphs[name]
+			if baseGlyph:
+				toDo.extend(componentNames(baseGlyph))
+		names = tuple(sorted(names))
+		self.baseGlyphs[glyph.name] = (glyph.lastChange, names)
+		return names
+
+	def key(self, glyph):
+		font = glyph.parent
+		key = [glyph.name, glyph.lastChange]
+		for name in self._baseGlyphNames(glyph):
+			baseGlyph = font.glyphs[name]
+			key.append(baseGlyph.lastChange if baseGlyph else None)
+		return tuple(key)
+
+	def clear(self):
+		self.baseGlyphs = {}
@@ -0,0 +1,123 @@
+# encoding: utf-8
+"""\
+Compositor
+
+Bookkeeping for drawing the bar in retained mode: the areas are laid out
+once per frame, each area is rendered into an image of its own, the images
+are composited into one offscreen image of the whole bar, and that image is
+what gets drawn into the view. The compositor decides which of these steps
+a frame needs. Areas whose signature didn't change keep their image, and a
+frame equal to the last one is a single blit of the bar image.
+"""
+from __future__ import division, print_function, unicode_literals
+
+from spacinginvadercore.constants import *
+
+
+def valueSignature(value):
+	return (value.x, value.y, value.y2, value.size, value.label)
+
+def areaSignature(area, renderKey = None):
+	"""\
+	Everything the rendered image of area depends on.
+	renderKey: what the rendering depends on besides the area, e.g. (scale, appearance)
+	"""
+	left, bottom, width, height = area.position()
+	return (
+		renderKey,
+		width,
+		height,
+		area.title,
+		area.titleAlign,
+		area.infoText,
+		area.bgColor,
+		area.isMouseOver,
+		tuple([valueSignature(value) for value in area.values['foreground']]),
+		tuple([valueSignature(value) for value in area.values['background']]),
+	)
+
+
+class BarLayout(object):
+	"""\
+	Horizontal layout of areas, centered in a bar of viewportWidth.
+	lefts are relative to the left edge of the bar.
+	"""
+	def __init__(self, areas, viewportWidth):
+		widthSum = 0
+		for area in areas:
+			widthSum += area.w
+		widthSum += (len(areas) - 1) * AREAOUTERMARGIN
+		self.widthAdjust = 1.0
+		if widthSum + 2*PAGEMARGIN > viewportWidth:
+			self.widthAdjust = (viewportWidth - 2*PAGEMARGIN) / float(widthSum)
+			widthSum *= self.widthAdjust
+		self.width = viewportWidth
+		self.widthSum = widthSum
+		self.height = 0
+		if areas:
+			self.height = areas[0].height() + 2 * PAGEMARGIN
+
+		self.lefts = []
+		left = 0
+		for area in areas:
+			self.lefts.append(left)
+			left += area.w * self.widthAdjust + AREAOUTERMARGIN
+
+	def __repr__(self):
+		return '<BarLayout %s areas, %sx%s>' % (len(self.lefts), self.width, self.height)
+
+	def apply(self, areas, viewportLeft, viewportTop):
+		"""\
+		Place areas in view coordinates
+		"""
+		leftBorder = int(viewportLeft + self.width / 2.0 - self.widthSum / 2.0)
+		for area, left in zip(areas, self.lefts):
+			area.top = viewportTop - PAGEMARGIN
+			area.left = leftBorder + left
+			area.widthAdjust = self.widthAdjust
+
+
+class Compositor(object):
+	"""\
+	Remembers what the bar image was made of
+	"""
+	def __init__(self):
+		self.key = None
+		# Offscreen image of the whole bar, owned by the drawing side
+		self.image = None
+		self.renders = 0
+		self.composites = 0
+		self.blits = 0
+
+	def __repr__(self):
+		return '<Compositor %s renders, %s composites, %s blits>' % (self.renders, self.composites, self.blits)
+
+	def frame(self, areas, layoutKey, renderKey = None):
+		"""\
+		Areas whose image needs rendering again, None if the bar image can be drawn as it is.
+		layoutKey: whatever else the bar image depends on (e.g. its size).
+		renderKey: what the images of all areas depend on (e.g. scale, appearance).
+		Sets area.imageKey of the dirty areas, the caller renders their images.
+		"""
+		self.blits += 1
+		signatures = [areaSignature(area, renderKey) for area in areas]
+		key = (layoutKey, tuple(signatures))
+		if self.image is not None and key == self.key:
+			return None
+		self.key = key
+		self.composites += 1
+		dirty = []
+		for area, signature in zip(areas, signatures):
+			if area.image is None or area.imageKey != signature:
+				area.image = None
+				area.imageKey = signature
+				dirty.append(area)
+		self.renders += len(dirty)
+		return dirty
+
+	def invalidate(self):
+		self.key = None
+		self.image = None
+
+	def statistics(self):
+		return {'renders': self.renders, 'composites': self.composites, 'blits': self.blits}
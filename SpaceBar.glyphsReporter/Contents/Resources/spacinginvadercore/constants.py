@@ -0,0 +1,77 @@
+# encoding: utf-8
+from __future__ import division, print_function, unicode_literals
+
+PAGEMARGIN = 8
+AREACORNERRADIUS = 4
+AREAOUTERMARGIN = 1
+AREAINNERMARGIN = 6
+AREATITLEHEIGHT = 20
+AREAGRAYVALUE = .90
+AREATRANSPARENCY = 1.0
+INACTIVEMASTERCOLOR = {
+	'left': (57, 169, 220),
+	'right': (248, 179, 52),
+}
+ACTIVEMASTERCOLOR = {
+	'left': (11, 143, 181),
+	'right': (242, 148, 0),
+}
+AREASTANDARDWIDTH = 250
+AREASTANDARDHEIGHT = 80
+POINTSIZESMALL = 6
+POINTSIZELARGE = 15
+UNSELECTEDMASTERCOLOR = (200, 200, 200)
+UNSELECTEDMASTERSIZE = 14
+SELECTEDMASTERCOLOR = (160, 160, 160)
+SELECTEDMASTERSIZE = 20
+LINECOLOR = (100, 100, 100)
+ACTIVECOLOR = (0, 0, 0)
+INACTIVECOLOR = (140, 140, 140)
+EMPTYCOLOR = (128, 128, 128)
+DEVIATIONCOLOR = (233, 93, 15)
+DEVIATIONORIGINALCOLOR = (120, 120, 120)
+KERNINGEXCEPTIONCOLOR = (229, 53, 45)
+KERNINGNEGATIVECOLOR = (0, 158, 224)
+KERNINGPOSITIVECOLOR = (248, 179, 52)
+INTERPOLATIONPOSITIVECOLOR = (234, 102, 50)
+ORIGIN = 'top' # topright, topleft, top, left, right, bottomleft, bottomright, bottom
+
+# Glyphs reports missing kerning as NSNotFound
+NOKERNING = 9223372036854775807
+KERNINGTHRESHOLD = 1000000000
+
+# Number of per-glyph panel results kept around
+GLYPHCACHESIZE = 64
+# Number of interpolated layers (one per instance and glyph) kept around
+INTERPOLATEDLAYERCACHESIZE = 4096
+# Number of glyphs of an instance's interpolated font kept around, enough for the glyphs on display and the prefetched ones
+PROXYGLYPHCACHESIZE = 16
+
+# Debugging: check interpolated instance kerning against the kerning of the instances' interpolated fonts
+DEBUGINSTANCEKERNING = False
+
+# Idle-time prefetch: cursor positions ahead and behind, seconds per slice, seconds between slices
+PREFETCHDISTANCE = 3
+PREFETCHBUDGET = 0.01
+PREFETCHDELAY = 0.05
+
+# Recomputation during continuous edits: computations per second per panel, seconds without edits until the exact result
+COMPUTERATE = 15
+SETTLEDELAY = 0.15
+
+# Frames kept by the instrumentation
+INSTRUMENTATIONSIZE = 240
+
+# Frames captured by the profiler
+PROFILEFRAMES = 50
+
+# Panels shown per glyph, in display order: (action, name, sideOfGlyph)
+GLYPHPANELS = (
+	('sidebearings', 'LSB', 'left'),
+	('width', 'width', None),
+	('bboxw', 'bboxw', None),
+	('bboxh', 'bboxh', None),
+	('bboxt', 'bboxt', None),
+	('bboxb', 'bboxb', None),
+	('sidebearings', 'RSB', 'right'),
+)
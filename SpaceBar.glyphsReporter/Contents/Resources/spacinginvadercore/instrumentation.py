@@ -0,0 +1,143 @@
+# encoding: utf-8
+"""\
+Instrumentation
+
+Timings of the stages of each frame (snapshot, interpolation, deviation
+layers, kerning, layout, render), kept for the last frames in a ring buffer,
+plus counters (e.g. calls into Glyphs.app). Switched off, timing a stage
+costs one attribute lookup.
+"""
+from __future__ import division, print_function, unicode_literals
+
+import time, json, collections
+
+from spacinginvadercore.constants import INSTRUMENTATIONSIZE
+
+STAGES = ('snapshot', 'interpolation', 'deviationLayers', 'kerning', 'layout', 'render')
+
+
+class _NoTiming(object):
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exception):
+		return False
+
+_noTiming = _NoTiming()
+
+
+class _Timing(object):
+	def __init__(self, instrumentation, stage):
+		self.instrumentation = instrumentation
+		self.stage = stage
+
+	def __enter__(self):
+		self.start = self.instrumentation.clock()
+		return self
+
+	def __exit__(self, *exception):
+		self.instrumentation.record(self.stage, self.instrumentation.clock() - self.start)
+		return False
+
+
+class Instrumentation(object):
+	"""\
+	frames: ring buffer of {'time': start, 'total': seconds, 'stages': {stage: seconds}}
+	counters: {name: count} since the last reset()
+	"""
+	def __init__(self, capacity = INSTRUMENTATIONSIZE, enabled = False, clock = time.time):
+		self.clock = clock
+		self.enabled = enabled
+		self.frames = collections.deque(maxlen = capacity)
+		self.counters = {}
+		self.current = None
+
+	def __repr__(self):
+		return '<Instrumentation %s, %s frames>' % ('on' if self.enabled else 'off', len(self.frames))
+
+	def beginFrame(self):
+		if self.enabled:
+			self.current = {'time': self.clock(), 'total': 0.0, 'stages': {}}
+
+	def endFrame(self):
+		"""\
+		Store the current frame and return it
+		"""
+		frame = self.current
+		if frame is not None:
+			frame['total'] = self.clock() - frame['time']
+			self.frames.append(frame)
+			self.current = None
+		return frame
+
+	def stage(self, name):
+		"""\
+		Context manager that adds the time spent in it to stage name of the current frame
+		"""
+		if not self.enabled:
+			return _noTiming
+		return _Timing(self, name)
+
+	def record(self, stage, seconds):
+		if self.enabled and self.current is not None:
+			stages = self.current['stages']
+			stages[stage] = stages.get(stage, 0.0) + seconds
+
+	def count(self, name, number = 1):
+		if self.enabled:
+			self.counters[name] = self.counters.get(name, 0) + number
+
+	def reset(self):
+		self.frames.clear()
+		self.counters = {}
+		self.current = None
+
+	def lastFrame(self):
+		if self.frames:
+			return self.frames[-1]
+
+	def statistics(self):
+		"""\
+		{stage: {'frames', 'total', 'mean', 'max'}} over the frames in the buffer, 'frame' for whole frames
+		"""
+		samples = {'frame': [frame['total'] for frame in self.frames]}
+		for frame in self.frames:
+			for stage, seconds in frame['stages'].items():
+				samples.setdefault(stage, []).append(seconds)
+		statistics = {}
+		for stage, values in samples.items():
+			if values:
+				statistics[stage] = {
+					'frames': len(values),
+					'total': sum(values),
+					'mean': sum(values) / len(values),
+					'max': max(values),
+				}
+		return statistics
+
+	def report(self, extra = None):
+		"""\
+		Everything as a JSON-compatible dict. extra: further sections, e.g. cache statistics
+		"""
+		report = {
+			'stages': self.statistics(),
+			'counters': dict(self.counters),
+			'frames': list(self.frames),
+		}
+		report.update(extra or {})
+		return report
+
+	def export(self, path, extra = None):
+		with open(path, 'w') as f:
+			json.dump(self.report(extra), f, indent = 2, sort_keys = True)
+		return path
+
+	def summary(self):
+		"""\
+		One line of the last frame's timings in milliseconds
+		"""
+		frame = self.lastFrame()
+		if frame is None:
+			return ''
+		parts = ['%s %.1f' % (stage, frame['stages'][stage] * 1000) for stage in STAGES if stage in frame['stages']]
+		return 'Frame %.1f ms: %s' % (frame['total'] * 1000, ', '.join(parts))
@@ -0,0 +1,157 @@
+# encoding: utf-8
+from __future__ import division, print_function, unicode_literals
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+
+def NormalizeMinMax(source_floor, source_ceiling, target_floor, target_ceiling, value):
+	"""\
+	Normalize a value from source scale to target scale.
+	"""
+	source_floor, source_ceiling, target_floor, target_ceiling, value = map(float, (source_floor, source_ceiling, target_floor, target_ceiling, value))
+	if target_floor == 0:
+		return (value - source_floor)/(source_ceiling - source_floor) * target_ceiling
+	else:
+		return (value - source_floor)/(source_ceiling - source_floor) * (target_ceiling - target_floor) + target_floor
+
+
+def Interpolate(a, b, p, limit = False):
+	"""\
+	Interpolate between values a and b at float position p (0-1)
+	Limit: No extrapolation
+	"""
+	i = a + (b - a) * p
+	if limit and i < a:
+		return a
+	elif limit and i > b:
+		return b
+	else:
+		return i
+
+
+def InterpolateOnAxis(points, location):
+	"""\
+	Piecewise linear interpolation of [(location, value), ...] sorted by location.
+	Locations outside the outermost points are extrapolated from the outermost segment,
+	or take the outermost value if that segment has no width.
+	"""
+	if len(points) == 1:
+		return points[0][1]
+
+	# Extrapolation
+	if location < points[0][0]:
+		if points[0][0] == points[1][0]:
+			return points[0][1]
+		t = NormalizeMinMax(points[0][0], points[1][0], 0, 1, location)
+		return Interpolate(points[0][1], points[1][1], t)
+	if location > points[-1][0]:
+		if points[-2][0] == points[-1][0]:
+			return points[-1][1]
+		t = NormalizeMinMax(points[-2][0], points[-1][0], 0, 1, location)
+		return Interpolate(points[-2][1], points[-1][1], t)
+
+	# Interpolation
+	value = None
+	for i in range(len(points) - 1):
+		if points[i][0] == location:
+			value = points[i][1]
+		elif points[i][0] < location < points[i + 1][0]:
+			t = NormalizeMinMax(points[i][0], points[i + 1][0], 0, 1, location)
+			value = Interpolate(points[i][1], points[i + 1][1], t)
+		elif points[i + 1][0] == location:
+			value = points[i + 1][1]
+	return value
+
+
+def SegmentWeights(locations, location):
+	"""\
+	Weights of the points at sorted locations that InterpolateOnAxis() uses for location,
+	as [(pointIndex, weight), ...]
+	"""
+	if len(locations) == 1:
+		return [(0, 1.0)]
+
+	# Extrapolation, from the nearest point alone if the outermost segment has no width
+	if location < locations[0]:
+		i = 0
+		if locations[0] == locations[1]:
+			return [(0, 1.0)]
+	elif location > locations[-1]:
+		i = len(locations) - 2
+		if locations[-2] == locations[-1]:
+			return [(len(locations) - 1, 1.0)]
+
+	# Interpolation
+	else:
+		for i, pointLocation in enumerate(locations):
+			if pointLocation == location:
+				return [(i, 1.0)]
+		for i in range(len(locations) - 1):
+			if locations[i] < location < locations[i + 1]:
+				break
+
+	t = NormalizeMinMax(locations[i], locations[i + 1], 0, 1, location)
+	return [(i, 1.0 - t), (i + 1, t)]
+
+
+class InterpolationPlan(object):
+	"""\
+	Instance×point weight matrix for piecewise linear interpolation along one axis,
+	extrapolation rows included. Built once per designspace, evaluating a metric
+	for all instances is then one matrix-vector product.
+	Uses NumPy if available.
+	"""
+	def __init__(self, pointLocations, instanceLocations):
+		self.pointLocations = list(pointLocations)
+		self.instanceLocations = list(instanceLocations)
+		self.rows = [SegmentWeights(self.pointLocations, location) for location in self.instanceLocations]
+		self.matrix = self._matrix()
+		self.pointPositions = [self._pointPosition(location) for location in self.pointLocations]
+
+	def _matrix(self):
+		if numpy is None:
+			return None
+		matrix = numpy.zeros((len(self.instanceLocations), len(self.pointLocations)))
+		for row, weights in enumerate(self.rows):
+			for column, weight in weights:
+				matrix[row, column] = weight
+		return matrix
+
+	def __repr__(self):
+		return '<InterpolationPlan %s instances × %s points>' % (len(self.instanceLocations), len(self.pointLocations))
+
+	def _pointPosition(self, location):
+		"""\
+		Positions of a point on the instance axis: index of an instance at the same location,
+		or fractional index between two neighbouring instances
+		"""
+		positions = []
+		for x, instanceLocation in enumerate(self.instanceLocations):
+			if instanceLocation == location:
+				positions.append(x)
+		for i in range(len(self.instanceLocations) - 1):
+			if self.instanceLocations[i] < location < self.instanceLocations[i + 1]:
+				positions.append(i + NormalizeMinMax(self.instanceLocations[i], self.instanceLocations[i + 1], 0, 1, location))
+		return positions
+
+	def evaluate(self, values):
+		"""\
+		Values of all instances from the values at the points
+		"""
+		if self.matrix is not None:
+			return self.matrix.dot(numpy.asarray(values, dtype=float)).tolist()
+		return [sum(values[column] * weight for column, weight in weights) for weights in self.rows]
+
+	def evaluateMany(self, columns):
+		"""\
+		Several metrics at once: columns is a list of value lists, one per metric.
+		Returns one list of instance values per metric.
+		"""
+		if not columns:
+			return []
+		if self.matrix is not None:
+			return self.matrix.dot(numpy.asarray(columns, dtype=float).T).T.tolist()
+		return [self.evaluate(values) for values in columns]
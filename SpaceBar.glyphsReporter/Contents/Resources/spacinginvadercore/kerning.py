@@ -0,0 +1,136 @@
+# encoding: utf-8
+"""\
+Kerning index
+
+Resolves the effective kerning of a glyph pair per master once (class kerning
+and exceptions, in order of precedence) and answers repeated questions for
+the same pair with a single dict lookup. Changes to a master's kerning only
+drop the entries they can affect.
+"""
+from __future__ import division, print_function, unicode_literals
+
+from spacinginvadercore.constants import KERNINGTHRESHOLD
+
+
+def pairKey(leftGlyph, rightGlyph):
+	return (leftGlyph.name, rightGlyph.name, leftGlyph.rightKerningKey, rightGlyph.leftKerningKey)
+
+
+class KerningIndex(object):
+	"""\
+	Kerning of font per master. Lookups in the font go through font.kerningForPair().
+	"""
+	def __init__(self, font):
+		self.font = font
+		# {masterId: {(leftKey, rightKey): value or None}}
+		self.raw = {}
+		# {masterId: {pairKey: (kerning, exception)}}
+		self.resolved = {}
+		self.versions = {}
+		# {masterId: {pairKey: change key the pair was last read from the font at}}
+		self.checked = {}
+		self.hits = 0
+		self.misses = 0
+
+	def __repr__(self):
+		return '<KerningIndex %s masters, %s hits, %s misses>' % (len(self.resolved), self.hits, self.misses)
+
+	def version(self, masterId):
+		return self.versions.get(masterId, 0)
+
+	def rawKerning(self, masterId, leftKey, rightKey):
+		"""\
+		Kerning stored for exactly these keys, None if there is none
+		"""
+		entries = self.raw.setdefault(masterId, {})
+		key = (leftKey, rightKey)
+		if key not in entries:
+			value = self.font.kerningForPair(masterId, leftKey, rightKey)
+			if value is None or value > KERNINGTHRESHOLD:
+				value = None
+			entries[key] = value
+		return entries[key]
+
+	def _resolve(self, masterId, leftName, rightName, leftClass, rightClass):
+		# Exceptions, strongest first. Without a kerning group, the glyph name
+		# is the class key, so those lookups aren't exceptions.
+		for leftKey, rightKey in ((leftName, rightName), (leftClass, rightName), (leftName, rightClass)):
+			if (leftKey, rightKey) != (leftClass, rightClass):
+				value = self.rawKerning(masterId, leftKey, rightKey)
+				if value is not None:
+					return (value, True)
+		value = self.rawKerning(masterId, leftClass, rightClass)
+		return (value or 0, False)
+
+	def kerning(self, masterId, leftGlyph, rightGlyph):
+		"""\
+		(kerning, exception) of the pair in master
+		"""
+		key = pairKey(leftGlyph, rightGlyph)
+		resolved = self.resolved.setdefault(masterId, {})
+		if key in resolved:
+			self.hits += 1
+			return resolved[key]
+		self.misses += 1
+		resolved[key] = self._resolve(masterId, *key)
+		return resolved[key]
+
+	def hasKerning(self, leftGlyph, rightGlyph):
+		"""\
+		True if the pair is kerned in any master
+		"""
+		for master in self.font.masters:
+			kerning, exception = self.kerning(master.id, leftGlyph, rightGlyph)
+			if kerning != 0 or exception:
+				return True
+		return False
+
+	def setPair(self, masterId, leftKey, rightKey, value):
+		"""\
+		Record a changed kerning value and drop the resolved pairs it affects
+		"""
+		if value is not None and value > KERNINGTHRESHOLD:
+			value = None
+		entries = self.raw.setdefault(masterId, {})
+		if (leftKey, rightKey) not in entries:
+			# Never read, so nothing resolved depends on it
+			entries[(leftKey, rightKey)] = value
+			return False
+		if entries[(leftKey, rightKey)] == value:
+			return False
+		entries[(leftKey, rightKey)] = value
+		resolved = self.resolved.get(masterId, {})
+		for key in list(resolved.keys()):
+			leftName, rightName, leftClass, rightClass = key
+			if leftKey in (leftName, leftClass) and rightKey in (rightName, rightClass):
+				del resolved[key]
+		self.versions[masterId] = self.version(masterId) + 1
+		return True
+
+	def refreshPair(self, masterId, leftGlyph, rightGlyph, changeKey = None):
+		"""\
+		Read the pair's kerning from the font again, unless it was read at
+		changeKey already (never skipped without one). True if anything changed.
+		"""
+		key = pairKey(leftGlyph, rightGlyph)
+		checked = self.checked.setdefault(masterId, {})
+		if changeKey is not None and checked.get(key) == changeKey:
+			return False
+		checked[key] = changeKey
+		leftName, rightName, leftClass, rightClass = key
+		changed = False
+		for leftKey, rightKey in set(((leftName, rightName), (leftClass, rightName), (leftName, rightClass), (leftClass, rightClass))):
+			value = self.font.kerningForPair(masterId, leftKey, rightKey)
+			if self.setPair(masterId, leftKey, rightKey, value):
+				changed = True
+		return changed
+
+	def invalidate(self, masterId = None):
+		if masterId is None:
+			for masterId in set(self.raw) | set(self.resolved) | set(self.checked):
+				self.invalidate(masterId)
+		else:
+			self.raw.pop(masterId, None)
+			self.resolved.pop(masterId, None)
+			self.checked.pop(masterId, None)
+			self.versions[masterId] = self.version(masterId) + 1
@@ -0,0 +1,74 @@
+# encoding: utf-8
+"""\
+Least recently used cache
+
+Keeps the results of recently seen glyphs around so that moving the cursor
+back and forth in a tab only costs a lookup.
+"""
+from __future__ import division, print_function, unicode_literals
+
+from collections import OrderedDict
+
+
+class LRUCache(object):
+	"""\
+	Bounded mapping that evicts the least recently used entries.
+	onEviction(key, value) is called for every entry that gets pushed out.
+	"""
+	def __init__(self, capacity = 32, onEviction = None):
+		self.entries = OrderedDict()
+		self.capacity = max(1, int(capacity))
+		self.onEviction = onEviction
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+
+	def __repr__(self):
+		return '<LRUCache %s/%s, %s hits, %s misses, %s evictions>' % (len(self.entries), self.capacity, self.hits, self.misses, self.evictions)
+
+	def __len__(self):
+		return len(self.entries)
+
+	def __contains__(self, key):
+		return key in self.entries
+
+	def get(self, key, default = None):
+		if key in self.entries:
+			# Re-insert to mark as most recently used (no move_to_end() in Python 2)
+			value = self.entries.pop(key)
+			self.entries[key] = value
+			self.hits += 1
+			return value
+		self.misses += 1
+		return default
+
+	def peek(self, key, default = None):
+		"""\
+		Like get(), without touching recency or statistics
+		"""
+		return self.entries.get(key, default)
+
+	def put(self, key, value):
+		self.entries.pop(key, None)
+		self.entries[key] = value
+		self._evict()
+
+	def pop(self, key, default = None):
+		return self.entries.pop(key, default)
+
+	def keys(self):
+		return list(self.entries.keys())
+
+	def clear(self):
+		self.entries.clear()
+
+	def setCapacity(self, capacity):
+		self.capacity = max(1, int(capacity))
+		self._evict()
+
+	def _evict(self):
+		while len(self.entries) > self.capacity:
+			key, value = self.entries.popitem(last = False)
+			self.evictions += 1
+			if self.onEviction:
+				self.onEviction(key, value)
@@ -0,0 +1,483 @@
+# encoding: utf-8
+"""\
+Metrics core
+
+Computes the Area/Value data of all Space Bar panels from a font model
+(see spacinginvadercore.model). Nothing in here talks to Glyphs.app or AppKit.
+"""
+from __future__ import division, print_function, unicode_literals
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+from spacinginvadercore.constants import *
+from spacinginvadercore.areas import Area, Value, isSameLayer
+from spacinginvadercore.axes import axisTableForModel
+from spacinginvadercore.interpolation import InterpolationPlan
+from spacinginvadercore.variations import VariationPlan
+from spacinginvadercore.kerning import KerningIndex
+from spacinginvadercore.model import Layer, Rect
+from spacinginvadercore.snapshot import isEmptyLayer, snapshotLayer, snapshotLayers
+
+
+# Designspace
+
+def axisTable(font):
+	"""\
+	AxisTable of the font model, built on first use after masters or instances changed
+	"""
+	if font.axisTable is None:
+		font.axisTable = axisTableForModel(font)
+	return font.axisTable
+
+def weightAxisIndex(font):
+	return axisTable(font).weightIndex
+
+def weightValueForMaster(master):
+	return master.axes[weightAxisIndex(master.font)]
+
+def weightValueForInstance(instance):
+	return instance.axes[weightAxisIndex(instance.font)]
+
+def isBraceLayer(layer):
+	return '{' in layer.name and '}' in layer.name
+
+def isBracketLayer(layer):
+	return '[' in layer.name or ']' in layer.name
+
+def hasDeviations(glyph):
+	for layer in glyph.layers:
+		if '[' in layer.name or ']' in layer.name or '{' in layer.name:
+			return True
+	return False
+
+def braceValues(layer):
+	return [float(x.strip()) for x in layer.name.split('{')[1].split('}')[0].split(',')]
+
+def braceLocation(glyph, layer):
+	"""\
+	Designspace location of a brace layer. Axes missing from the brace take the
+	coordinates of the layer's master.
+	"""
+	location = list(glyph.parent.masters[layer.associatedMasterId].axes)
+	for axis, value in enumerate(braceValues(layer)):
+		if axis < len(location):
+			location[axis] = value
+	return tuple(location)
+
+def glyphMasterLocations(glyph):
+	"""\
+	[[location, layer], ...] of master and brace layers, with full designspace locations, sorted
+	"""
+	font = glyph.parent
+	layers = []
+	for layer in glyph.layers:
+		if layer.layerId == layer.associatedMasterId:
+			layers.append([tuple(font.masters[layer.layerId].axes), layer])
+		elif isBraceLayer(layer):
+			layers.append([braceLocation(glyph, layer), layer])
+	layers.sort(key=lambda x: x[0], reverse=False)
+	return layers
+
+
+# Interpolated layers of the model
+
+LAYERMETRICS = (
+	lambda layer: layer.bounds.origin.x,
+	lambda layer: layer.bounds.origin.y,
+	lambda layer: layer.bounds.size.width,
+	lambda layer: layer.bounds.size.height,
+	lambda layer: layer.width,
+	lambda layer: layer.LSB,
+	lambda layer: layer.RSB,
+)
+
+class _ReorderedPlan(InterpolationPlan):
+	"""\
+	InterpolationPlan built on sorted point locations, with its columns in the original point order
+	"""
+	def __init__(self, plan, order):
+		self.pointLocations = [plan.pointLocations[order.index(i)] for i in range(len(order))]
+		self.instanceLocations = plan.instanceLocations
+		self.rows = [[(order[column], weight) for column, weight in weights] for weights in plan.rows]
+		self.matrix = self._matrix()
+		self.pointPositions = [plan.pointPositions[order.index(i)] for i in range(len(order))]
+
+def variationPlan(font, pointLocations, instances):
+	"""\
+	Plan for points at designspace locations (coordinate tuples), cached in the font model.
+	If no more than one axis varies, this is the piecewise linear InterpolationPlan along
+	that axis, otherwise a VariationPlan over all axes with the first master as origin.
+	"""
+	pointLocations = tuple([tuple(location) for location in pointLocations])
+	instanceLocations = tuple([tuple(instance.axes) for instance in instances])
+	key = ('variation', pointLocations, instanceLocations)
+	if not key in font.interpolationPlans:
+		locations = pointLocations + instanceLocations
+		varyingAxes = [axis for axis in range(len(pointLocations[0])) if len(set([location[axis] for location in locations])) > 1]
+		if len(varyingAxes) > 1:
+			plan = VariationPlan(pointLocations, instanceLocations, font.masters[0].axes)
+		else:
+			axis = varyingAxes[0] if varyingAxes else weightAxisIndex(font)
+			order = sorted(range(len(pointLocations)), key = lambda i: pointLocations[i][axis])
+			plan = InterpolationPlan([pointLocations[i][axis] for i in order], [location[axis] for location in instanceLocations])
+			if order != list(range(len(order))):
+				plan = _ReorderedPlan(plan, order)
+		font.interpolationPlans[key] = plan
+	return font.interpolationPlans[key]
+
+def interpolateLayers(font, points, instances):
+	"""\
+	Metrics-only layers of the instances, interpolated from [(location, layer), ...]
+	with locations as designspace coordinate tuples
+	"""
+	plan = variationPlan(font, [location for location, layer in points], instances)
+	x, y, w, h, width, LSB, RSB = plan.evaluateMany([[metric(layer) for location, layer in points] for metric in LAYERMETRICS])
+	shapes = []
+	for location, layer in points:
+		if not isEmptyLayer(layer):
+			shapes = list(layer.shapes)
+			break
+	return [Layer(instance.name, name = instance.name, width = width[i], bounds = Rect(x[i], y[i], w[i], h[i]), LSB = LSB[i], RSB = RSB[i], shapes = shapes) for i, instance in enumerate(instances)]
+
+def interpolatedLayers(glyph, instances):
+	"""\
+	[(instanceCount, instance, layer), ...] interpolated from master and brace layers
+	"""
+	points = [(location, layer) for location, layer in glyphMasterLocations(glyph)]
+	return [(i, instance, layer) for i, (instance, layer) in enumerate(zip(instances, interpolateLayers(glyph.parent, points, instances)))]
+
+def layersWithoutDeviations(glyph, instances):
+	"""\
+	Interpolated layers ignoring brace and bracket layers, or [] if the glyph has none of those
+	"""
+	if not hasDeviations(glyph):
+		return []
+	points = [(location, layer) for location, layer in glyphMasterLocations(glyph) if not isBraceLayer(layer)]
+	return interpolateLayers(glyph.parent, points, instances)
+
+
+# Masters
+
+def masterValues(font, instances):
+	"""\
+	Background dots marking the masters at and between the displayed instances,
+	placed by their designspace locations
+	"""
+	values = []
+	if font.masters and instances:
+		plan = variationPlan(font, [master.axes for master in font.masters], instances)
+		for master, positions in zip(font.masters, plan.pointPositions):
+			for x in positions:
+				value = Value(x, 0)
+				value.size = UNSELECTEDMASTERSIZE
+				value.color = UNSELECTEDMASTERCOLOR
+				value.layer = 'background'
+				value.associatedObject = master
+				values.append(value)
+	return values
+
+def braceMasterValues(glyph, layers, masterValues, activeLayer = None):
+	"""\
+	masterValues extended by dots for the glyph's brace layers, placed by
+	their designspace locations among the instances of layers
+	"""
+	masterValues = list(masterValues)
+	points = glyphMasterLocations(glyph)
+	if layers and any([isBraceLayer(layer) for location, layer in points]):
+		# The plan the instance layers were interpolated with
+		plan = variationPlan(glyph.parent, [location for location, layer in points], [instance for i, instance, layer in layers])
+		for (location, layer), positions in zip(points, plan.pointPositions):
+			if isBraceLayer(layer):
+				for x in positions:
+					value = Value(x, 0)
+					value.size = UNSELECTEDMASTERSIZE
+					value.color = UNSELECTEDMASTERCOLOR
+					value.layer = 'background'
+					if isSameLayer(activeLayer, layer):
+						value.associatedObject = layer
+					masterValues.insert(0, value)
+	return masterValues
+
+
+# Panels
+
+def addValues(action, layers, layersWithoutDeviations, masterValues, glyph, sideOfGlyph, glyphSideOnDisplay, mode, title = None, activeLayer = None, bgColor = None):
+	"""\
+	layers: [(x, instance or master, LayerMetrics), ...]
+	layersWithoutDeviations: [LayerMetrics, ...] by instance, or []
+	"""
+	sbArea = Area(AREASTANDARDWIDTH, AREASTANDARDHEIGHT, title, titleAlign = sideOfGlyph or 'center', bgColor = bgColor)
+	font = glyph.parent
+	if mode == 'masters':
+		for i, master, layer in layers:
+			sbValue = layer.value(action, sideOfGlyph)
+
+			# Value is valid
+			value = Value(i, sbValue)
+			if isSameLayer(layer, activeLayer):
+				value.size = POINTSIZELARGE
+			value.label = sbValue
+			sbArea.addValue(value)
+
+	elif mode == 'instances':
+		for instanceCount, instance, layer in layers:
+			sbValue = layer.value(action, sideOfGlyph)
+			sbValue2 = None
+			if layersWithoutDeviations:
+				sbValue2 = layersWithoutDeviations[instanceCount].value(action, sideOfGlyph)
+
+			value = Value(instanceCount, sbValue)
+
+			# Value is valid
+			if sbValue != None:
+				if instance.active:
+					value.color = ACTIVECOLOR
+					value.label = int(round(sbValue))
+				else:
+					value.color = INACTIVECOLOR
+					value.label = None
+
+				# Add second value
+				if sbValue2 != None and sbValue != sbValue2 and abs(sbValue - sbValue2) > 1.0:
+					value.color = DEVIATIONORIGINALCOLOR
+					value.y2 = value.y
+					value.y = sbValue2
+
+			# Value is empty
+			else:
+				value.color = EMPTYCOLOR
+				value.label = None
+
+			value.associatedObject = instance
+			sbArea.addValue(value)
+
+		# Add masters
+		sbArea.addMasterValues(masterValues, font, activeLayer, glyphSideOnDisplay)
+
+	return sbArea
+
+def masterLayerMetrics(glyph):
+	"""\
+	[(x, master, LayerMetrics), ...] of the glyph's master layers
+	"""
+	return [(i, master, snapshotLayer(glyph.layers[master.id])) for i, master in enumerate(glyph.parent.masters)]
+
+def glyphAreas(glyph, layers, layersWithoutDeviations, masterValues, glyphSideOnDisplay, mode, actions, names, activeLayer = None, bgColor = None):
+	"""\
+	All enabled per-glyph panels, in display order.
+	layers and layersWithoutDeviations hold LayerMetrics snapshots of the interpolated layers.
+	"""
+	if mode == 'masters':
+		layers = masterLayerMetrics(glyph)
+	areas = []
+	for action, name, sideOfGlyph in GLYPHPANELS:
+		if action in actions:
+			areas.append(addValues(action, layers, layersWithoutDeviations, masterValues, glyph, sideOfGlyph, glyphSideOnDisplay, mode, title = names[name], activeLayer = activeLayer, bgColor = bgColor))
+	return areas
+
+def glyphPanels(glyph, instances, masterValues, glyphSideOnDisplay, mode, actions, names, activeLayer = None, bgColor = None):
+	"""\
+	(glyph, areas): the panels of a model glyph, with the instance layers
+	interpolated from its master and brace layers. Reads only the model,
+	so it can run off the main thread.
+	"""
+	instanceLayers = []
+	deviationFreeLayers = []
+	if mode == 'instances':
+		instanceLayers = [(i, instance, snapshotLayer(layer)) for i, instance, layer in interpolatedLayers(glyph, instances)]
+		deviationFreeLayers = snapshotLayers(layersWithoutDeviations(glyph, instances))
+		masterValues = braceMasterValues(glyph, instanceLayers, masterValues, activeLayer)
+	return (glyph, glyphAreas(glyph, instanceLayers, deviationFreeLayers, masterValues, glyphSideOnDisplay, mode, actions, names, activeLayer = activeLayer, bgColor = bgColor))
+
+
+# Kerning
+
+def kerningIndex(font):
+	"""\
+	KerningIndex of the font model, created on first use
+	"""
+	if font.kerningIndex is None:
+		font.kerningIndex = KerningIndex(font)
+	return font.kerningIndex
+
+def getKerning(master, leftGlyph, rightGlyph):
+	return kerningIndex(leftGlyph.parent).kerning(master.id, leftGlyph, rightGlyph)
+
+def pairHasKerning(font, leftGlyph, rightGlyph):
+	return kerningIndex(font).hasKerning(leftGlyph, rightGlyph)
+
+def kerningWeights(font, instances):
+	"""\
+	(masterIds, rows): per instance the factor of each master in its interpolation.
+	Masters that no instance uses are left out.
+	"""
+	masterIds = [master.id for master in font.masters if any([instance.instanceInterpolations.get(master.id, 0) for instance in instances])]
+	rows = [[instance.instanceInterpolations.get(masterId, 0) for masterId in masterIds] for instance in instances]
+	return masterIds, rows
+
+def interpolatedKerningForPairs(font, instances, pairs):
+	"""\
+	Kerning of the instances as the weighted sum of their masters' kerning,
+	for each of pairs [(leftGlyph, rightGlyph), ...]: [[kerning per instance], ...]
+	"""
+	index = kerningIndex(font)
+	masterIds, rows = kerningWeights(font, instances)
+	columns = [[index.kerning(masterId, leftGlyph, rightGlyph)[0] for masterId in masterIds] for leftGlyph, rightGlyph in pairs]
+	if not masterIds:
+		return [[0] * len(instances) for pair in pairs]
+	if numpy is not None and columns:
+		return numpy.dot(numpy.asarray(columns, dtype=float), numpy.asarray(rows, dtype=float).T).tolist()
+	return [[sum([kerning * factor for kerning, factor in zip(column, row)]) for row in rows] for column in columns]
+
+def interpolatedKerning(instance, leftGlyph, rightGlyph):
+	"""\
+	Kerning of an instance as the weighted sum of its masters' kerning
+	"""
+	return interpolatedKerningForPairs(leftGlyph.parent, [instance], [(leftGlyph, rightGlyph)])[0][0]
+
+def kerningDifferences(values, otherValues, tolerance = 0.5):
+	"""\
+	Indices where two lists of instance kerning disagree by more than tolerance.
+	Missing kerning (None or NOKERNING) counts as 0.
+	"""
+	def clean(value):
+		if value is None or value > KERNINGTHRESHOLD:
+			return 0
+		return value
+	return [i for i, (value, otherValue) in enumerate(zip(values, otherValues)) if abs(clean(value) - clean(otherValue)) > tolerance]
+
+def addKerning(leftGlyph, rightGlyph, mode, instances, masterValues, activeLayer, selectedMasterId = None, instanceKerning = None, title = 'Kerning'):
+	"""\
+	instanceKerning: kerning values of the displayed instances, if already known.
+	Otherwise they are interpolated from the masters' kerning.
+	"""
+	font = leftGlyph.parent
+	kerningArea = Area(AREASTANDARDWIDTH, AREASTANDARDHEIGHT, title = title, titleAlign = 'center')
+
+	if pairHasKerning(font, leftGlyph, rightGlyph):
+		if mode == 'masters':
+			for i, master in enumerate(font.masters):
+				kerning, exception = getKerning(master, leftGlyph, rightGlyph)
+				value = Value(i, kerning)
+				value.label = int(kerning)
+				kerningArea.addValue(value)
+				if master.id == selectedMasterId:
+					value.size = POINTSIZELARGE
+				if exception:
+					value.color = KERNINGEXCEPTIONCOLOR
+				elif kerning < 0:
+					value.color = KERNINGNEGATIVECOLOR
+				elif kerning > 0:
+					value.color = KERNINGPOSITIVECOLOR
+				else:
+					value.color = EMPTYCOLOR
+
+		elif mode == 'instances':
+			if instanceKerning is None:
+				instanceKerning = interpolatedKerningForPairs(font, instances, [(leftGlyph, rightGlyph)])[0]
+
+			for instanceCount, instance in enumerate(instances):
+				sbValue = instanceKerning[instanceCount]
+				if sbValue != None and sbValue > KERNINGTHRESHOLD:
+					sbValue = 0
+				value = Value(instanceCount, sbValue)
+				# Value is valid
+				if sbValue != None:
+					if instance.active:
+						if sbValue < 0:
+							value.color = KERNINGNEGATIVECOLOR
+						elif sbValue > 0:
+							value.color = KERNINGPOSITIVECOLOR
+						value.label = int(round(sbValue))
+					else:
+						value.color = INACTIVECOLOR
+						value.label = None
+				# Value is empty
+				else:
+					value.color = EMPTYCOLOR
+					value.label = None
+				kerningArea.addValue(value)
+
+			# Add masters
+			kerningArea.addMasterValues(masterValues, font, activeLayer, None)
+
+	return kerningArea
+
+
+# Interpolation space
+
+def drawValuesInInterpolationSpace(font, area, masterLayers, positiveColor = None, negativeColor = None, activeLayer = None, selectedLayer = None, selectedMasterId = None):
+	"""\
+	masterLayers: [[location, layer or master, value], ...] with designspace locations
+	"""
+	plan = variationPlan(font, [location for location, layer, interpolatedValue in masterLayers], font.instances)
+
+	# Draw masters
+	layersToDots = []
+	for i, (location, layer, interpolatedValue) in enumerate(masterLayers):
+		for x in plan.pointPositions[i]:
+			value = Value(x, interpolatedValue)
+			value.size = UNSELECTEDMASTERSIZE
+			value.color = UNSELECTEDMASTERCOLOR
+			value.layer = 'background'
+
+			area.addValue(value)
+			layersToDots.append((layer, value))
+
+	masterSelected = False
+
+	# select master by layer object
+	for selection in (activeLayer, selectedLayer):
+		if selection is not None and not masterSelected:
+			for key, value in layersToDots:
+				if key is selection or isSameLayer(selection, key):
+					value.size = SELECTEDMASTERSIZE
+					value.color = SELECTEDMASTERCOLOR
+					masterSelected = True
+					break
+
+	if not masterSelected:
+		for key, value in layersToDots:
+			if getattr(key, 'id', None) == selectedMasterId or getattr(key, 'layerId', None) == selectedMasterId:
+				value.color = SELECTEDMASTERCOLOR
+				value.size = SELECTEDMASTERSIZE
+
+	# Draw actual values
+	instanceValues = plan.evaluate([interpolatedValue for location, layer, interpolatedValue in masterLayers])
+	for instanceCount, instance in enumerate(font.instances):
+		sbValue = instanceValues[instanceCount]
+
+		value = Value(instanceCount, sbValue)
+		value.label = int(round(sbValue))
+		value.associatedObject = instance
+		area.addValue(value)
+		if instance.active == False:
+			value.color = EMPTYCOLOR
+			value.label = None
+		else:
+			if int(round(sbValue)) < 0 and negativeColor:
+				value.color = negativeColor
+			elif int(round(sbValue)) > 0 and positiveColor:
+				value.color = positiveColor
+
+def addInterpolation(font, mode, title, selectedMasterId = None, selectedLayer = None):
+	instancesArea = Area(AREASTANDARDWIDTH, AREASTANDARDHEIGHT, title, 'center')
+
+	if mode == 'masters':
+		for i, master in enumerate(font.masters):
+			masterWeightValue = weightValueForMaster(master)
+			value = Value(masterWeightValue, masterWeightValue)
+			value.label = int(masterWeightValue)
+			instancesArea.addValue(value)
+			if master.id == selectedMasterId:
+				value.size = POINTSIZELARGE
+
+	elif mode == 'instances':
+		# The masters' weight, interpolated in the designspace
+		masterLayers = [[master.axes, master, weightValueForMaster(master)] for master in font.masters]
+		drawValuesInInterpolationSpace(font, instancesArea, masterLayers, positiveColor = INTERPOLATIONPOSITIVECOLOR, selectedLayer = selectedLayer, selectedMasterId = selectedMasterId)
+
+	return instancesArea
@@ -0,0 +1,255 @@
+# encoding: utf-8
+"""\
+Plain font model
+
+Stand-in objects for the parts of the GlyphsApp API that Space Bar reads.
+Attribute names follow the GlyphsApp Python wrapper, so the metrics core
+can work on these objects without Glyphs.app or AppKit.
+"""
+from __future__ import division, print_function, unicode_literals
+
+from spacinginvadercore.constants import NOKERNING
+
+
+class Point(object):
+	def __init__(self, x = 0, y = 0):
+		self.x = x
+		self.y = y
+
+	def __repr__(self):
+		return '<Point (%s, %s)>' % (self.x, self.y)
+
+
+class Size(object):
+	def __init__(self, width = 0, height = 0):
+		self.width = width
+		self.height = height
+
+	def __repr__(self):
+		return '<Size (%s, %s)>' % (self.width, self.height)
+
+
+class Rect(object):
+	"""\
+	Stands in for NSRect: origin.x, origin.y, size.width, size.height
+	"""
+	def __init__(self, x = 0, y = 0, width = 0, height = 0):
+		self.origin = Point(x, y)
+		self.size = Size(width, height)
+
+	def __repr__(self):
+		return '<Rect (%s, %s, %s, %s)>' % (self.origin.x, self.origin.y, self.size.width, self.size.height)
+
+
+class ObjectList(list):
+	"""\
+	List that can also be accessed by key, like font.masters[masterId] or glyph.layers[layerId]
+	"""
+	keyAttribute = 'id'
+
+	def __getitem__(self, key):
+		if isinstance(key, (int, slice)):
+			return list.__getitem__(self, key)
+		for item in self:
+			if getattr(item, self.keyAttribute) == key:
+				return item
+		raise KeyError(key)
+
+	def __delitem__(self, key):
+		if isinstance(key, (int, slice)):
+			return list.__delitem__(self, key)
+		list.remove(self, self[key])
+
+
+class LayerList(ObjectList):
+	keyAttribute = 'layerId'
+
+
+class GlyphDict(dict):
+	"""\
+	font.glyphs: missing glyphs are None, as in GlyphsApp
+	"""
+	def __missing__(self, key):
+		return None
+
+
+class Axis(object):
+	def __init__(self, name, axisTag, axisId = None):
+		self.name = name
+		self.axisTag = axisTag
+		self.axisId = axisId or axisTag
+
+	def __repr__(self):
+		return '<Axis %s (%s)>' % (self.name, self.axisTag)
+
+
+class Master(object):
+	def __init__(self, id, name = None, axes = None):
+		self.id = id
+		self.name = name or id
+		self.axes = list(axes or [])
+		self.font = None
+
+	def __repr__(self):
+		return '<Master %s %s>' % (self.name, self.axes)
+
+
+class Instance(object):
+	def __init__(self, name, axes = None, instanceInterpolations = None, active = True):
+		self.name = name
+		self.axes = list(axes or [])
+		self.instanceInterpolations = dict(instanceInterpolations or {})
+		self.active = active
+		self.font = None
+
+	def __repr__(self):
+		return '<Instance %s %s>' % (self.name, self.axes)
+
+	@property
+	def widthValue(self):
+		return self.axes[1] if len(self.axes) > 1 else 0
+
+
+class Component(object):
+	def __init__(self, componentName):
+		self.componentName = componentName
+
+	def __repr__(self):
+		return '<Component %s>' % (self.componentName)
+
+
+class Layer(object):
+	"""\
+	A layer reduced to its metrics.
+	LSB and RSB are derived from the bounds unless given explicitly.
+	"""
+	def __init__(self, layerId, associatedMasterId = None, name = None, width = 0, bounds = None, LSB = None, RSB = None, shapes = None):
+		self.layerId = layerId
+		self.associatedMasterId = associatedMasterId or layerId
+		self.name = name or ''
+		self.width = width
+		self.bounds = bounds or Rect()
+		self.shapes = list(shapes or [])
+		self._LSB = LSB
+		self._RSB = RSB
+		self.parent = None
+
+	def __repr__(self):
+		return '<Layer %s "%s">' % (self.layerId, self.name)
+
+	def copy(self):
+		return Layer(self.layerId, self.associatedMasterId, self.name, self.width, self.bounds, LSB = self._LSB, RSB = self._RSB, shapes = self.shapes)
+
+	@property
+	def LSB(self):
+		if self._LSB is not None:
+			return self._LSB
+		if not self.shapes:
+			return 0
+		return self.bounds.origin.x
+
+	@property
+	def RSB(self):
+		if self._RSB is not None:
+			return self._RSB
+		if not self.shapes:
+			return 0
+		return self.width - self.bounds.origin.x - self.bounds.size.width
+
+
+class Glyph(object):
+	def __init__(self, name, layers = None, leftKerningGroup = None, rightKerningGroup = None):
+		self.name = name
+		self.leftKerningGroup = leftKerningGroup
+		self.rightKerningGroup = rightKerningGroup
+		self.layers = LayerList()
+		self.parent = None
+		self.lastChange = 0
+		for layer in layers or []:
+			self.addLayer(layer)
+
+	def __repr__(self):
+		return '<Glyph %s>' % (self.name)
+
+	def copy(self):
+		glyph = Glyph(self.name, [layer.copy() for layer in self.layers], self.leftKerningGroup, self.rightKerningGroup)
+		glyph.lastChange = self.lastChange
+		return glyph
+
+	def addLayer(self, layer):
+		layer.parent = self
+		self.layers.append(layer)
+
+	@property
+	def leftKerningKey(self):
+		if self.leftKerningGroup:
+			return '@MMK_R_%s' % self.leftKerningGroup
+		return self.name
+
+	@property
+	def rightKerningKey(self):
+		if self.rightKerningGroup:
+			return '@MMK_L_%s' % self.rightKerningGroup
+		return self.name
+
+
+class Font(object):
+	def __init__(self, axes = None, masters = None, instances = None, glyphs = None, kerning = None):
+		self.axes = list(axes or [])
+		self.masters = ObjectList()
+		self.instances = []
+		self.glyphs = GlyphDict()
+		# {masterId: {leftKey: {rightKey: value}}}
+		self.kerning = kerning or {}
+		# InterpolationPlans by (point locations, instance locations)
+		self.interpolationPlans = {}
+		# KerningIndex, see spacinginvadercore.metrics.kerningIndex()
+		self.kerningIndex = None
+		# AxisTable, see spacinginvadercore.metrics.axisTable()
+		self.axisTable = None
+		for master in masters or []:
+			self.addMaster(master)
+		for instance in instances or []:
+			self.addInstance(instance)
+		for glyph in glyphs or []:
+			self.addGlyph(glyph)
+
+	def __repr__(self):
+		return '<Font %s masters, %s instances, %s glyphs>' % (len(self.masters), len(self.instances), len(self.glyphs))
+
+	def snapshot(self, glyphs = ()):
+		"""\
+		Copy of the axes, masters, instances and interpolation plans with only
+		copies of glyphs and no kerning, for reading on another thread while
+		this font keeps changing
+		"""
+		font = Font(axes = self.axes, masters = [Master(master.id, master.name, master.axes) for master in self.masters],
+			instances = [Instance(instance.name, instance.axes, instance.instanceInterpolations, instance.active) for instance in self.instances],
+			glyphs = [glyph.copy() for glyph in glyphs])
+		font.interpolationPlans = dict(self.interpolationPlans)
+		return font
+
+	def addMaster(self, master):
+		master.font = self
+		self.masters.append(master)
+		self.axisTable = None
+
+	def addInstance(self, instance):
+		instance.font = self
+		self.instances.append(instance)
+		self.axisTable = None
+
+	def addGlyph(self, glyph):
+		glyph.parent = self
+		self.glyphs[glyph.name] = glyph
+
+	def kerningForPair(self, masterId, leftKey, rightKey):
+		try:
+			return self.kerning[masterId][leftKey][rightKey]
+		except KeyError:
+			return NOKERNING
+
+	def setKerningForPair(self, masterId, leftKey, rightKey, value):
+		self.kerning.setdefault(masterId, {}).setdefault(leftKey, {})[rightKey] = value
+		if self.kerningIndex is not None:
+			self.kerningIndex.setPair(masterId, leftKey, rightKey, value)
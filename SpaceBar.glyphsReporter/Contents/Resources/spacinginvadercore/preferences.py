@@ -0,0 +1,104 @@
+# encoding: utf-8
+"""\
+Preferences
+
+Space Bar's preferences, read from the user defaults once and served from
+memory afterwards. Changes are written through to the user defaults right
+away, and every change advances a version counter that cache keys can use
+instead of the values of all preferences.
+"""
+from __future__ import division, print_function, unicode_literals
+
+PREFERENCEPREFIX = 'de.yanone.spaceBar.'
+
+
+class DictDefaults(object):
+	"""\
+	Stands in for NSUserDefaults, backed by a dict
+	"""
+	def __init__(self, values = None):
+		self.values = dict(values or {})
+		self.reads = 0
+		self.writes = 0
+
+	def __repr__(self):
+		return '<DictDefaults %s keys>' % len(self.values)
+
+	def dictionaryRepresentation(self):
+		self.reads += 1
+		return dict(self.values)
+
+	def objectForKey_(self, key):
+		self.reads += 1
+		return self.values.get(key)
+
+	def setObject_forKey_(self, value, key):
+		self.writes += 1
+		if value is None:
+			self.values.pop(key, None)
+		else:
+			self.values[key] = value
+
+
+class PreferenceStore(object):
+	"""\
+	defaults: NSUserDefaults.standardUserDefaults() or a DictDefaults
+	"""
+	def __init__(self, defaults, prefix = PREFERENCEPREFIX):
+		self.defaults = defaults
+		self.prefix = prefix
+		self.values = {}
+		self.version = 0
+		self.observers = []
+		self.load()
+
+	def __repr__(self):
+		return '<PreferenceStore %s keys, version %s>' % (len(self.values), self.version)
+
+	def load(self):
+		"""\
+		Read all keys of prefix from the defaults, e.g. after they were changed elsewhere
+		"""
+		values = {}
+		for key, value in dict(self.defaults.dictionaryRepresentation()).items():
+			if key.startswith(self.prefix):
+				values[key[len(self.prefix):]] = value
+		if values != self.values:
+			self.values = values
+			self.version += 1
+			self.notify(None)
+
+	def get(self, key, default = None):
+		return self.values.get(key, default)
+
+	def set(self, key, value):
+		"""\
+		Change a preference and write it to the defaults. True if the value changed.
+		"""
+		if key in self.values and self.values[key] == value:
+			return False
+		if value is None and key not in self.values:
+			return False
+		self.defaults.setObject_forKey_(value, self.prefix + key)
+		if value is None:
+			del self.values[key]
+		else:
+			self.values[key] = value
+		self.version += 1
+		self.notify(key)
+		return True
+
+	def addObserver(self, callback):
+		"""\
+		callback(key) is called after a preference changed, with None after load()
+		"""
+		if callback not in self.observers:
+			self.observers.append(callback)
+
+	def removeObserver(self, callback):
+		if callback in self.observers:
+			self.observers.remove(callback)
+
+	def notify(self, key):
+		for callback in list(self.observers):
+			callback(key)
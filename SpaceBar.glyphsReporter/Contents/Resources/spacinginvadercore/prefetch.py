@@ -0,0 +1,108 @@
+# encoding: utf-8
+"""\
+Prefetch
+
+Works off a queue of jobs in small, time-boxed slices while the app is idle,
+so that the neighbours of the text cursor are already in the glyph cache
+when the cursor gets there. Jobs that return a generator are run one step
+(one next()) at a time, so a slice can end between the stages of a glyph.
+"""
+from __future__ import division, print_function, unicode_literals
+
+import time, traceback
+
+
+def neighbourPositions(cursor, count, length):
+	"""\
+	Cursor positions around cursor, nearest first, forward before backward
+	"""
+	positions = []
+	for distance in range(1, count + 1):
+		for position in (cursor + distance, cursor - distance):
+			if 0 <= position <= length:
+				positions.append(position)
+	return positions
+
+
+class Prefetcher(object):
+	"""\
+	Queue of callables that is worked off in slices of at most budget seconds.
+	A step is only started if the steps so far suggest it ends within the
+	slice, except for the first step of a slice, so the queue always advances.
+	schedule() replaces the queue, cancel() empties it. Each of them starts a
+	new generation, so a slice that is running while the queue gets replaced
+	stops after its current step.
+	"""
+	def __init__(self, budget = 0.01, clock = time.time):
+		self.budget = budget
+		self.clock = clock
+		self.jobs = []
+		self.generation = 0
+		self.completed = 0
+		self.cancelled = 0
+		self.steps = 0
+		# Running average of the duration of a step
+		self.stepTime = 0.0
+
+	def __repr__(self):
+		return '<Prefetcher %s pending, %s completed, %s cancelled>' % (len(self.jobs), self.completed, self.cancelled)
+
+	@property
+	def pending(self):
+		return bool(self.jobs)
+
+	def schedule(self, jobs):
+		self.cancel()
+		self.jobs = list(jobs)
+		return self.generation
+
+	def cancel(self):
+		self.cancelled += len(self.jobs)
+		self.jobs = []
+		self.generation += 1
+
+	def step(self):
+		"""\
+		Run the next step of the first job. A generator the job returns
+		takes its place at the front of the queue until it is exhausted.
+		"""
+		generation = self.generation
+		job = self.jobs[0]
+		try:
+			if not hasattr(job, 'send'):
+				job = job()
+				if generation != self.generation:
+					return
+				if hasattr(job, 'send'):
+					self.jobs[0] = job
+			if hasattr(job, 'send'):
+				next(job)
+				return
+		except StopIteration:
+			pass
+		except:
+			print(traceback.format_exc())
+		if generation == self.generation:
+			self.jobs.pop(0)
+		self.completed += 1
+
+	def runSlice(self, budget = None):
+		"""\
+		Run steps until the queue is empty or the next step wouldn't fit into the budget.
+		Returns True if jobs are left.
+		"""
+		if budget is None:
+			budget = self.budget
+		generation = self.generation
+		deadline = self.clock() + budget
+		steps = 0
+		while self.jobs and generation == self.generation:
+			now = self.clock()
+			if steps and now + self.stepTime > deadline:
+				break
+			self.step()
+			duration = self.clock() - now
+			self.stepTime = duration if not self.steps else self.stepTime * 0.8 + duration * 0.2
+			self.steps += 1
+			steps += 1
+		return self.pending
@@ -0,0 +1,104 @@
+# encoding: utf-8
+"""\
+Profiling
+
+Captures a profile of the next frames, so that a slow font can be profiled
+without editing the plugin. The result is a pstats file (for pstats,
+snakeviz and the like) and a collapsed-stack text file (for flame graph
+tools, one "caller;callee;... microseconds" line per stack).
+
+cProfile only records caller/callee pairs, not whole stacks, so the stacks
+are rebuilt from the call graph: when a function is called from several
+places, the time of its callees is split in proportion to the time spent
+in it from each caller.
+"""
+from __future__ import division, print_function, unicode_literals
+
+import os, time, cProfile, pstats
+
+
+def functionLabel(function):
+	filename, line, name = function
+	if filename == '~':
+		# Built-in
+		return name.replace(';', ',')
+	return ('%s (%s:%s)' % (name, os.path.basename(filename), line)).replace(';', ',')
+
+def collapsedStacks(stats, maxDepth = 64):
+	"""\
+	{stack: microseconds} of self time per stack, from a pstats.Stats
+	"""
+	entries = stats.stats
+	callees = {}
+	for function, (primitiveCalls, calls, ownTime, cumulativeTime, callers) in entries.items():
+		for caller, edge in callers.items():
+			# Edge: (primitive calls, calls, own time, cumulative time) of function when called from caller
+			callees.setdefault(caller, []).append((function, edge[3]))
+	roots = [function for function, entry in entries.items() if not entry[4]]
+
+	stacks = {}
+	def walk(function, path, seconds):
+		primitiveCalls, calls, ownTime, cumulativeTime, callers = entries[function]
+		ratio = seconds / cumulativeTime if cumulativeTime else 0.0
+		path = path + (functionLabel(function),)
+		selfTime = ownTime * ratio
+		if len(path) < maxDepth:
+			for callee, edgeTime in callees.get(function, []):
+				# Recursion is counted where it starts
+				if functionLabel(callee) not in path and callee in entries:
+					walk(callee, path, edgeTime * ratio)
+		else:
+			selfTime = seconds
+		microseconds = int(round(selfTime * 1000000))
+		if microseconds > 0:
+			stack = ';'.join(path)
+			stacks[stack] = stacks.get(stack, 0) + microseconds
+
+	for root in roots:
+		walk(root, (), entries[root][3])
+	return stacks
+
+def writeCollapsedStacks(stats, path):
+	stacks = collapsedStacks(stats)
+	with open(path, 'w') as f:
+		for stack in sorted(stacks.keys()):
+			f.write('%s %s\n' % (stack, stacks[stack]))
+	return path
+
+
+class ProfileCapture(object):
+	"""\
+	Profiles the next frames calls of run() and writes the files to directory
+	"""
+	def __init__(self, frames, directory, name = 'Space Bar Profile'):
+		self.frames = frames
+		self.directory = directory
+		self.name = name
+		self.captured = 0
+		self.profile = cProfile.Profile()
+		# (pstats path, collapsed stacks path) once written
+		self.paths = None
+
+	def __repr__(self):
+		return '<ProfileCapture %s/%s frames>' % (self.captured, self.frames)
+
+	@property
+	def active(self):
+		return self.captured < self.frames
+
+	def run(self, function, *args, **kwargs):
+		self.profile.enable()
+		try:
+			return function(*args, **kwargs)
+		finally:
+			self.profile.disable()
+			self.captured += 1
+			if not self.active:
+				self.paths = self.write()
+
+	def write(self):
+		base = os.path.join(self.directory, '%s %s' % (self.name, time.strftime('%Y-%m-%d %H-%M-%S')))
+		stats = pstats.Stats(self.profile)
+		stats.dump_stats(base + '.pstats')
+		writeCollapsedStacks(stats, base + '.collapsed.txt')
+		return (base + '.pstats', base + '.collapsed.txt')
@@ -0,0 +1,209 @@
+# encoding: utf-8
+"""\
+Rendering
+
+Turns an Area into a handful of batched drawing calls: all lines of an area
+go into one path per style, all dots into one path per style and fill mode.
+What the calls do is up to a Backend. The plugin draws with AppKit, the
+RecordingBackend just records the calls so they can be inspected anywhere.
+
+Colours are passed as style names ('text', 'line', 'dot', 'deviationDot',
+'background', 'mouseOver') that the backend resolves, or as a colour object
+of the backend itself (an Area's bgColor).
+"""
+from __future__ import division, print_function, unicode_literals
+
+from spacinginvadercore.constants import *
+
+
+class Backend(object):
+	"""\
+	Drawing calls the renderer makes. Rects are (x, y, width, height).
+	"""
+	def fillRect(self, rect, color):
+		raise NotImplementedError
+
+	def fillRoundedRect(self, rect, radius, color):
+		raise NotImplementedError
+
+	def strokeLines(self, segments, color, strokeWidth = 1.0):
+		"""\
+		segments: [(x1, y1, x2, y2), ...], stroked as one path
+		"""
+		raise NotImplementedError
+
+	def drawOvals(self, rects, color, fill = True):
+		"""\
+		Ovals in rects, filled or stroked as one path
+		"""
+		raise NotImplementedError
+
+	def drawText(self, text, point, fontSize, align, color = 'text'):
+		raise NotImplementedError
+
+
+class RecordingBackend(Backend):
+	"""\
+	Records the drawing calls as (method, arguments) in self.calls
+	"""
+	def __init__(self):
+		self.calls = []
+
+	def __repr__(self):
+		return '<RecordingBackend %s calls>' % len(self.calls)
+
+	def fillRect(self, rect, color):
+		self.calls.append(('fillRect', (rect, color)))
+
+	def fillRoundedRect(self, rect, radius, color):
+		self.calls.append(('fillRoundedRect', (rect, radius, color)))
+
+	def strokeLines(self, segments, color, strokeWidth = 1.0):
+		self.calls.append(('strokeLines', (list(segments), color, strokeWidth)))
+
+	def drawOvals(self, rects, color, fill = True):
+		self.calls.append(('drawOvals', (list(rects), color, fill)))
+
+	def drawText(self, text, point, fontSize, align, color = 'text'):
+		self.calls.append(('drawText', (text, point, fontSize, align, color)))
+
+	def counts(self):
+		"""\
+		{method: number of calls}
+		"""
+		counts = {}
+		for method, arguments in self.calls:
+			counts[method] = counts.get(method, 0) + 1
+		return counts
+
+	def clear(self):
+		self.calls = []
+
+
+def CleanFloat(number):
+	"""\
+	Return number without decimal points if .0, otherwise with .x)
+	"""
+	try:
+		if number % 1 == 0:
+			return str(int(number))
+		else:
+			return str(float(number))
+	except:
+		return number
+
+
+class _Batch(object):
+	"""\
+	Dots and lines of an area, collected by style
+	"""
+	def __init__(self):
+		self.lines = []
+		self.ovals = {}
+		self.labels = []
+
+	def addOval(self, color, fill, rect):
+		self.ovals.setdefault((color, fill), []).append(rect)
+
+	def addDot(self, x, y, y2, size, label, hasValue):
+		# Deviation dot
+		if y2:
+			deviationSize = size * 1.5
+			self.addOval('deviationDot', hasValue, (x - deviationSize / 2.0, y2 - deviationSize / 2.0, deviationSize, deviationSize))
+		self.addOval('dot', hasValue, (x - size / 2.0, y - size / 2.0, size, size))
+		if label != 0 and label != None and label != '':
+			self.labels.append((CleanFloat(label), (x, y - 20)))
+
+	def flush(self, backend, scale):
+		if self.lines:
+			backend.strokeLines(self.lines, 'line')
+		for color, fill in (('deviationDot', True), ('deviationDot', False), ('dot', True), ('dot', False)):
+			if self.ovals.get((color, fill)):
+				backend.drawOvals(self.ovals[(color, fill)], color, fill)
+		for text, point in self.labels:
+			backend.drawText(text, point, 10 * scale, 'center')
+		self.lines = []
+		self.ovals = {}
+		self.labels = []
+
+
+def renderArea(area, backend, position, scale = 1.0):
+	"""\
+	Draw area into backend, in coordinates relative to position (left, bottom, width, height)
+	"""
+	# Sort values by interpolation space weight value
+	area.values['foreground'].sort(key=lambda value: value.x, reverse=False)
+
+	left, bottom, width, height = position
+	left = 0
+	bottom = 0
+	top = bottom + height
+
+	# Background
+	if area.title:
+		if area.isMouseOver:
+			color = 'mouseOver'
+		else:
+			color = area.bgColor or 'background'
+		backend.fillRoundedRect((left, bottom, width, height), AREACORNERRADIUS, color)
+
+	# Title
+	if area.title:
+		topAdjust = 7
+		if area.titleAlign == 'left':
+			point = (left + AREAINNERMARGIN, top - AREAINNERMARGIN - topAdjust)
+		elif area.titleAlign == 'center':
+			point = (left + width / 2.0, top - AREAINNERMARGIN - topAdjust)
+		else:
+			point = (left - AREAINNERMARGIN + width, top - AREAINNERMARGIN - topAdjust)
+		backend.drawText(area.title, point, 10 * scale, area.titleAlign)
+
+	# Draw values
+	left, bottom, width, height = area.drawingArea()
+	left -= position[0]
+	bottom -= position[1]
+
+	if area.infoText:
+		backend.drawText(area.infoText, (left - 15, bottom - 20), 10 * scale, 'bottomleft')
+		return
+
+	batch = _Batch()
+	dots = []
+	if area.yMin != None and area.yMax != None:
+		xScopeAdjust = 1.0
+		if area.xScope > 0:
+			xScopeAdjust = width / float(area.xScope)
+
+		yScopeAdjust = 1.0
+		if area.yScope > 0:
+			if area.yScope > height:
+				yScopeAdjust = height / float(area.yScope)
+
+		# horizontal point zero line
+		y = bottom + (0 - area.yMin) * yScopeAdjust
+		if bottom + AREACORNERRADIUS <= y <= bottom + height - AREACORNERRADIUS:
+			backend.strokeLines([(0, y, width * xScopeAdjust, y)], 'line', .25)
+
+		for value in area.values['background']:
+			x = left + ((value.x or 0) - area.xMin) * xScopeAdjust
+			y = bottom + ((value.y or 0) - area.yMin) * yScopeAdjust
+			batch.addDot(x, y, None, value.size, value.label, value.y != None)
+		batch.flush(backend, scale)
+
+		for value in area.values['foreground']:
+			x = left + ((value.x or 0) - area.xMin) * xScopeAdjust
+			y = bottom + ((value.y or 0) - area.yMin) * yScopeAdjust
+			y2 = None
+			if value.y2:
+				y2 = bottom + ((value.y2 or 0) - area.yMin) * yScopeAdjust
+			dots.append((x, y, y2, value))
+
+	# Lines between neighbouring dots, deviations connect to the deviating end
+	for (x1, y1, y21, value1), (x2, y2, y22, value2) in zip(dots[:-1], dots[1:]):
+		if y21 or y22:
+			batch.lines.append((x1, y21 or y1, x2, y22 or y2))
+		batch.lines.append((x1, y1, x2, y2))
+
+	for x, y, y2, value in dots:
+		batch.addDot(x, y, y2, value.size, value.label, value.y != None)
+	batch.flush(backend, scale)
@@ -0,0 +1,234 @@
+# encoding: utf-8
+"""\
+Headless frames
+
+computeFrame() computes the bar for one cursor position the way foreground()
+does, from font models only: the interpolation space panel, the panels of
+the glyphs left and right of the cursor, the kerning panel, the layout of the
+bar and the rendering of all areas into a drawing backend. The plugin's
+caches are left out, so every frame is computed in full.
+
+TraceReplay runs the frames of a recorded session (see
+spacinginvadercore.trace) through computeFrame() against the font state the
+trace holds, e.g. to time the frames a user saw stutter. Instance layers are
+always interpolated from the master and brace layers, as with the
+'instanceLayers' preference set to 'masters'.
+"""
+from __future__ import division, print_function, unicode_literals
+
+import time
+
+from spacinginvadercore.constants import *
+from spacinginvadercore.areas import Area
+from spacinginvadercore.compositor import BarLayout
+from spacinginvadercore.render import RecordingBackend, renderArea
+from spacinginvadercore.instrumentation import Instrumentation
+from spacinginvadercore.snapshot import snapshotLayer, snapshotLayers
+from spacinginvadercore.trace import digest, stateDigest, fontFromRecord, glyphFromRecord, applyKerningRecord, readTrace
+from spacinginvadercore import metrics
+
+try:
+	clock = time.perf_counter
+except AttributeError:
+	# Python 2
+	clock = time.time
+
+ACTIONS = tuple([action for action, name, sideOfGlyph in GLYPHPANELS])
+NAMES = dict([(name, name) for action, name, sideOfGlyph in GLYPHPANELS])
+VIEWPORT = (0, 0, 1600, 1000)
+
+
+def sidePanels(font, glyph, side, mode, instances, masterValues, actions, names, activeLayer, instrumentation):
+	"""\
+	Panels of the glyph on one side of the cursor, as glyphData() and glyphPanels() of the plugin compute them
+	"""
+	layers = []
+	layersWithoutDeviations = []
+	if mode == 'instances':
+		with instrumentation.stage('interpolation'):
+			layers = [(i, instance, snapshotLayer(layer)) for i, instance, layer in metrics.interpolatedLayers(glyph, instances)]
+		with instrumentation.stage('deviationLayers'):
+			layersWithoutDeviations = snapshotLayers(metrics.layersWithoutDeviations(glyph, instances))
+	with instrumentation.stage('values'):
+		if mode == 'instances':
+			masterValues = metrics.braceMasterValues(glyph, layers, masterValues, activeLayer)
+		return metrics.glyphAreas(glyph, layers, layersWithoutDeviations, masterValues, side, mode, actions, names, activeLayer = activeLayer)
+
+def kerningPanel(font, leftGlyph, rightGlyph, mode, instances, masterValues, activeLayer, selectedMasterId, instrumentation):
+	with instrumentation.stage('kerning'):
+		instanceKerning = None
+		if mode == 'instances' and metrics.pairHasKerning(font, leftGlyph, rightGlyph):
+			instanceKerning = metrics.interpolatedKerningForPairs(font, instances, [(leftGlyph, rightGlyph)])[0]
+		return metrics.addKerning(leftGlyph, rightGlyph, mode, instances, masterValues, activeLayer, selectedMasterId = selectedMasterId, instanceKerning = instanceKerning)
+
+def computeFrame(font, instances, masterValues, leftGlyph, rightGlyph, mode, instrumentation, backend, actions = ACTIONS, names = NAMES, interpolation = True, kerning = True, leftLayer = None, rightLayer = None, selectedLayer = None, selectedMasterId = None, viewport = VIEWPORT, scale = 1.0):
+	"""\
+	One frame for the cursor between leftGlyph and rightGlyph (either may be None).
+	leftLayer, rightLayer: the glyphs' layers in the tab, master layers of selectedMasterId if None.
+	Returns the instrumentation's frame record, None if it is switched off.
+	"""
+	if selectedMasterId is None:
+		selectedMasterId = font.masters[0].id
+	if leftGlyph is not None and leftLayer is None:
+		leftLayer = leftGlyph.layers[selectedMasterId]
+	if rightGlyph is not None and rightLayer is None:
+		rightLayer = rightGlyph.layers[selectedMasterId]
+
+	instrumentation.beginFrame()
+	groups = []
+	if interpolation:
+		with instrumentation.stage('interpolationSpace'):
+			groups.append([metrics.addInterpolation(font, mode, names.get('interpolation', 'Interpolation Space'), selectedMasterId = selectedMasterId, selectedLayer = selectedLayer)])
+	if leftGlyph is not None:
+		groups.append(sidePanels(font, leftGlyph, 'left', mode, instances, masterValues, actions, names, leftLayer, instrumentation))
+	if leftGlyph is not None and rightGlyph is not None and kerning:
+		groups.append([kerningPanel(font, leftGlyph, rightGlyph, mode, instances, masterValues, leftLayer, selectedMasterId, instrumentation)])
+	if rightGlyph is not None:
+		groups.append(sidePanels(font, rightGlyph, 'right', mode, instances, masterValues, actions, names, rightLayer, instrumentation))
+
+	x, y, width, height = viewport
+	with instrumentation.stage('layout'):
+		areas = []
+		for i, group in enumerate(groups):
+			areas.extend(group)
+			if i < len(groups) - 1:
+				areas.append(Area(10, 0))
+		if areas:
+			BarLayout(areas, width).apply(areas, x, y + height)
+
+	with instrumentation.stage('render'):
+		backend.clear()
+		for area in areas:
+			renderArea(area, backend, area.position(), scale)
+
+	return instrumentation.endFrame()
+
+
+class TraceReplay(object):
+	"""\
+	Replays the frames of a trace, given as its records (see spacinginvadercore.trace.readTrace()).
+	results: per frame {'index', 'recorded', 'replayed', 'digest', 'matches', 'stages'},
+	durations in seconds. 'matches' tells whether the font state rebuilt from
+	the records has the digest recorded for the frame.
+	"""
+	def __init__(self, records, instrumentation = None, backend = None):
+		self.records = records
+		self.instrumentation = instrumentation or Instrumentation(enabled = True, clock = clock)
+		self.backend = backend or RecordingBackend()
+		self.font = None
+		self.instances = []
+		self.masterValues = []
+		self.preferences = {}
+		self.header = None
+		# Records the font state is made of, and their digests
+		self.fontRecord = None
+		self.glyphRecords = {}
+		self.kerningRecords = {}
+		self.digests = {}
+		self.results = []
+
+	def __repr__(self):
+		return '<TraceReplay %s frames>' % len(self.results)
+
+	def setFont(self, record):
+		self.fontRecord = record
+		self.digests['font'] = digest(record)
+		self.font, self.instances = fontFromRecord(record)
+		self.masterValues = metrics.masterValues(self.font, self.instances)
+		for glyphRecord in self.glyphRecords.values():
+			self.font.addGlyph(glyphFromRecord(glyphRecord))
+		for kerningRecord in self.kerningRecords.values():
+			applyKerningRecord(self.font, kerningRecord)
+
+	def setGlyph(self, record):
+		self.glyphRecords[record['name']] = record
+		self.digests[('glyph', record['name'])] = digest(record)
+		if self.font is not None:
+			self.font.addGlyph(glyphFromRecord(record))
+
+	def setKerning(self, record):
+		key = (record['masterId'],) + tuple(record['pair'])
+		self.kerningRecords[key] = record
+		self.digests[('kerning',) + key] = digest(record)
+		if self.font is not None:
+			applyKerningRecord(self.font, record)
+
+	def frameDigest(self, record):
+		digests = [self.digests.get('font')]
+		for name in (record['left'], record['right']):
+			digests.append(self.digests.get(('glyph', name)) if name is not None else None)
+		if record['left'] is not None and record['right'] is not None and self.preferences.get('kerning'):
+			digests.append(stateDigest(*[self.digests.get(('kerning', master.id, record['left'], record['right'])) for master in self.font.masters]))
+		return stateDigest(*digests)
+
+	def layer(self, glyph, layerId):
+		if glyph is None or layerId is None:
+			return None
+		try:
+			return glyph.layers[layerId]
+		except KeyError:
+			return None
+
+	def replayFrame(self, record):
+		self.preferences.update(record.get('preferences') or {})
+		preferences = self.preferences
+		font = self.font
+		leftGlyph = font.glyphs[record['left']] if record['left'] is not None else None
+		rightGlyph = font.glyphs[record['right']] if record['right'] is not None else None
+		leftLayerId, rightLayerId = record.get('layers') or (None, None)
+		selectedLayer = None
+		if record.get('selectedLayer'):
+			name, layerId = record['selectedLayer']
+			selectedLayer = self.layer(font.glyphs[name], layerId)
+
+		frame = computeFrame(font, self.instances, self.masterValues, leftGlyph, rightGlyph, preferences.get('mode') or 'instances', self.instrumentation, self.backend,
+			actions = [action for action in ACTIONS if preferences.get(action)],
+			interpolation = bool(preferences.get('interpolation')),
+			kerning = bool(preferences.get('kerning')),
+			leftLayer = self.layer(leftGlyph, leftLayerId),
+			rightLayer = self.layer(rightGlyph, rightLayerId),
+			selectedLayer = selectedLayer,
+			selectedMasterId = record.get('masterId') if record.get('masterId') in [master.id for master in font.masters] else None,
+			viewport = record.get('viewport') or VIEWPORT,
+			scale = record.get('scale') or 1.0,
+		)
+		frameDigest = self.frameDigest(record)
+		result = {
+			'index': record['index'],
+			'recorded': record.get('duration'),
+			'replayed': frame['total'] if frame else None,
+			'digest': frameDigest,
+			'matches': frameDigest == record.get('digest'),
+			'stages': dict(frame['stages']) if frame else {},
+		}
+		self.results.append(result)
+		return result
+
+	def run(self, frames = None):
+		"""\
+		Replay the trace, or only the frames whose index is in frames. Returns the results.
+		Records before and between the selected frames are still applied.
+		"""
+		for record in self.records:
+			kind = record.get('type')
+			if kind == 'header':
+				self.header = record
+			elif kind == 'font':
+				self.setFont(record)
+			elif kind == 'glyph':
+				self.setGlyph(record)
+			elif kind == 'kerning':
+				self.setKerning(record)
+			elif kind == 'frame':
+				if frames is None or record['index'] in frames:
+					self.replayFrame(record)
+				else:
+					self.preferences.update(record.get('preferences') or {})
+		return self.results
+
+
+def replayTrace(path, frames = None):
+	"""\
+	Results of replaying the trace file at path, see TraceReplay
+	"""
+	return TraceReplay(readTrace(path)).run(frames)
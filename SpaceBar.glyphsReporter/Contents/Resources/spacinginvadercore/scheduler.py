@@ -0,0 +1,115 @@
+# encoding: utf-8
+"""\
+Scheduler
+
+Coalesces recomputation while a glyph is being edited continuously, e.g.
+while dragging nodes or a sidebearing: every redraw moves the glyph's
+lastChange, but a slot (a side's panels, the kerning) is computed again at
+most rate times per second. In between, its last result stays on screen. Once
+the edit settles, the deferred slots are computed again exactly.
+"""
+from __future__ import division, print_function, unicode_literals
+
+import time
+
+from spacinginvadercore.constants import COMPUTERATE
+
+
+class ComputeScheduler(object):
+	"""\
+	Results per slot, with the identity of what they show (the glyph,
+	layer and settings, but not the glyph's version) and when they were computed.
+	rate: computations per second and slot, 0 doesn't limit them.
+	"""
+	def __init__(self, rate = COMPUTERATE, clock = time.time):
+		self.clock = clock
+		self.setRate(rate)
+		# {slot: (identity, result, time)}
+		self.results = {}
+		self.pending = set()
+		self.computed = 0
+		self.deferred = 0
+
+	def __repr__(self):
+		return '<ComputeScheduler %s/s, %s computed, %s deferred, %s pending>' % (self.rate, self.computed, self.deferred, len(self.pending))
+
+	def setRate(self, rate):
+		self.rate = rate
+		self.interval = 1.0 / rate if rate else 0
+
+	def due(self, slot, identity):
+		"""\
+		True if slot may be computed for identity now: it shows something else
+		or was computed at least 1/rate seconds ago. Otherwise the slot is
+		marked pending and False returned.
+		"""
+		last = self.results.get(slot)
+		if last is not None and self.interval:
+			lastIdentity, lastResult, lastTime = last
+			if lastIdentity == identity and lastTime is not None and self.clock() - lastTime < self.interval:
+				self.pending.add(slot)
+				self.deferred += 1
+				return False
+		return True
+
+	def run(self, slot, identity, compute):
+		"""\
+		Result of compute(), or the slot's last result if it shows the same
+		identity and was computed less than 1/rate seconds ago.
+		"""
+		if not self.due(slot, identity):
+			return self.results[slot][1]
+		now = self.clock()
+		result = compute()
+		self.results[slot] = (identity, result, now)
+		self.pending.discard(slot)
+		self.computed += 1
+		return result
+
+	def started(self, slot, identity):
+		"""\
+		Record that slot's computation for identity was started elsewhere (e.g. in
+		the background), its result arrives later. The last result stays.
+		"""
+		last = self.results.get(slot)
+		result = None
+		if last is not None and last[0] == identity:
+			result = last[1]
+		self.results[slot] = (identity, result, self.clock())
+		self.pending.discard(slot)
+		self.computed += 1
+
+	def last(self, slot, identity):
+		"""\
+		Last result of slot if it shows identity, otherwise None
+		"""
+		last = self.results.get(slot)
+		if last is not None and last[0] == identity:
+			return last[1]
+
+	def remember(self, slot, identity, result):
+		"""\
+		Record a result that was available without computation (a cache hit)
+		"""
+		last = self.results.get(slot)
+		lastTime = None
+		if last is not None and last[0] == identity:
+			lastTime = last[2]
+		self.results[slot] = (identity, result, lastTime)
+		self.pending.discard(slot)
+
+	def settle(self):
+		"""\
+		Let the deferred slots compute on their next run. True if there were any.
+		"""
+		if not self.pending:
+			return False
+		for slot in self.pending:
+			identity, result, lastTime = self.results[slot]
+			self.results[slot] = (identity, result, None)
+		self.pending = set()
+		return True
+
+	def clear(self):
+		self.results = {}
+		self.pending = set()
@@ -0,0 +1,86 @@
+# encoding: utf-8
+"""\
+Layer snapshots
+
+Reads everything the glyph panels need from a layer in one go. With GSLayers
+every attribute access crosses the PyObjC bridge, so each interpolated layer
+is read exactly once and all panels are built from the resulting records.
+"""
+from __future__ import division, print_function, unicode_literals
+
+METRICS = ('LSB', 'RSB', 'width', 'bboxw', 'bboxh', 'bboxt', 'bboxb')
+
+
+def isEmptyLayer(layer):
+	try:
+		# GLYPHS 3
+		return not layer.shapes
+	except:
+		# GLYPHS 2
+		return not layer.paths and not layer.components
+
+
+class LayerMetrics(object):
+	"""\
+	The seven panel metrics of a layer plus an emptiness flag
+	"""
+	__slots__ = METRICS + ('isEmpty', 'layerId')
+
+	def __init__(self, LSB, RSB, width, bboxw, bboxh, bboxt, bboxb, isEmpty = False, layerId = None):
+		self.LSB = LSB
+		self.RSB = RSB
+		self.width = width
+		self.bboxw = bboxw
+		self.bboxh = bboxh
+		self.bboxt = bboxt
+		self.bboxb = bboxb
+		self.isEmpty = isEmpty
+		self.layerId = layerId
+
+	def __repr__(self):
+		return '<LayerMetrics %s>' % ', '.join(['%s=%s' % (key, getattr(self, key)) for key in METRICS])
+
+	def __eq__(self, other):
+		return isinstance(other, LayerMetrics) and all([getattr(self, key) == getattr(other, key) for key in self.__slots__])
+
+	def __ne__(self, other):
+		return not self == other
+
+	def value(self, action, sideOfGlyph = None):
+		"""\
+		Value shown in the panel of action, None for empty layers
+		"""
+		value = None
+		if action == 'sidebearings':
+			if sideOfGlyph == 'left':
+				value = self.LSB
+			elif sideOfGlyph == 'right':
+				value = self.RSB
+		else:
+			value = getattr(self, action)
+
+		# Empty layer
+		if value == 0 and self.isEmpty:
+			return None
+		return value
+
+
+def snapshotLayer(layer):
+	bounds = layer.bounds
+	y = bounds.origin.y
+	w, h = bounds.size.width, bounds.size.height
+	# Only layers without extent can be empty
+	isEmpty = False
+	if w == 0 or h == 0:
+		isEmpty = isEmptyLayer(layer)
+	return LayerMetrics(layer.LSB, layer.RSB, layer.width, w, h, y + h, y, isEmpty, layer.layerId)
+
+def snapshotLayers(layers):
+	return [snapshotLayer(layer) for layer in layers]
+
+def layerFingerprint(layer):
+	"""\
+	Cheap stand-in for a layer's content: id, bounds and width
+	"""
+	bounds = layer.bounds
+	return (layer.layerId, bounds.origin.x, bounds.origin.y, bounds.size.width, bounds.size.height, layer.width)
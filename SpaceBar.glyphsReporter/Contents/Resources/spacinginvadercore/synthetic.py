@@ -0,0 +1,150 @@
+# encoding: utf-8
+"""\
+Synthetic fonts
+
+Generates stand-in fonts (spacinginvadercore.model) of any size for
+benchmarks and experiments without Glyphs.app: masters and instances on
+one or more axes, brace and bracket layers, class and exception kerning.
+Metrics are pseudo-random but deterministic for a given seed.
+"""
+from __future__ import division, print_function, unicode_literals
+
+import random
+
+from spacinginvadercore.model import Axis, Master, Instance, Layer, Glyph, Font, Rect
+from spacinginvadercore.variations import VariationPlan
+
+AXES = (
+	('Weight', 'wght', 100, 900),
+	('Width', 'wdth', 75, 125),
+	('Optical Size', 'opsz', 8, 72),
+	('Slant', 'slnt', -12, 0),
+)
+
+GLYPHNAMES = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+
+def glyphNames(count):
+	names = list(GLYPHNAMES[:count])
+	for i in range(len(names), count):
+		names.append('glyph%04d' % i)
+	return names
+
+def masterLocations(axes, count, rng):
+	"""\
+	Origin at the axes' minimum, then the maximum of each axis, then random points
+	"""
+	ranges = [(minimum, maximum) for name, tag, minimum, maximum in AXES[:axes]]
+	# A single axis gets its masters evenly spaced
+	if axes == 1:
+		minimum, maximum = ranges[0]
+		return [(minimum + (maximum - minimum) * i / float(max(1, count - 1)),) for i in range(count)]
+	locations = [tuple([minimum for minimum, maximum in ranges])]
+	for axis in range(axes):
+		location = list(locations[0])
+		location[axis] = ranges[axis][1]
+		locations.append(tuple(location))
+	while len(locations) < count:
+		location = tuple([rng.randint(minimum, maximum) for minimum, maximum in ranges])
+		if location not in locations:
+			locations.append(location)
+	return locations[:count]
+
+def instanceLocations(axes, count, rng):
+	"""\
+	Evenly spaced on the weight axis, random on the others
+	"""
+	ranges = [(minimum, maximum) for name, tag, minimum, maximum in AXES[:axes]]
+	minimum, maximum = ranges[0]
+	locations = []
+	for i in range(count):
+		location = [minimum + (maximum - minimum) * i / float(max(1, count - 1))]
+		location += [rng.randint(low, high) for low, high in ranges[1:]]
+		locations.append(tuple(location))
+	return locations
+
+def layerAt(layerId, masterId, name, location, rng, base):
+	"""\
+	A layer whose metrics grow with the first coordinates of location, plus noise
+	"""
+	weight = (location[0] - AXES[0][2]) / float(AXES[0][3] - AXES[0][2])
+	width = base['width'] + 200 * weight + rng.randint(-10, 10)
+	if len(location) > 1:
+		width *= location[1] / 100.0
+	LSB = base['LSB'] + 20 * weight + rng.randint(-3, 3)
+	RSB = base['RSB'] + 15 * weight + rng.randint(-3, 3)
+	bottom = base['bottom'] - 5 * weight
+	height = base['height'] + 10 * weight
+	bounds = Rect(LSB, bottom, max(0, width - LSB - RSB), height)
+	return Layer(layerId, masterId, name, int(round(width)), bounds, shapes = ['path'])
+
+def syntheticFont(masters = 2, instances = 5, axes = 1, glyphs = 26, braceLayers = 0, bracketLayers = 0, kerningPairs = 100, groups = 8, seed = 0):
+	"""\
+	A Font with masters and instances on axes (1-4), glyphs glyphs, and per
+	glyph braceLayers intermediate and bracketLayers alternate layers.
+	kerningPairs: kerning entries per master, a quarter of them exceptions.
+	groups: number of kerning groups per side, 0 for none.
+	"""
+	rng = random.Random(seed)
+	axes = max(1, min(axes, len(AXES)))
+	font = Font(axes = [Axis(name, tag) for name, tag, minimum, maximum in AXES[:axes]])
+
+	locations = masterLocations(axes, masters, rng)
+	for i, location in enumerate(locations):
+		font.addMaster(Master('m%02d' % i, 'Master %s' % i, list(location)))
+
+	# Instance interpolation factors as Glyphs would compute them
+	locationsOfInstances = instanceLocations(axes, instances, rng)
+	plan = VariationPlan(locations, locationsOfInstances, locations[0])
+	for i, location in enumerate(locationsOfInstances):
+		interpolations = dict([(font.masters[column].id, weight) for column, weight in plan.rows[i] if abs(weight) > 1e-9])
+		font.addInstance(Instance('Instance %s' % i, list(location), interpolations))
+
+	names = glyphNames(glyphs)
+	for g, name in enumerate(names):
+		leftGroup = rightGroup = None
+		if groups:
+			leftGroup = 'left%s' % (g % groups)
+			rightGroup = 'right%s' % (g % groups)
+		glyph = Glyph(name, leftKerningGroup = leftGroup, rightKerningGroup = rightGroup)
+		base = {
+			'width': rng.randint(300, 700),
+			'LSB': rng.randint(20, 80),
+			'RSB': rng.randint(20, 80),
+			'bottom': rng.choice((0, 0, 0, -200)),
+			'height': rng.randint(450, 750),
+		}
+		for master in font.masters:
+			glyph.addLayer(layerAt(master.id, master.id, master.name, master.axes, rng, base))
+		for b in range(braceLayers):
+			location = [minimum + (maximum - minimum) * (b + 1) / float(braceLayers + 1) for name, tag, minimum, maximum in AXES[:axes]]
+			location = [int(round(value)) for value in location]
+			braceName = '{%s}' % ', '.join([str(value) for value in location])
+			glyph.addLayer(layerAt('%s-brace%s' % (name, b), font.masters[0].id, braceName, location, rng, base))
+		for b in range(bracketLayers):
+			master = font.masters[b % len(font.masters)]
+			glyph.addLayer(layerAt('%s-bracket%s' % (name, b), master.id, '%s [%s]' % (master.name, 300 + 100 * b), master.axes, rng, base))
+		font.addGlyph(glyph)
+
+	# Kerning: class pairs first, then exceptions
+	for master in font.masters:
+		pairs = {}
+		for k in range(kerningPairs):
+			left = rng.choice(names)
+			right = rng.choice(names)
+			leftKey = font.glyphs[left].rightKerningKey
+			rightKey = font.glyphs[right].leftKerningKey
+			if k % 4 == 3:
+				leftKey, rightKey = left, right
+			pairs.setdefault(leftKey, {})[rightKey] = rng.randint(-120, 40)
+		font.kerning[master.id] = pairs
+
+	return font
+
+def syntheticText(font, length, seed = 0):
+	"""\
+	Glyph names of a tab text of length glyphs
+	"""
+	rng = random.Random(seed)
+	names = sorted(font.glyphs.keys())
+	return [rng.choice(names) for i in range(length)]
@@ -0,0 +1,69 @@
+# encoding: utf-8
+"""\
+Tab layers
+
+Access to the layers of an edit tab by position. The layout manager's layers
+are only fetched when a position is first looked up in a frame (or by the
+prefetcher between frames), not on every redraw. The glyph of a position is
+read from the layer itself, so the two always match, whatever the text
+edits, ligatures or layer choices did in between.
+"""
+from __future__ import division, print_function, unicode_literals
+
+
+def layerGlyph(layer):
+	return layer.parent
+
+
+class TabLayers(object):
+	"""\
+	(glyph, layer) by position of a tab. update() gives the frame's fetch(),
+	which returns the tab's layers.
+	resolve(layer): the layer's glyph, None for line breaks and other non-glyphs
+	"""
+	def __init__(self, resolve = layerGlyph):
+		self.resolve = resolve
+		self.fetch = None
+		self.source = None
+		self.fetches = 0
+		self.lookups = 0
+
+	def __repr__(self):
+		return '<TabLayers %s fetches, %s lookups>' % (self.fetches, self.lookups)
+
+	def __len__(self):
+		layers = self.layers()
+		if layers is None:
+			return 0
+		return len(layers)
+
+	def update(self, fetch):
+		"""\
+		Start a frame. The layers are fetched again when next used.
+		"""
+		self.fetch = fetch
+		self.source = None
+
+	def layers(self):
+		if self.source is None and self.fetch is not None:
+			self.fetches += 1
+			self.source = self.fetch()
+		return self.source
+
+	def get(self, index, default = None):
+		"""\
+		(glyph, layer) at index, default for positions without a glyph
+		"""
+		layers = self.layers()
+		if layers is None or not 0 <= index < len(layers):
+			return default
+		self.lookups += 1
+		layer = layers[index]
+		glyph = self.resolve(layer)
+		if glyph is None:
+			return default
+		return (glyph, layer)
+
+	def clear(self):
+		self.fetch = None
+		self.source = None
@@ -0,0 +1,93 @@
+# encoding: utf-8
+"""\
+Tab text changes
+
+Tells which range of a tab's text was edited, for the text edits in traces
+(see spacinginvadercore.trace).
+Edits are found by comparing the whole text with the previous one, so this
+is only done while a trace is recorded.
+"""
+from __future__ import division, print_function, unicode_literals
+
+
+def textEdit(old, new):
+	"""\
+	(start, oldEnd, newEnd): old[start:oldEnd] was replaced by new[start:newEnd]. None if the texts are equal.
+	Prefix and suffix are found by bisection on slice comparisons.
+	"""
+	if old == new:
+		return None
+	shortest = min(len(old), len(new))
+
+	low, high = 0, shortest
+	while low < high:
+		middle = (low + high + 1) // 2
+		if old[:middle] == new[:middle]:
+			low = middle
+		else:
+			high = middle - 1
+	start = low
+
+	low, high = 0, shortest - start
+	while low < high:
+		middle = (low + high + 1) // 2
+		if old[len(old) - middle:] == new[len(new) - middle:]:
+			low = middle
+		else:
+			high = middle - 1
+	return (start, len(old) - low, len(new) - low)
+
+
+class TextChanges(object):
+	"""\
+	Edits of the text of the tab identified by key.
+	listeners: callables listener(start, oldEnd, newEnd), called by flush() for each edit
+	"""
+	def __init__(self):
+		self.key = None
+		# Text last seen by compare()
+		self.text = None
+		self.pending = []
+		self.listeners = []
+		self.edits = 0
+		self.comparisons = 0
+		self.resets = 0
+
+	def __repr__(self):
+		return '<TextChanges %s edits, %s comparisons, %s resets>' % (self.edits, self.comparisons, self.resets)
+
+	def addListener(self, listener):
+		if listener not in self.listeners:
+			self.listeners.append(listener)
+
+	def reset(self, key, text = None):
+		"""\
+		Start over with another tab (or master, or features), whose text is what
+		the next compare() is compared with
+		"""
+		self.key = key
+		self.text = text
+		self.pending = []
+		self.resets += 1
+
+	def compare(self, text):
+		"""\
+		Find the edit by comparing text with the text of the last call
+		"""
+		self.comparisons += 1
+		if self.text is not None:
+			edit = textEdit(self.text, text)
+			if edit is not None:
+				self.pending.append(edit)
+		self.text = text
+
+	def flush(self):
+		"""\
+		Hand the pending edits to the listeners, in order. Returns them.
+		"""
+		edits, self.pending = self.pending, []
+		for edit in edits:
+			self.edits += 1
+			for listener in self.listeners:
+				listener(*edit)
+		return edits
@@ -0,0 +1,249 @@
+# encoding: utf-8
+"""\
+Session traces
+
+Records what each redraw of the bar saw, so that an editing session can be
+replayed and timed without Glyphs.app (see spacinginvadercore.replay).
+
+A trace is a JSON Lines file of records, each with a 'type':
+
+	header   format and plugin version
+	font     axes, masters and instances, whenever the font setup changed
+	glyph    metrics of all layers of a glyph, whenever it was edited
+	kerning  the kerning entries of a pair in one master, whenever they changed
+	frame    one redraw: digest of the font state, cursor, glyphs on display,
+	         viewport, scale, selected master, preferences (only when they
+	         changed), the edits since the last frame and the redraw's duration
+
+Only what was on display is recorded, so a trace holds exactly the font
+state the recorded frames were computed from.
+"""
+from __future__ import division, print_function, unicode_literals
+
+import io, time, json, hashlib
+
+from spacinginvadercore.model import Axis, Master, Instance, Layer, Glyph, Font, Rect
+
+TRACEFORMAT = 1
+
+
+def jsonValue(value):
+	"""\
+	JSON-compatible stand-in for values json doesn't know, e.g. NSArrays in the preferences
+	"""
+	try:
+		return list(value)
+	except TypeError:
+		return '%s' % value
+
+def dumps(record):
+	return json.dumps(record, sort_keys = True, default = jsonValue)
+
+def digest(record):
+	return hashlib.sha1(dumps(record).encode('utf-8')).hexdigest()[:16]
+
+def stateDigest(*digests):
+	"""\
+	Digest of the font state on display, from the digests of its records
+	"""
+	return hashlib.sha1('|'.join([value or '' for value in digests]).encode('utf-8')).hexdigest()[:16]
+
+
+# Records from font models
+
+def fontRecord(font, visibleInstances):
+	return {
+		'type': 'font',
+		'axes': [[axis.name, axis.axisTag] for axis in font.axes],
+		'masters': [[master.id, master.name, list(master.axes)] for master in font.masters],
+		'instances': [[instance.name, list(instance.axes), instance.instanceInterpolations, instance.active] for instance in font.instances],
+		'visible': [font.instances.index(instance) for instance in visibleInstances],
+	}
+
+def glyphRecord(glyph):
+	layers = []
+	for layer in glyph.layers:
+		bounds = layer.bounds
+		layers.append([layer.layerId, layer.associatedMasterId, layer.name, layer.width, [bounds.origin.x, bounds.origin.y, bounds.size.width, bounds.size.height], layer.LSB, layer.RSB, len(layer.shapes)])
+	return {
+		'type': 'glyph',
+		'name': glyph.name,
+		'leftKerningGroup': glyph.leftKerningGroup,
+		'rightKerningGroup': glyph.rightKerningGroup,
+		'layers': layers,
+	}
+
+def kerningRecord(font, masterId, leftGlyph, rightGlyph):
+	"""\
+	The kerning entries (glyph and class keys) that decide the pair's kerning in a master
+	"""
+	index = font.kerningIndex
+	entries = []
+	for leftKey in sorted(set([leftGlyph.name, leftGlyph.rightKerningKey])):
+		for rightKey in sorted(set([rightGlyph.name, rightGlyph.leftKerningKey])):
+			if index is not None:
+				value = index.rawKerning(masterId, leftKey, rightKey)
+			else:
+				value = font.kerningForPair(masterId, leftKey, rightKey)
+			entries.append([leftKey, rightKey, value])
+	return {
+		'type': 'kerning',
+		'masterId': masterId,
+		'pair': [leftGlyph.name, rightGlyph.name],
+		'entries': entries,
+	}
+
+
+# Font models from records
+
+def fontFromRecord(record):
+	"""\
+	(font, visible instances) of a font record
+	"""
+	font = Font(axes = [Axis(name, tag) for name, tag in record['axes']])
+	for id, name, axes in record['masters']:
+		font.addMaster(Master(id, name, axes))
+	for name, axes, interpolations, active in record['instances']:
+		font.addInstance(Instance(name, axes, interpolations, active))
+	return font, [font.instances[i] for i in record['visible']]
+
+def glyphFromRecord(record):
+	glyph = Glyph(record['name'], leftKerningGroup = record['leftKerningGroup'], rightKerningGroup = record['rightKerningGroup'])
+	for layerId, associatedMasterId, name, width, bounds, LSB, RSB, shapes in record['layers']:
+		glyph.addLayer(Layer(layerId, associatedMasterId, name, width, Rect(*bounds), LSB = LSB, RSB = RSB, shapes = ['shape'] * shapes))
+	return glyph
+
+def applyKerningRecord(font, record):
+	for leftKey, rightKey, value in record['entries']:
+		if value is None:
+			entries = font.kerning.get(record['masterId'], {}).get(leftKey, {})
+			if rightKey in entries:
+				del entries[rightKey]
+				if font.kerningIndex is not None:
+					font.kerningIndex.setPair(record['masterId'], leftKey, rightKey, None)
+		else:
+			font.setKerningForPair(record['masterId'], leftKey, rightKey, value)
+
+
+class TraceRecorder(object):
+	"""\
+	Writes the records of a session to stream (a file object opened for text)
+	or, given a path, to that file, line by line. Font, glyph and kerning
+	records are only written when they differ from the last ones written.
+	"""
+	def __init__(self, path = None, stream = None, version = None, clock = time.time):
+		self.path = path
+		self.stream = stream if stream is not None else io.open(path, 'w', buffering = 1, encoding = 'utf-8')
+		self.clock = clock
+		self.frames = 0
+		self.records = 0
+		self.start = None
+		# Digests of the records last written: {'font': digest, ('glyph', name): digest, ('kerning', masterId, left, right): digest}
+		self.digests = {}
+		self.preferencesVersion = None
+		# Keys of the records that changed since the last frame, and edits of the tab text
+		self.edits = []
+		self.write({'type': 'header', 'format': TRACEFORMAT, 'version': version, 'time': self.clock()})
+
+	def __repr__(self):
+		return '<TraceRecorder %s frames, %s records>' % (self.frames, self.records)
+
+	def write(self, record):
+		line = dumps(record)
+		if not isinstance(line, type('')):
+			# Python 2
+			line = line.decode('utf-8')
+		self.stream.write(line + '\n')
+		self.records += 1
+
+	def update(self, key, record):
+		"""\
+		Write record unless it equals the last one written under key. Returns its digest.
+		"""
+		value = digest(record)
+		if self.digests.get(key) != value:
+			if key in self.digests:
+				self.edits.append(key)
+			self.digests[key] = value
+			self.write(record)
+		return value
+
+	def beginFrame(self):
+		self.start = self.clock()
+
+	def font(self, font, visibleInstances):
+		return self.update('font', fontRecord(font, visibleInstances))
+
+	def glyph(self, glyph):
+		return self.update(('glyph', glyph.name), glyphRecord(glyph))
+
+	def textEdit(self, start, oldEnd, newEnd):
+		"""\
+		Note an edit of the tab text, listed with the next frame's edits
+		"""
+		self.edits.append(('text', start, oldEnd, newEnd))
+
+	def kerning(self, font, leftGlyph, rightGlyph):
+		digests = [self.update(('kerning', master.id, leftGlyph.name, rightGlyph.name), kerningRecord(font, master.id, leftGlyph, rightGlyph)) for master in font.masters]
+		return stateDigest(*digests)
+
+	def frame(self, font, visibleInstances, leftGlyph, rightGlyph, preferences, cursor = None, layers = None, selectedLayer = None, viewport = None, scale = 1.0, direction = None, masterId = None):
+		"""\
+		Record one redraw. font, leftGlyph and rightGlyph are models, preferences
+		a PreferenceStore. layers: layerIds of the left and right glyph's layers
+		in the tab, selectedLayer: (glyph name, layerId) of the selected layer.
+		viewport: (x, y, width, height). Records that changed since they were
+		last written are listed as the frame's edits.
+		"""
+		digests = [self.font(font, visibleInstances)]
+		for glyph in (leftGlyph, rightGlyph):
+			digests.append(self.glyph(glyph) if glyph is not None else None)
+		if leftGlyph is not None and rightGlyph is not None and preferences.get('kerning'):
+			digests.append(self.kerning(font, leftGlyph, rightGlyph))
+
+		record = {
+			'type': 'frame',
+			'index': self.frames,
+			'time': self.clock(),
+			'digest': stateDigest(*digests),
+			'cursor': cursor,
+			'left': leftGlyph.name if leftGlyph is not None else None,
+			'right': rightGlyph.name if rightGlyph is not None else None,
+			'layers': list(layers) if layers else None,
+			'selectedLayer': list(selectedLayer) if selectedLayer else None,
+			'viewport': list(viewport) if viewport else None,
+			'scale': scale,
+			'direction': direction,
+			'masterId': masterId,
+		}
+		if self.start is not None:
+			record['duration'] = record['time'] - self.start
+			self.start = None
+		if preferences.version != self.preferencesVersion:
+			if self.preferencesVersion is not None:
+				self.edits.append('preferences')
+			self.preferencesVersion = preferences.version
+			record['preferences'] = dict(preferences.values)
+		if self.edits:
+			record['edits'] = [key if isinstance(key, type('')) else list(key) for key in self.edits]
+			self.edits = []
+		self.write(record)
+		self.frames += 1
+		return record
+
+	def flush(self):
+		self.stream.flush()
+
+	def close(self):
+		self.stream.close()
+
+
+def readTrace(path):
+	"""\
+	The records of a trace file, in order
+	"""
+	with io.open(path, encoding = 'utf-8') as f:
+		for line in f:
+			line = line.strip()
+			if line:
+				yield json.loads(line)
@@ -0,0 +1,293 @@
+# encoding: utf-8
+"""\
+Variation model
+
+Interpolation in a designspace of any number of axes, following the model
+of OpenType font variations (and fontTools.varLib.models): every master gets
+a region of influence ("support") around its location, and a value at any
+location is the default master's value plus the deltas of the masters whose
+supports cover it. Masters don't need to sit on a grid, so intermediate
+(brace) layers are simply additional masters. Locations outside the masters
+are extrapolated.
+"""
+from __future__ import division, print_function, unicode_literals
+
+from spacinginvadercore.interpolation import InterpolationPlan
+
+
+def normalizeValue(value, lower, default, upper):
+	"""\
+	value on an axis mapped to -1 (lower), 0 (default), 1 (upper), and beyond
+	"""
+	# Beyond an axis end at the default, the other side's scale is used
+	if value < default:
+		scale = (default - lower) or (upper - default)
+	else:
+		scale = (upper - default) or (default - lower)
+	if not scale:
+		return 0.0
+	return (value - default) / scale
+
+def normalizeLocation(location, axisRanges):
+	"""\
+	location: coordinates tuple
+	axisRanges: [(lower, default, upper), ...] per axis
+	Returns {axisIndex: normalized value} without the axes at their default.
+	"""
+	normalized = {}
+	for axis, (value, (lower, default, upper)) in enumerate(zip(location, axisRanges)):
+		value = normalizeValue(value, lower, default, upper)
+		if value != 0:
+			normalized[axis] = value
+	return normalized
+
+def supportScalar(location, support, axisRanges = None):
+	"""\
+	Influence (0-1, more when extrapolating) of a master with support
+	{axis: (lower, peak, upper)} at normalized location. With axisRanges
+	{axis: (min, max)} locations outside of the masters are extrapolated.
+	"""
+	scalar = 1.0
+	for axis, (lower, peak, upper) in support.items():
+		if peak == 0.0:
+			continue
+		if lower > peak or peak > upper:
+			continue
+		if lower < 0.0 and upper > 0.0:
+			continue
+		v = location.get(axis, 0.0)
+		if v == peak:
+			continue
+
+		if axisRanges is not None:
+			axisMin, axisMax = axisRanges.get(axis, (-1.0, 1.0))
+			if v < axisMin and lower <= axisMin:
+				if peak <= axisMin and peak < upper:
+					scalar *= (v - upper) / (peak - upper)
+					continue
+				elif axisMin < peak:
+					scalar *= (v - lower) / (peak - lower)
+					continue
+			elif axisMax < v and axisMax <= upper:
+				if axisMax <= peak and lower < peak:
+					scalar *= (v - lower) / (peak - lower)
+					continue
+				elif peak < axisMax:
+					scalar *= (v - upper) / (peak - upper)
+					continue
+
+		if v <= lower or upper <= v:
+			return 0.0
+		if v < peak:
+			scalar *= (v - lower) / (peak - lower)
+		else:
+			scalar *= (v - upper) / (peak - upper)
+	return scalar
+
+
+def segmentPosition(start, end, location):
+	"""\
+	t of location = start + t * (end - start), None if location isn't on that line
+	"""
+	t = None
+	for a, b, value in zip(start, end, location):
+		if a != b:
+			t = (value - a) / float(b - a)
+			break
+	if t is None:
+		return None
+	for a, b, value in zip(start, end, location):
+		if abs(a + t * (b - a) - value) > 1e-9:
+			return None
+	return t
+
+
+class VariationModel(object):
+	"""\
+	Supports and delta weights of masters at normalized locations
+	[{axis: value}, ...]. One of them must be the default location {}.
+	"""
+	def __init__(self, locations):
+		self.originalLocations = [dict(location) for location in locations]
+		if {} not in self.originalLocations:
+			raise ValueError('Variation model needs a master at the default location')
+		key = self._sortKey(self.originalLocations)
+		self.locations = sorted(self.originalLocations, key = key)
+		# Position in the original order of each sorted location
+		self.mapping = [self.originalLocations.index(location) for location in self.locations]
+
+		self.axisRanges = {}
+		for location in self.locations:
+			for axis, value in location.items():
+				axisMin, axisMax = self.axisRanges.get(axis, (0.0, 0.0))
+				self.axisRanges[axis] = (min(axisMin, value), max(axisMax, value))
+
+		self.supports = self._supports()
+		self.deltaWeights = [dict([(j, scalar) for j, scalar in [(j, supportScalar(location, support)) for j, support in enumerate(self.supports[:i])] if scalar]) for i, location in enumerate(self.locations)]
+
+		# Deltas are linear in the master values: delta[i] = sum(deltaMatrix[i][k] * masterValue[k])
+		count = len(self.locations)
+		self.deltaMatrix = []
+		for i in range(count):
+			row = [0.0] * count
+			row[self.mapping[i]] = 1.0
+			for j, weight in self.deltaWeights[i].items():
+				for k in range(count):
+					row[k] -= weight * self.deltaMatrix[j][k]
+			self.deltaMatrix.append(row)
+
+	def __repr__(self):
+		return '<VariationModel %s masters>' % len(self.locations)
+
+	@staticmethod
+	def _sortKey(locations):
+		# Locations on a single axis, per axis
+		axisPoints = {}
+		for location in locations:
+			if len(location) == 1:
+				axis = list(location.keys())[0]
+				axisPoints.setdefault(axis, set([0.0])).add(location[axis])
+
+		def key(location):
+			axes = sorted(location.keys())
+			onPointAxes = [axis for axis in axes if axis in axisPoints and location[axis] in axisPoints[axis]]
+			return (
+				len(location),
+				-len(onPointAxes),
+				tuple(axes),
+				tuple([(location[axis] > 0) - (location[axis] < 0) for axis in axes]),
+				tuple([abs(location[axis]) for axis in axes]),
+			)
+		return key
+
+	def _supports(self):
+		minimum = {}
+		maximum = {}
+		for location in self.locations:
+			for axis, value in location.items():
+				minimum[axis] = min(value, minimum.get(axis, value))
+				maximum[axis] = max(value, maximum.get(axis, value))
+
+		regions = []
+		for location in self.locations:
+			region = {}
+			for axis, value in location.items():
+				if value > 0:
+					region[axis] = (0.0, value, maximum[axis])
+				else:
+					region[axis] = (minimum[axis], value, 0.0)
+			regions.append(region)
+
+		# Shrink each region so that it doesn't reach past earlier masters
+		for i, region in enumerate(regions):
+			axes = set(region.keys())
+			for j in range(i):
+				previous = regions[j]
+				if set(previous.keys()) != axes:
+					continue
+				relevant = True
+				for axis, (lower, peak, upper) in region.items():
+					if not (previous[axis][1] == peak or lower < previous[axis][1] < upper):
+						relevant = False
+						break
+				if not relevant:
+					continue
+
+				bestAxes = {}
+				bestRatio = -1
+				for axis in previous.keys():
+					value = previous[axis][1]
+					lower, peak, upper = region[axis]
+					newLower, newUpper = lower, upper
+					if value < peak:
+						newLower = value
+						ratio = (value - peak) / (lower - peak)
+					elif peak < value:
+						newUpper = value
+						ratio = (value - peak) / (upper - peak)
+					else:
+						continue
+					if ratio > bestRatio:
+						bestAxes = {}
+						bestRatio = ratio
+					if ratio == bestRatio:
+						bestAxes[axis] = (newLower, peak, newUpper)
+				for axis, triple in bestAxes.items():
+					region[axis] = triple
+		return regions
+
+	def masterWeights(self, location):
+		"""\
+		Weight of each master (original order) in the value at normalized location,
+		so that value = sum(weight * masterValue)
+		"""
+		count = len(self.locations)
+		weights = [0.0] * count
+		for i, support in enumerate(self.supports):
+			scalar = supportScalar(location, support, self.axisRanges)
+			if scalar:
+				for k in range(count):
+					weights[k] += scalar * self.deltaMatrix[i][k]
+		return weights
+
+
+class VariationPlan(InterpolationPlan):
+	"""\
+	Instance×point weight matrix like InterpolationPlan, for points and
+	instances at designspace locations of any number of axes.
+	defaultLocation is the location of the font's origin master.
+	"""
+	def __init__(self, pointLocations, instanceLocations, defaultLocation):
+		self.pointLocations = [tuple(location) for location in pointLocations]
+		self.instanceLocations = [tuple(location) for location in instanceLocations]
+		self.defaultLocation = tuple(defaultLocation)
+
+		axisRanges = []
+		for axis, default in enumerate(self.defaultLocation):
+			values = [location[axis] for location in self.pointLocations] + [default]
+			axisRanges.append((min(values), default, max(values)))
+		self.axisRanges = axisRanges
+
+		normalized = [normalizeLocation(location, axisRanges) for location in self.pointLocations]
+		# The origin master may be missing from a glyph (sparse masters),
+		# then the nearest point stands in for it
+		if {} not in normalized:
+			nearest = min(range(len(normalized)), key = lambda i: sum([abs(value) for value in normalized[i].values()]))
+			for axis in list(normalized[nearest].keys()):
+				lower, default, upper = axisRanges[axis]
+				axisRanges[axis] = (lower, self.pointLocations[nearest][axis], upper)
+			normalized = [normalizeLocation(location, axisRanges) for location in self.pointLocations]
+
+		# Points at the same location (e.g. a brace layer on top of a master):
+		# the first one counts
+		unique = []
+		for location in normalized:
+			if location not in unique:
+				unique.append(location)
+		columns = [normalized.index(location) for location in unique]
+
+		self.model = VariationModel(unique)
+		self.rows = []
+		for location in self.instanceLocations:
+			weights = self.model.masterWeights(normalizeLocation(location, axisRanges))
+			self.rows.append([(columns[i], weight) for i, weight in enumerate(weights) if weight])
+		self.matrix = self._matrix()
+		self.pointPositions = [self._pointPosition(location) for location in self.pointLocations]
+
+	def __repr__(self):
+		return '<VariationPlan %s instances × %s points, %s axes>' % (len(self.instanceLocations), len(self.pointLocations), len(self.defaultLocation))
+
+	def _pointPosition(self, location):
+		"""\
+		Positions of a point on the instance axis: index of an instance at the same location,
+		or fractional index on the straight line between two neighbouring instances
+		"""
+		positions = []
+		for x, instanceLocation in enumerate(self.instanceLocations):
+			if instanceLocation == location:
+				positions.append(x)
+		for i in range(len(self.instanceLocations) - 1):
+			t = segmentPosition(self.instanceLocations[i], self.instanceLocations[i + 1], location)
+			if t is not None and 0 < t < 1:
+				positions.append(i + t)
+		return positions
@@ -1,44 +1,17 @@
 # encoding: utf-8
 from __future__ import division, print_function, unicode_literals
 
-import copy, traceback, time, os, plistlib, objc
+import copy, traceback, time, os, plistlib, functools, objc
 import GlyphsApp.plugins
 from GlyphsApp import Glyphs, GSGlyph, GSFont, GSInstance, MOUSEMOVED, RTL, Message
-from AppKit import NSBezierPath, NSPoint, NSColor, NSRect, NSHomeDirectory, NSImage, NSSize, NSZeroRect, NSCompositeSourceOver, NSMenuItem, NSMenu, NSWorkspace, NSURL, NSBundle, NSOnState
+from AppKit import NSBezierPath, NSPoint, NSColor, NSRect, NSHomeDirectory, NSImage, NSSize, NSZeroRect, NSCompositeSourceOver, NSMenuItem, NSMenu, NSWorkspace, NSURL, NSBundle, NSOnState, NSObject, NSApplication
+
+from spacinginvadercore.constants import *
+from spacinginvadercore import Area, Backend, renderArea, BarLayout, Compositor, areaSignature, Axis, AxisTable, Master, Instance, Layer, Glyph, Font, Rect, isEmptyLayer, snapshotLayer, snapshotLayers, layerFingerprint, CacheKeys, GlyphVersions, LRUCache, Prefetcher, neighbourPositions, ComputeScheduler, BackgroundCompute, ThreadExecutor, PreferenceStore, Instrumentation, ProfileCapture, TraceRecorder, TabLayers, TextChanges, metrics
 
 plist = plistlib.readPlist(os.path.join(os.path.dirname(__file__), '..', '..', 'Info.plist'))
 VERSION = plist['CFBundleShortVersionString']
 
-PAGEMARGIN = 8
-AREACORNERRADIUS = 4
-AREAOUTERMARGIN = 1
-AREAINNERMARGIN = 6
-AREATITLEHEIGHT = 20
-AREAGRAYVALUE = .90
-AREATRANSPARENCY = 1.0
-INACTIVEMASTERCOLOR = {
-	'left': (57, 169, 220),
-	'right': (248, 179, 52),
-}
-ACTIVEMASTERCOLOR = {
-	'left': (11, 143, 181),
-	'right': (242, 148, 0),
-}
-AREASTANDARDWIDTH = 250
-AREASTANDARDHEIGHT = 80
-POINTSIZESMALL = 6
-POINTSIZELARGE = 15
-UNSELECTEDMASTERCOLOR = (200, 200, 200)
-UNSELECTEDMASTERSIZE = 14
-SELECTEDMASTERCOLOR = (160, 160, 160)
-SELECTEDMASTERSIZE = 20
-LINECOLOR = (100, 100, 100)
-ACTIVECOLOR = (0, 0, 0)
-INACTIVECOLOR = (140, 140, 140)
-DEVIATIONCOLOR = (233, 93, 15)
-DEVIATIONORIGINALCOLOR = (120, 120, 120)
-ORIGIN = 'top' # topright, topleft, top, left, right, bottomleft, bottomright, bottom
-
 alignment = {
 	'topleft': 6, 
 	'topcenter': 7, 
@@ -50,77 +23,9 @@ alignment = {
 	'bottomcenter': 1, 
 	'bottomright': 2
 	}
-areaCache = {}
-
-@objc.python_method
-def CleanFloat(number, locale = 'en'):
-	"""\
-	Return number without decimal points if .0, otherwise with .x)
-	"""
-	try:
-		if number % 1 == 0:
-			return str(int(number))
-		else:
-			return str(float(number))
-	except:
-		return number
-
-def NormalizeMinMax(source_floor, source_ceiling, target_floor, target_ceiling, value):
-	"""\
-	Normalize a value from source scale to target scale.
-	"""
-	source_floor, source_ceiling, target_floor, target_ceiling, value = map(float, (source_floor, source_ceiling, target_floor, target_ceiling, value))
-	if target_floor == 0:
-		return (value - source_floor)/(source_ceiling - source_floor) * target_ceiling
-	else:
-		return (value - source_floor)/(source_ceiling - source_floor) * (target_ceiling - target_floor) + target_floor
-
-
-def Interpolate(a, b, p, limit = False):
-	"""\
-	Interpolate between values a and b at float position p (0-1)
-	Limit: No extrapolation
-	"""
-	i = a + (b - a) * p
-	if limit and i < a:
-		return a
-	elif limit and i > b:
-		return b
-	else:
-		return i
 
 # GlyphsApp extentions
 
-def GSGlyph_MasterLayers(self):
-	layers = []
-	for layer in self.layers:
-		if layer.layerId == layer.associatedMasterId:
-			layers.append([weightValueForMaster(self.parent.masters[layer.layerId]), layer])
-		elif '{' in layer.name and '}' in layer.name:
-			weightValue = float(layer.name.split('{')[1].split('}')[0].split(',')[0].strip())
-			layers.append([weightValue, layer])
-	layers.sort(key=lambda x: x[0], reverse=False)
-	return layers
-
-GSGlyph.masterLayers = property(lambda self: GSGlyph_MasterLayers(self))
-
-def GSGlyph_ChangeString(self):
-	string = self.name
-	for layer in self.layers:
-		string += '%s-%s' % (str(layer.bounds), layer.width)
-	return string
-
-GSGlyph.changeString = property(lambda self: GSGlyph_ChangeString(self))
-
-def GSFont_MasterLayers(self):
-	layers = []
-	for master in self.masters:
-		layers.append([weightValueForMaster(master), master])
-	# layers.sort(key=lambda x: x[0], reverse=False)
-	return layers
-
-GSFont.masterLayers = property(lambda self: GSFont_MasterLayers(self))
-
 def GSFont_ActiveInstances(self):
 	instances = []
 	for instance in self.instances:
@@ -140,394 +45,358 @@ def GSFont_VisibleInstances(self, plugin):
 GSFont.visibleInstances = GSFont_VisibleInstances
 
 def GSInstance_ShowInPanel(self, plugin):
-	return plugin.getPreference('onlyActiveInstances') == False or plugin.getPreference('onlyActiveInstances') == True and self.active == True
+	onlyActiveInstances = plugin.getPreference('onlyActiveInstances')
+	return onlyActiveInstances == False or onlyActiveInstances == True and self.active == True
 
 GSInstance.showInPanel = GSInstance_ShowInPanel
 
-def GSInstance_SortedInterpolationValues(self):
-	if Glyphs.buildNumber >= 1141:
-		font = self.font
-	else:
-		font = self.font()
-	instanceMastersKeys = list(self.instanceInterpolations.keys())
-	instanceMastersKeys.sort(key=lambda x: font.masters.index(font.masters[x]))
-	return [[font.masters[x], self.instanceInterpolations[x]] for x in instanceMastersKeys]
-
-GSInstance.sortedInterpolationValues = property(lambda self: GSInstance_SortedInterpolationValues(self))
-
-class Line(object):
-	def __init__(self, x1, y1, x2, y2, color = LINECOLOR, strokeWidth = 1.0):
-		self.x1 = x1
-		self.y1 = y1
-		self.x2 = x2
-		self.y2 = y2
-		self.color = color
-		self.strokeWidth = strokeWidth
-		self.path = None
-
-	def draw(self):
-		# NSColor.colorWithDeviceRed_green_blue_alpha_(self.color[0] / 255.0, self.color[1] / 255.0, self.color[2] / 255.0, 1.0).set()
-		NSColor.textColor().set()
-		if not self.path:
-			self.path = NSBezierPath.alloc().init()
-			self.path.setLineWidth_(self.strokeWidth)
-			self.path.moveToPoint_(NSPoint(self.x1, self.y1))
-			self.path.lineToPoint_(NSPoint(self.x2, self.y2))
-			self.path.closePath()
-		self.path.stroke()
-
-class Dot(object):
-	def __init__(self, plugin, x, y, y2 = None, color = (0, 0, 0), size = POINTSIZESMALL, label = None, associatedValue = None):
-		self.plugin = plugin
-		self.x = x
-		self.y = y
-		self.y2 = y2
-		self.color = color
-		self.size = size
-		self.label = label
-		self.associatedValue = associatedValue
-		self.path = None
-		self.labelObject = None
-
-	def draw(self, tab):
-		hasValue = False
-		if self.associatedValue:
-			hasValue = True
-			if self.associatedValue.y == None:
-				hasValue = False
-
-		# Deviation dot
-		if self.y2:
-			blendColor = NSColor.colorWithDeviceRed_green_blue_alpha_(DEVIATIONCOLOR[0] / 255.0, DEVIATIONCOLOR[1] / 255.0, DEVIATIONCOLOR[2] / 255.0, 1.0)
-			NSColor.controlTextColor().blendedColorWithFraction_ofColor_(0.5, blendColor).set()
-			self.path = NSBezierPath.alloc().init()
-			self.path.appendBezierPathWithOvalInRect_(NSRect(NSPoint(self.x - (self.size * 1.5) / 2.0, self.y2 - (self.size * 1.5) / 2.0), NSPoint((self.size * 1.5), (self.size * 1.5))))
-			if hasValue:
-				self.path.fill()
-			else:
-				self.path.stroke()
+# Font model for the metrics core
 
-		# Black dot
-		# NSColor.colorWithDeviceRed_green_blue_alpha_(self.color[0] / 255.0, self.color[1] / 255.0, self.color[2] / 255.0, 1.0).set()
-		NSColor.controlTextColor().colorWithAlphaComponent_(0.3).set()
+class GlyphsFontModel(Font):
+	"""\
+	Font model of a GSFont. Kerning is looked up in the GSFont itself.
+	"""
+	def __init__(self, font):
+		Font.__init__(self)
+		self.gsFont = font
 
-		self.path = NSBezierPath.alloc().init()
-		self.path.appendBezierPathWithOvalInRect_(NSRect(NSPoint(self.x - self.size / 2.0, self.y - self.size / 2.0), NSPoint(self.size, self.size)))
+	def kerningForPair(self, masterId, leftKey, rightKey):
+		kerning = self.gsFont.kerningForPair(masterId, leftKey, rightKey)
+		if kerning == None:
+			return NOKERNING
+		return kerning
 
-		if hasValue:
-			self.path.fill()
-		else:
-			self.path.stroke()
-
-		if self.label != 0 and self.label != None and self.label != '':
-			self.plugin.drawTextAtPoint(CleanFloat(self.label), NSPoint(self.x, self.y - 20), fontSize = 10 * tab.scale, align = 'center', fontColor=NSColor.textColor())
-			# string = NSString.alloc().initWithString_(str(self.label))
-			# string = NSString.alloc().stringWithString_(str(self.label))
-			# string = NSString.alloc().init()
-			# string = self.label
-			# string.string_(str(self.label))
-			# string.drawAtPoint_color_alignment_(NSPoint(self.x, self.y - 20), NSColor.blackColor(), 'left')
-
-class Value(object):
-	def __init__(self, x, y, color = (0, 0, 0), size = POINTSIZESMALL, label = None, layer = 'foreground', associatedObject = None):
-		self.x = x
-		self.y = y
-		self.y2 = None
-		self.color = color
-		self.size = size
-		self.label = label
-		self.layer = layer
-		self.associatedObject = associatedObject
-
-	def __repr__(self):
-		return '<Value (%s, %s) %s>' % (self.x, self.y, self.layer)
-
-
-class Area(object):
-	def __init__(self, w, h, title = None, titleAlign = 'left', widthAdjust = 1.0, bgColor = None, infoText = None):
-		self.w = w
-		self.h = h
-		self.widthAdjust = widthAdjust
-		self.title = title
-		self.titleAlign = titleAlign
-		self.bgColor = bgColor
-		self.infoText = infoText
-		self.top = 0
-		self.left = 0
-		self.isMouseOver = False
-		self.values = {'foreground': [], 'background': []}
-		self.xMin = None
-		self.xMax = None
-		self.yMin = None
-		self.yMax = None
-		self.xScope = 0
-		self.yScope = 0
-
-		# NSImage
-		self.image = None
-
-	def __repr__(self):
-		return '<Area %s>' % (self.title)
-
-	def addValue(self, value):
-		if not value.layer in self.values:
-			self.values[value.layer] = []
-
-		self.values[value.layer].append(value)
-
-		if self.xMin == None:
-			self.xMin = value.x
-		if self.xMax == None:
-			self.xMax = value.x
-
-		if self.yMin == None:
-			self.yMin = value.y
-		if self.yMax == None:
-			self.yMax = value.y
-
-		self.xMin = min(self.xMin or 0, value.x or 0)
-		self.xMax = max(self.xMax or 0, value.x or 0)
-		self.yMin = min(self.yMin or 0, value.y or 0)
-		self.yMax = max(self.yMax or 0, value.y or 0)
-		if value.y2:
-			self.yMin = min(self.yMin or 0, value.y2 or 0)
-			self.yMax = max(self.yMax or 0, value.y2 or 0)
-		self.xScope = self.xMax - self.xMin
-		self.yScope = self.yMax - self.yMin
-
-	def height(self):
-		if self.title:
-			return self.h + AREATITLEHEIGHT
-		else:
-			return self.h
+# Readers of axis tags and coordinates for the running Glyphs version, see axisReaders()
+_axisReaders = None
 
-	def drawingArea(self):
-		left, bottom, width, height = self.position()
-		# top = bottom + height
-		factor = 3
-		bottom += AREAINNERMARGIN * factor * 1.95
-		left += AREAINNERMARGIN * factor
-		width -= AREAINNERMARGIN * 2 * factor
-		height -= AREAINNERMARGIN * 2 * factor * 1.3
-		if self.title:
-			height -= AREATITLEHEIGHT
-		return left, bottom, width, height
-
-	def position(self):
-		bottom = self.top - self.height()
-		# top = bottom + self.height()
-		width = int(self.w * self.widthAdjust)
-		height = self.height()
-		return round(self.left), bottom, width, height
-
-	def mouseOver(self, mousePosition):
-		left, bottom, width, height = self.position()
-		if left < mousePosition.x < left + width and bottom < mousePosition.y < bottom + height:
-			self.active()
-		else:
-			self.inactive()
+def axisReaders(font):
+	"""\
+	(axisTag(axis), coordinates(master or instance)), resolved for the Glyphs API generation once
+	"""
+	global _axisReaders
+	if _axisReaders is None:
+		try:
+			# GLYPHS 3
+			for master in font.masters:
+				list(master.axes)
+			def axisTag(axis):
+				tag = axis.axisTag
+				if callable(tag):
+					tag = tag()
+				return tag
+			_axisReaders = (axisTag, lambda x: tuple(x.axes))
+		except:
+			# GLYPHS 2
+			_axisReaders = (lambda axis: axis['Tag'], lambda x: (x.weightValue, x.widthValue, x.customValue))
+	return _axisReaders
+
+def axisTable(font):
+	"""\
+	AxisTable of a GSFont
+	"""
+	axisTag, coordinates = axisReaders(font)
+	try:
+		tags = [axisTag(axis) for axis in font.axes]
+	except:
+		tags = []
+	return AxisTable(tags, [(master.id, coordinates(master)) for master in font.masters], [coordinates(instance) for instance in font.instances])
 
-	def active(self):
-		return
-		if self.isMouseOver == False:
-			self.isMouseOver = True
-			Glyphs.redraw()
-			# print(self.title)
+def fontModel(font, table):
+	model = GlyphsFontModel(font)
+	for tag in table.tags:
+		model.axes.append(Axis(tag, tag))
+	for master in font.masters:
+		model.addMaster(Master(master.id, master.name, list(table.masterCoordinates(master.id))))
+	for i, instance in enumerate(font.instances):
+		model.addInstance(Instance(instance.name, list(table.instanceCoordinates(i)), dict(instance.instanceInterpolations), instance.active))
+	model.axisTable = table
+	return model
 
-	def inactive(self):
-		return
-		if self.isMouseOver == True:
-			self.isMouseOver = False
-			Glyphs.redraw()
+def shapesOfLayer(layer, bounds):
+	"""\
+	Stand-in for the layer's shapes, the model only asks whether there are any.
+	Only layers without extent can be empty, the others aren't read (see snapshotLayer()).
+	"""
+	if (bounds.size.width == 0 or bounds.size.height == 0) and isEmptyLayer(layer):
+		return []
+	return ['shape']
+
+def glyphModel(glyph, model):
+	modelGlyph = Glyph(glyph.name, leftKerningGroup = glyph.leftKerningGroup, rightKerningGroup = glyph.rightKerningGroup)
+	for layer in glyph.layers:
+		bounds = layer.bounds
+		modelGlyph.addLayer(Layer(layer.layerId, layer.associatedMasterId, layer.name, layer.width, Rect(bounds.origin.x, bounds.origin.y, bounds.size.width, bounds.size.height), LSB = layer.LSB, RSB = layer.RSB, shapes = shapesOfLayer(layer, bounds)))
+	model.addGlyph(modelGlyph)
+	return modelGlyph
+
+# Cache keys
+
+def layerKey(layer):
+	if layer is None:
+		return None
+	return (layer.parent.name, layer.layerId)
+
+def fontSetupKey(plugin, font, table):
+	"""\
+	Designspace coordinates of masters and instances, names and displayed instances
+	"""
+	masters = tuple([(master.id, master.name) for master in font.masters])
+	instances = tuple([(i, instance.name, instance.active) for i, instance in enumerate(font.instances) if instance.showInPanel(plugin)])
+	return (table.key, masters, instances, plugin.getPreference('onlyActiveInstances'))
 
-	def draw(self, font):
-		position = self.position()
-		left, bottom, width, height = position
-		if width and height and not self.image:
-			self.image = NSImage.alloc().initWithSize_(NSSize(width, height))
-			self.image.lockFocus()
-			self._draw(font, position)
-			self.image.unlockFocus()
-
-		if self.image:
-			self.image.drawAtPoint_fromRect_operation_fraction_(NSPoint(left, bottom), NSZeroRect, NSCompositeSourceOver, 1.0)
-		# font.currentTab.graphicView().addSubview_(self.view)
-
-	def _draw(self, font, position):
-		# Sort values by interpolation space weight value
-		self.values['foreground'].sort(key=lambda value: value.x, reverse=False)
+class InstanceProxy(object):
+	"""\
+	Interpolated font of an instance and the glyphs looked up in it,
+	fetched once and shared by all panels
+	"""
+	def __init__(self, instance, key, instrumentation):
+		self.instance = instance
+		# Identifies the instance's definition, see instanceKey()
+		self.key = key
+		self.instrumentation = instrumentation
+		self._font = None
+		self._masterId = None
+		# {glyphName: (version key, proxy glyph)}, only the recently used ones
+		self.glyphs = LRUCache(PROXYGLYPHCACHESIZE)
+
+	@property
+	def font(self):
+		if self._font is None:
+			self.instrumentation.count('bridge.font')
+			self._font = self.instance.interpolatedFontProxy
+		return self._font
+
+	@property
+	def masterId(self):
+		if self._masterId is None:
+			try:
+				self._masterId = self.font.fontMasterID()
+			except:
+				self._masterId = self.font.fontMasterAtIndex_(0).valueForKey_("id")
+		return self._masterId
+
+	def glyph(self, name, version):
+		cached = self.glyphs.get(name)
+		if cached is None or cached[0] != version:
+			self.instrumentation.count('bridge.glyph')
+			cached = (version, self.font.glyphForName_(name))
+			self.glyphs.put(name, cached)
+		return cached[1]
+
+	def layer(self, name, version):
+		glyph = self.glyph(name, version)
+		self.instrumentation.count('bridge.layer')
+		try:
+			# GLYPHS 3
+			return glyph.layerForId_(self.masterId)
+		except:
+			# GLYPHS 2
+			return glyph.layerForKey_(self.masterId)
+
+def instanceKey(index, instance):
+	"""\
+	Position and definition of a model instance. Changes when the instance is
+	moved, or when its masters move and with them its interpolation factors.
+	"""
+	return (index, instance.name, tuple(instance.axes), tuple(sorted(instance.instanceInterpolations.items())))
 
-		tab = font.currentTab
+def instanceProxies(plugin, font):
+	return [InstanceProxy(instance, instanceKey(i, plugin.fontModel.instances[i]), plugin.instrumentation) for i, instance in enumerate(font.instances) if instance.showInPanel(plugin)]
 
-		left, bottom, width, height = position
-		left = 0
-		bottom = 0
-		top = bottom + height
-
-		# Background
-		if self.title:
-			path = NSBezierPath.alloc().init()
-			path.appendBezierPathWithRoundedRect_xRadius_yRadius_(NSRect(NSPoint(left, bottom), NSPoint(width, height)), AREACORNERRADIUS, AREACORNERRADIUS)
-			if self.isMouseOver:
-				# NSColor.colorWithDeviceRed_green_blue_alpha_(.5, .5, .5, AREATRANSPARENCY).set()
-				NSColor.disabledControlTextColor().colorWithAlphaComponent_(AREATRANSPARENCY).set()
+def interpolatedLayersForGlyph(plugin, glyph):
+	"""\
+	Snapshots of the glyph's displayed instances, cached per instance and glyph.
+	A new version of the glyph replaces the entry of the old one.
+	"""
+	version = plugin.glyphVersions.key(glyph)
+	layers = []
+	for proxy in plugin.instanceProxies:
+		key = (proxy.key, glyph.name)
+		cached = plugin.interpolatedLayerCache.get(key)
+		layerMetrics = cached[1] if cached is not None and cached[0] == version else None
+		plugin.cacheKeys.count('interpolatedLayers', layerMetrics is not None)
+		if layerMetrics is None:
+			if Glyphs.buildNumber >= 1056:
+				layer = proxy.layer(glyph.name, version)
 			else:
-				if self.bgColor:
-					self.bgColor.set()
-				else:
-					NSColor.windowBackgroundColor().colorWithAlphaComponent_(AREATRANSPARENCY).set()
-					#NSColor.colorWithDeviceRed_green_blue_alpha_(AREAGRAYVALUE, AREAGRAYVALUE, AREAGRAYVALUE, AREATRANSPARENCY).set()
+				plugin.instrumentation.count('bridge.interpolate')
+				if hasattr(glyph, 'interpolate_decompose_error_'):
+					layer = glyph.interpolate_decompose_error_(proxy.instance, True, None)
+				elif hasattr(glyph, 'interpolate_keepSmart_error_'):
+					layer = glyph.interpolate_keepSmart_error_(proxy.instance, True, None)
+			layerMetrics = snapshotLayer(layer)
+			plugin.interpolatedLayerCache.put(key, (version, layerMetrics))
+		layers.append(layerMetrics)
+	return layers
+
+def layersWithoutDeviationsForGlyph(plugin, glyph):
+	"""\
+	Snapshots of the glyph's instances interpolated without bracket and brace layers,
+	[] if it has none of those. The temporary glyph copy this takes is only made when
+	the glyph's master layers changed, edits to other layers reuse the last result.
+	"""
+	font = glyph.parent
+	name = glyph.name
+	versionKey = (plugin.glyphVersions.key(glyph), plugin.cacheKeys.version('setup'))
+	cached = plugin.deviationFreeCache.get(name)
+	if cached and cached[0] == versionKey:
+		return cached[2]
+
+	glyphHasDeviations = False
+	masterLayers = []
+	for layer in glyph.layers:
+		if '[' in layer.name or ']' in layer.name or '{' in layer.name:
+			glyphHasDeviations = True
+		elif layer.layerId == layer.associatedMasterId:
+			masterLayers.append(layer)
+	fingerprint = None
+	if glyphHasDeviations:
+		fingerprint = (plugin.cacheKeys.version('setup'), tuple([layerFingerprint(layer) for layer in masterLayers]))
+	plugin.cacheKeys.count('deviationFree', bool(cached and cached[1] == fingerprint))
+	if cached and cached[1] == fingerprint:
+		plugin.deviationFreeCache.put(name, (versionKey, fingerprint, cached[2]))
+		return cached[2]
+
+	layers = []
+	if glyphHasDeviations:
+		glyph = copy.copy(glyph)
+		glyph.name = 'test1'
+		glyph.parent = font
+		for i, layer in enumerate(copy.copy(glyph.layers)):
+			if '[' in layer.name or ']' in layer.name or '{' in layer.name:
+				del glyph.layers[layer.layerId]
+		for layer in glyph.layers:
+			layer.decomposeComponents()
+		for instance in font.instances:
+			if instance.showInPanel(plugin):
+				plugin.instrumentation.count('bridge.interpolate')
+				if hasattr(glyph, 'interpolate_decompose_error_'):
+					layer = glyph.interpolate_decompose_error_(instance, True, None)
+				elif hasattr(glyph, 'interpolate_keepSmart_error_'):
+					layer = glyph.interpolate_keepSmart_error_(instance, True, None)
+				layers.append(layer)
+	layers = snapshotLayers(layers)
+	plugin.deviationFreeCache.put(name, (versionKey, fingerprint, layers))
+	return layers
+
+def instanceKerningFromProxies(plugin, font, leftGlyph, rightGlyph, writingDirection):
+	leftVersion = plugin.glyphVersions.key(font.glyphs[leftGlyph.name])
+	rightVersion = plugin.glyphVersions.key(font.glyphs[rightGlyph.name])
+	kerning = []
+	for proxy in plugin.instanceProxies:
+		a = proxy.glyph(leftGlyph.name, leftVersion)
+		b = proxy.glyph(rightGlyph.name, rightVersion)
+		plugin.instrumentation.count('bridge.kerning')
+		kerning.append(proxy.font.kerningForFontMasterID_firstGlyph_secondGlyph_direction_(proxy.masterId, a, b, writingDirection))
+	return kerning
+
+def checkInstanceKerning(plugin, font, leftGlyph, rightGlyph, writingDirection, instanceKerning):
+	"""\
+	Debugging aid: interpolated instance kerning has to agree with the kerning of the instances' interpolated fonts
+	"""
+	proxyKerning = instanceKerningFromProxies(plugin, font, leftGlyph, rightGlyph, writingDirection)
+	differences = metrics.kerningDifferences(proxyKerning, instanceKerning)
+	assert not differences, 'Kerning of %s %s differs from the interpolated fonts in %s' % (leftGlyph.name, rightGlyph.name, ', '.join(['%s (%s, interpolated %s)' % (plugin.visibleInstances[i].name, proxyKerning[i], instanceKerning[i]) for i in differences]))
+
+# Space Bar core extensions
+
+def Area_Render(self, font):
+	"""\
+	Render the area into its image, if it has a size
+	"""
+	left, bottom, width, height = self.position()
+	self.image = None
+	if width and height:
+		self.image = NSImage.alloc().initWithSize_(NSSize(width, height))
+		self.image.lockFocus()
+		self._draw(font, (left, bottom, width, height))
+		self.image.unlockFocus()
+
+def Area_Draw(self, font):
+	signature = areaSignature(self, renderKey(font))
+	if not self.image or self.imageKey != signature:
+		self.imageKey = signature
+		self.render(font)
+
+	if self.image:
+		left, bottom, width, height = self.position()
+		self.image.drawAtPoint_fromRect_operation_fraction_(NSPoint(left, bottom), NSZeroRect, NSCompositeSourceOver, 1.0)
+
+class AppKitBackend(Backend):
+	"""\
+	Draws the batches of spacinginvadercore.render into the current graphics context
+	"""
+	def __init__(self, plugin):
+		self.plugin = plugin
+
+	def color(self, color):
+		if color == 'line' or color == 'text':
+			return NSColor.textColor()
+		if color == 'dot':
+			return NSColor.controlTextColor().colorWithAlphaComponent_(0.3)
+		if color == 'deviationDot':
+			blendColor = NSColor.colorWithDeviceRed_green_blue_alpha_(DEVIATIONCOLOR[0] / 255.0, DEVIATIONCOLOR[1] / 255.0, DEVIATIONCOLOR[2] / 255.0, 1.0)
+			return NSColor.controlTextColor().blendedColorWithFraction_ofColor_(0.5, blendColor)
+		if color == 'mouseOver':
+			return NSColor.disabledControlTextColor().colorWithAlphaComponent_(AREATRANSPARENCY)
+		if color == 'background':
+			return NSColor.windowBackgroundColor().colorWithAlphaComponent_(AREATRANSPARENCY)
+		return color
+
+	def fillRect(self, rect, color):
+		self.color(color).set()
+		NSBezierPath.fillRect_(NSRect(NSPoint(rect[0], rect[1]), NSPoint(rect[2], rect[3])))
+
+	def fillRoundedRect(self, rect, radius, color):
+		path = NSBezierPath.alloc().init()
+		path.appendBezierPathWithRoundedRect_xRadius_yRadius_(NSRect(NSPoint(rect[0], rect[1]), NSPoint(rect[2], rect[3])), radius, radius)
+		self.color(color).set()
+		path.fill()
+
+	def strokeLines(self, segments, color, strokeWidth = 1.0):
+		path = NSBezierPath.alloc().init()
+		path.setLineWidth_(strokeWidth)
+		for x1, y1, x2, y2 in segments:
+			path.moveToPoint_(NSPoint(x1, y1))
+			path.lineToPoint_(NSPoint(x2, y2))
+		self.color(color).set()
+		path.stroke()
+
+	def drawOvals(self, rects, color, fill = True):
+		path = NSBezierPath.alloc().init()
+		for x, y, width, height in rects:
+			path.appendBezierPathWithOvalInRect_(NSRect(NSPoint(x, y), NSPoint(width, height)))
+		self.color(color).set()
+		if fill:
 			path.fill()
-			# NSColor.colorWithDeviceRed_green_blue_alpha_(.5, .5, .5, .5).set()
-			# path.stroke()
-
-		# Title
-		if self.title:
-			topAdjust = 7
-			if self.titleAlign == 'left':
-				self.parent.plugin.drawTextAtPoint(self.title, NSPoint(left + AREAINNERMARGIN, top - AREAINNERMARGIN - topAdjust), fontSize = 10 * tab.scale, align = self.titleAlign, fontColor=NSColor.textColor())
-			elif self.titleAlign == 'center':
-				self.parent.plugin.drawTextAtPoint(self.title, NSPoint(left + width / 2.0, top - AREAINNERMARGIN - topAdjust), fontSize = 10 * tab.scale, align = self.titleAlign, fontColor=NSColor.textColor())
-			else:
-				self.parent.plugin.drawTextAtPoint(self.title, NSPoint(left - AREAINNERMARGIN + width, top - AREAINNERMARGIN - topAdjust), fontSize = 10 * tab.scale, align = self.titleAlign, fontColor=NSColor.textColor())
-		if False:
-			drawingArea = self.drawingArea()
-			path = NSBezierPath.alloc().init()
-			path.appendBezierPathWithRoundedRect_xRadius_yRadius_(NSRect(NSPoint(drawingArea[0], drawingArea[1]), NSPoint(drawingArea[2], drawingArea[3])), AREACORNERRADIUS, AREACORNERRADIUS)
-			NSColor.colorWithDeviceRed_green_blue_alpha_(.5, .5, .5, .5).set()
+		else:
 			path.stroke()
 
-		# Draw values
-		left, bottom, width, height = self.drawingArea()
-		left -= position[0]
-		bottom -= position[1]
+	def drawText(self, text, point, fontSize, align, color = 'text'):
+		self.plugin.drawTextAtPoint(text, NSPoint(point[0], point[1]), fontSize = fontSize, align = align, fontColor = self.color(color))
 
-		if self.infoText:
-			self.parent.plugin.drawTextAtPoint(self.infoText, NSPoint(left - 15, bottom - 20), fontSize = 10 * tab.scale, align = 'bottomleft', fontColor=NSColor.textColor())
-		else:
-			# lastDot = None
-			dots = []
-			if self.yMin != None and self.yMax != None:
-				xScopeAdjust = 1.0
-				xMedian = 0
-				if self.xScope > 0:
-					xMedian = self.xMin + self.xScope / 2.0
-					# if self.xScope > width:
-					xScopeAdjust = width / float(self.xScope)
-					xMedian = xMedian / xScopeAdjust
-
-				yScopeAdjust = 1.0
-				# yMedian = 0
-				if self.yScope > 0:
-					# yMedian = self.yMin + self.yScope / 2.0
-					if self.yScope > height:
-						yScopeAdjust = height / float(self.yScope)
-
-				# horizontal point zero line
-				y = bottom + (0 - self.yMin) * yScopeAdjust
-				if bottom + AREACORNERRADIUS <= y <= bottom + height - AREACORNERRADIUS:
-					line = Line(0, y, width * xScopeAdjust, y, strokeWidth = .25)
-					line.draw()
-
-				# vertical master position line
-				# x = left + (font.masters[font.masterIndex].weightValue - self.xMin) * xScopeAdjust
-				# line = Line(Dot(self.parent.plugin, x, position[1]), Dot(self.parent.plugin, x, position[1] + position[3]), strokeWidth = .25)
-				# line.draw()
-
-				for value in self.values['background']:
-					x = left + ((value.x or 0) - self.xMin) * xScopeAdjust
-					y = bottom + ((value.y or 0) - self.yMin) * yScopeAdjust
-					dot = Dot(self.parent.plugin, x, y, color = value.color, size = value.size, label = value.label)
-					dot.associatedValue = value
-					dot.draw(tab)
-
-				for i, value in enumerate(self.values['foreground']):
-					x = left + ((value.x or 0) - self.xMin) * xScopeAdjust
-					y = bottom + ((value.y or 0) - self.yMin) * yScopeAdjust
-					if value.y2:
-						y2 = bottom + ((value.y2 or 0) - self.yMin) * yScopeAdjust
-					else:
-						y2 = None
-
-					dot = Dot(self.parent.plugin, x, y, y2 = y2, color = value.color, size = value.size, label = value.label)
-					dot.associatedValue = value
-					dots.append(dot)
-
-			for i in range(len(dots) - 1):
-				dot1 = dots[i]
-				dot2 = dots[i+1]
-
-				if not dot1.y2 and not dot2.y2:
-					line = Line(dots[i].x, dots[i].y, dots[i+1].x, dots[i+1].y)
-					line.draw()
-
-				if dot1.y2 and not dot2.y2:
-					line = Line(dots[i].x, dots[i].y2, dots[i+1].x, dots[i+1].y, color = DEVIATIONCOLOR)
-					line.draw()
-					line = Line(dots[i].x, dots[i].y, dots[i+1].x, dots[i+1].y)
-					line.draw()
-
-				if not dot1.y2 and dot2.y2:
-					line = Line(dots[i].x, dots[i].y, dots[i+1].x, dots[i+1].y2, color = DEVIATIONCOLOR)
-					line.draw()
-					line = Line(dots[i].x, dots[i].y, dots[i+1].x, dots[i+1].y)
-					line.draw()
-
-				if dot1.y2 and dot2.y2:
-					line = Line(dots[i].x, dots[i].y2, dots[i+1].x, dots[i+1].y2, color = DEVIATIONCOLOR)
-					line.draw()
-					line = Line(dots[i].x, dots[i].y, dots[i+1].x, dots[i+1].y)
-					line.draw()
-
-			for dot in dots:
-				dot.draw(tab)
-
-	def addMasterValues(self, masterValues, font, activeLayer, glyphSideOnDisplay):
-		activeLayerChosen = False
-		for masterValue in masterValues:
-
-			masterValue = copy.copy(masterValue)
-			instanceValue = self.values['foreground'][int(masterValue.x)]
-			masterValue.y = instanceValue.y
-			nachKomma = masterValue.x % 1.0
-
-			if masterValue.x and nachKomma != 0.0:
-				instanceValue2 = self.values['foreground'][int(masterValue.x) + 1]
-				if instanceValue.y2 and instanceValue2.y2:
-					masterValue.y = Interpolate(instanceValue.y2, instanceValue2.y2, nachKomma)
-				elif instanceValue.y and instanceValue2.y2:
-					masterValue.y = Interpolate(instanceValue.y, instanceValue2.y2, nachKomma)
-				elif instanceValue.y2 and instanceValue2.y:
-					masterValue.y = Interpolate(instanceValue.y2, instanceValue2.y, nachKomma)
-				elif instanceValue.y and instanceValue2.y:
-					masterValue.y = Interpolate(instanceValue.y, instanceValue2.y, nachKomma)
-
-			# Master/layer is active
-			if glyphSideOnDisplay:
-				masterValue.color = INACTIVEMASTERCOLOR[glyphSideOnDisplay]
-			else:
-				masterValue.color = UNSELECTEDMASTERCOLOR
+def Area_DrawImage(self, font, position):
+	renderArea(self, AppKitBackend(self.parent.plugin), position, font.currentTab.scale)
 
-			if activeLayer == masterValue.associatedObject:
-				# print(activeLayer, 'chosen')
-				masterValue.size = SELECTEDMASTERSIZE
-				if glyphSideOnDisplay:
-					masterValue.color = ACTIVEMASTERCOLOR[glyphSideOnDisplay]
-				else:
-					masterValue.color = SELECTEDMASTERCOLOR
-				activeLayerChosen = True
-
-			if not activeLayerChosen and font.masters[activeLayer.associatedMasterId] == masterValue.associatedObject:# or activeLayer == masterValue.associatedObject:
-				# print(activeLayer, 'chosen')
-				masterValue.size = SELECTEDMASTERSIZE
-				if glyphSideOnDisplay:
-					masterValue.color = ACTIVEMASTERCOLOR[glyphSideOnDisplay]
-				else:
-					masterValue.color = SELECTEDMASTERCOLOR
-				activeLayerChosen = True
+Area.render = Area_Render
+Area.draw = Area_Draw
+Area._draw = Area_DrawImage
 
-			self.addValue(masterValue)
+def appearanceName():
+	"""\
+	Name of the app's appearance (light/dark), the dynamic system colours depend on it
+	"""
+	try:
+		return NSApplication.sharedApplication().effectiveAppearance().name()
+	except:
+		# macOS before 10.14
+		return None
 
+def renderKey(font):
+	"""\
+	What the rendered images of all areas depend on: the tab's scale and the appearance
+	"""
+	return (font.currentTab.scale, appearanceName())
 
 class Display(object):
 	def __init__(self, plugin):
@@ -542,58 +411,31 @@ class Display(object):
 	def draw(self, font):
 		tab = font.currentTab
 		if tab:
-			widthSum = 0
-			heightSum = 0
-			tabViewPortSize = tab.viewPort.size
-			for area in self.areas:
-				widthSum += area.w
-				heightSum += area.height()
-
-			widthSum += (len(self.areas) - 1) * AREAOUTERMARGIN
-			widthAdjust = 1.0
-			if widthSum + 2*PAGEMARGIN > tabViewPortSize.width:
-				widthAdjust = (tabViewPortSize.width - 2*PAGEMARGIN) / float(widthSum)
-				widthSum *= widthAdjust
+			viewPort = tab.viewPort
+			# Layout stage: depends on the viewport and the sizes of the areas only
+			layoutKey = (viewPort.size.width, viewPort.size.height, tab.scale, tuple([(area.w, area.height()) for area in self.areas]))
+			instrumentation = self.plugin.instrumentation
+			with instrumentation.stage('layout'):
+				if self.plugin.cacheKeys.changed('layout', layoutKey) or self.plugin.barLayout is None:
+					self.plugin.barLayout = BarLayout(self.areas, viewPort.size.width)
+				layout = self.plugin.barLayout
+				if ORIGIN == 'top':
+					layout.apply(self.areas, viewPort.origin.x, viewPort.origin.y + viewPort.size.height)
 
 			if ORIGIN == 'top':
-				top = tab.viewPort.origin.y + tabViewPortSize.height - PAGEMARGIN
-				width = tabViewPortSize.width
-				leftBorder = int(tab.viewPort.origin.x + width / 2.0 - widthSum / 2.0)
-				# print(leftBorder)
-				# Draw a blue rectangle all across the Edit View's visible area
-				# NSColor.blueColor().set()
-				# NSBezierPath.strokeRect_(NSRect(NSPoint(leftBorder, Glyphs.font.currentTab.viewPort.origin.y), NSPoint(width, Glyphs.font.currentTab.viewPort.size.height)))
-
-				# Draw a blue rectangle all across the Edit View's visible area
-				# NSColor.blueColor().set()
-				# NSBezierPath.strokeRect_(NSRect(NSPoint(leftBorder, Glyphs.font.currentTab.viewPort.origin.y), NSPoint(width, Glyphs.font.currentTab.viewPort.size.height)))
-
-				# Draw a blue rectangle all across the Edit View's visible area
-				# NSColor.blueColor().set()
-				# NSBezierPath.strokeRect_(NSRect(NSPoint(leftBorder, top - self.areas[0].height()), NSPoint(widthSum, self.areas[0].height())))
-
-				# Draw a white rectangle all across the Edit View's visible area
-				#NSColor.whiteColor().set()
-				# NSColor.colorWithDeviceRed_green_blue_alpha_(1, 1, 1, .95).set()
-				NSColor.textBackgroundColor().colorWithAlphaComponent_(0.35).set()
 				if len(self.areas):
-					height = self.areas[0].height() + 2 * PAGEMARGIN
-					NSBezierPath.fillRect_(NSRect(NSPoint(tab.viewPort.origin.x, tab.viewPort.origin.y + tab.viewPort.size.height - height), NSPoint(width, height)))
-					# x = tab.viewPort.origin.x + (tabViewPortSize.width / 2.0 - widthSum / 2.0) * widthAdjust
-					left = 0
-					for area in self.areas:
-						area.top = top
-						area.left = leftBorder + left
-						area.widthAdjust = widthAdjust
-						area.draw(font)
-						#top += area.height() + AREAOUTERMARGIN
-						left += area.w * widthAdjust + AREAOUTERMARGIN
-						# left -= left % 2
-						# left += 2
+					barOrigin = NSPoint(viewPort.origin.x, viewPort.origin.y + viewPort.size.height - layout.height)
+					with instrumentation.stage('render'):
+						if self.plugin.getPreference('compositing'):
+							self.drawComposited(font, layout, barOrigin)
+						else:
+							self.drawBackground(NSRect(barOrigin, NSPoint(layout.width, layout.height)))
+							for area in self.areas:
+								area.draw(font)
 
 			if ORIGIN == 'bottom':
 				top = tab.viewPort.origin.y + PAGEMARGIN + self.areas[0].height()
-				left = int(tab.viewPort.origin.x + tab.viewPort.size.width / 2.0 - (widthSum - (len(self.areas) - 1) * AREAOUTERMARGIN) / 2.0)
+				left = int(tab.viewPort.origin.x + tab.viewPort.size.width / 2.0 - (layout.widthSum - (len(self.areas) - 1) * AREAOUTERMARGIN) / 2.0)
 				for area in self.areas:
 					area.top = top
 					area.left = left
@@ -601,450 +443,410 @@ class Display(object):
 					# top += area.height() + AREAOUTERMARGIN
 					left += area.w + AREAOUTERMARGIN
 
-def drawValuesInInterpolationSpace(font, display, area, masterLayers, positiveColor = None, negativeColor = None, glyphSide = 'left', activeLayer = None):
-	# Draw masters
-	layersDrawn = []
-	# masterDots = []
-	layersToDots = {}
-
-	for weightValue, layer, interpolatedValue in masterLayers:
-		if not layer in layersDrawn:
-			for instance in font.instances:
-				if weightValueForInstance(instance) == weightValue:
-					x = font.instances.index(instance)
-					y = interpolatedValue
-
-					value = Value(x, y)
-					value.size = UNSELECTEDMASTERSIZE
-					value.color = UNSELECTEDMASTERCOLOR
-					value.layer = 'background'
-
-					area.addValue(value)
-					layersDrawn.append(layer)
-					# masterDots = value
-					layersToDots[layer] = value
-
-			for i in range(len(font.instances)-1):
-				firstInstance = font.instances[i]
-				secondInstance = font.instances[i+1]
-
-				if weightValueForInstance(firstInstance) < weightValue < weightValueForInstance(secondInstance):
-					t = NormalizeMinMax(weightValueForInstance(firstInstance), weightValueForInstance(secondInstance), 0, 1, weightValue)
-					x = i + t
-					y = interpolatedValue
-
-					value = Value(x, y)
-					value.size = UNSELECTEDMASTERSIZE
-					value.color = UNSELECTEDMASTERCOLOR
-					value.layer = 'background'
-
-					area.addValue(value)
-					layersDrawn.append(layer)
-					layersToDots[layer] = value
-
-	masterSelected = False
-
-	# select master by layer object
-	if activeLayer:
-		# print('layer', layer)
-		for key in layersToDots.keys():
-			if activeLayer == key:
-				# print('key', key)
-				value = layersToDots[key]
-				value.size = SELECTEDMASTERSIZE
-				value.color = SELECTEDMASTERCOLOR
-				masterSelected = True
-				break
-
-	if not masterSelected:
-		for key in layersToDots.keys():
-			if font.selectedLayers[0] == key:
-				value = layersToDots[key]
-				value.size = SELECTEDMASTERSIZE
-				value.color = SELECTEDMASTERCOLOR
-				masterSelected = True
-				break
-
-	if not masterSelected:
-		for key in layersToDots.keys():
-			if ('GSFontMaster' in key.__class__.__name__ and font.selectedFontMaster.id == key.id) or ('GSLayer' in key.__class__.__name__ and font.selectedFontMaster.id == key.layerId):
-				value = layersToDots[key]
-				value.color = SELECTEDMASTERCOLOR
-				value.size = SELECTEDMASTERSIZE
-
-	# Draw actual values
-	instanceCount = 0
-	for instance in font.instances:
-		# Extrapolation 
-		instanceWeightValue = weightValueForInstance(instance)
-		if instanceWeightValue < masterLayers[0][0]:
-			l1 = masterLayers[0][2]
-			l2 = masterLayers[1][2]
-			t = NormalizeMinMax(masterLayers[0][0], masterLayers[1][0], 0, 1, instanceWeightValue)
-			sbValue = Interpolate(l1, l2, t)
-
-		# Interpolation
-		elif masterLayers[0][0] <= instanceWeightValue <= masterLayers[-1][0]:
-			for i in range(len(masterLayers) - 1):
-				if masterLayers[i][0] == instanceWeightValue:
-					sbValue = masterLayers[i][2]
-				elif masterLayers[i][0] < instanceWeightValue < masterLayers[i + 1][0]:
-					l1 = masterLayers[i][2]
-					l2 = masterLayers[i+1][2]
-					t = NormalizeMinMax(masterLayers[i][0], masterLayers[i+1][0], 0, 1, instanceWeightValue)
-					sbValue = Interpolate(l1, l2, t)
-				elif masterLayers[i + 1][0] == instanceWeightValue:
-					sbValue = masterLayers[i + 1][2]
-
-		# Extrapolation 
-		if instanceWeightValue > masterLayers[-1][0]:
-			l1 = masterLayers[-2][2]
-			l2 = masterLayers[-1][2]
-			t = NormalizeMinMax(masterLayers[-2][0], masterLayers[-1][0], 0, 1, instanceWeightValue)
-			sbValue = Interpolate(l1, l2, t)
-
-		value = Value(instanceCount, sbValue)
-		# value = Value(instanceWeightValue, sbValue)
-		# if layer.layerId == font.selectedFontMaster.id:
-		# 	value.size = POINTSIZELARGE
-		value.label = int(round(sbValue))
-		value.associatedObject = instance
-		area.addValue(value)
-		if instance.active == False:
-			value.color = (128, 128, 128)
-			value.label = None
-		else:
-			if int(round(sbValue)) < 0 and negativeColor:
-				value.color = negativeColor
-			elif int(round(sbValue)) > 0 and positiveColor:
-				value.color = positiveColor
-				
-		instanceCount+=1
-
-def _addSidebearings(display, glyph, side, mode, title = None, titleAlign = 'left', glyphSide = 'left', activeLayer = None):
-	sbArea = Area(AREASTANDARDWIDTH, AREASTANDARDHEIGHT, title, titleAlign)
-	font = glyph.parent
+	def drawBackground(self, rect):
+		NSColor.textBackgroundColor().colorWithAlphaComponent_(0.35).set()
+		NSBezierPath.fillRect_(rect)
+
+	def drawComposited(self, font, layout, barOrigin):
+		"""\
+		Draw the bar from its offscreen image, compositing it again if anything changed
+		"""
+		compositor = self.plugin.compositor
+		dirty = compositor.frame(self.areas, self.plugin.cacheKeys.version('layout'), renderKey(font))
+		if dirty is not None:
+			for area in dirty:
+				area.render(font)
+			image = NSImage.alloc().initWithSize_(NSSize(layout.width, layout.height))
+			image.lockFocus()
+			self.drawBackground(NSRect(NSPoint(0, 0), NSPoint(layout.width, layout.height)))
+			for area in self.areas:
+				if area.image:
+					left, bottom, width, height = area.position()
+					area.image.drawAtPoint_fromRect_operation_fraction_(NSPoint(left - barOrigin.x, bottom - barOrigin.y), NSZeroRect, NSCompositeSourceOver, 1.0)
+			image.unlockFocus()
+			compositor.image = image
+
+		compositor.image.drawAtPoint_fromRect_operation_fraction_(barOrigin, NSZeroRect, NSCompositeSourceOver, 1.0)
+
+def addInterpolation(plugin, font, mode, title):
+	model = plugin.fontModel
 	if mode == 'masters':
-		glyphMasterLayers = glyph.masterLayers
-		i = 0
-		for layer in [x[1] for x in glyphMasterLayers]:
-			if side == 'left':
-				sbValue = layer.LSB
-			elif side == 'right':
-				sbValue = layer.RSB
-
-			value = Value(i, sbValue)
-			if layer == activeLayer:
-				value.size = POINTSIZELARGE
-			value.label = sbValue
-			sbArea.addValue(value)
-			i+=1
+		return metrics.addInterpolation(model, mode, title, selectedMasterId = font.selectedFontMaster.id)
+
 	elif mode == 'instances':
 		# Cache
-		compareString = str(glyph.lastChange) + str(activeLayer) + str(font.selectedFontMaster) + str(font.selectedLayers[0]) + str(glyphSide) + str(side) + str(font.activeInstances)
-		key = 'sidebearing_%s_%s' % (glyphSide, side)
-		if not key in areaCache or compareString != areaCache[key]['compareString']:
-			glyphMasterLayers = glyph.masterLayers
-			# extend masters list with interpolatable values
-			for masterLayer in glyphMasterLayers:
-				if side == 'left':
-					masterLayer.append(masterLayer[1].LSB)
-				elif side == 'right':
-					masterLayer.append(masterLayer[1].RSB)
-			drawValuesInInterpolationSpace(font, display, sbArea, glyphMasterLayers, glyphSide = glyphSide, activeLayer = activeLayer)
-			areaCache[key] = {
-				'compareString': compareString,
-				'area': sbArea,
-			}
-		else:
-			sbArea = areaCache[key]['area']
-	return sbArea
+		key = (font.selectedFontMaster.id, layerKey(font.selectedLayers[0]), plugin.cacheKeys.version('setup'))
+		if plugin.cacheKeys.changed('interpolation', key):
+			plugin.areaCache['interpolation'] = metrics.addInterpolation(model, mode, title, selectedMasterId = font.selectedFontMaster.id, selectedLayer = font.selectedLayers[0])
+		return plugin.areaCache['interpolation']
 
-def addValues(plugin, action, layers, layersWithoutDeviations, masterValues, display, glyph, sideOfGlyph, glyphSideOnDisplay, mode, title = None, activeLayer = None, bgColor = None):
-	sbArea = Area(AREASTANDARDWIDTH, AREASTANDARDHEIGHT, title, titleAlign = sideOfGlyph or 'center', bgColor = bgColor)
-	font = glyph.parent
-	if mode == 'masters':
-		glyphMasterLayers = glyph.masterLayers
-		i = 0
-		for master in glyph.parent.masters:
-			layer = glyph.layers[master.id]
-			if action == 'sidebearings':
-				if sideOfGlyph == 'left':
-					sbValue = layer.LSB
-				elif sideOfGlyph == 'right':
-					sbValue = layer.RSB
-			elif action == 'width':
-				sbValue = layer.width
-			elif action == 'bboxw':
-				sbValue = layer.bounds.size.width
-			elif action == 'bboxh':
-				sbValue = layer.bounds.size.height
-			elif action == 'bboxt':
-				sbValue = layer.bounds.origin.y + layer.bounds.size.height
-			elif action == 'bboxb':
-				sbValue = layer.bounds.origin.y
-			elif action == 'kerning':
-				sbValue = layer.bounds.origin.y
-
-			# Empty layer
-			if sbValue == 0:
-				try:
-					# GLYPHS 3
-					if not layer.shapes:
-						sbValue = None
-				except:
-					# GLYPHS 2
-					if not layer.paths and not layer.components:
-						sbValue = None
-
-			# Value is valid
-			value = Value(i, sbValue)
-			if layer == activeLayer:
-				value.size = POINTSIZELARGE
-			value.label = sbValue
-			sbArea.addValue(value)
-			i+=1
+def kerningChangeKey(font):
+	"""\
+	Per master, a key that moves whenever the master's kerning may have changed:
+	the font's last change and the master's number of kerning entries. Without
+	a last change, only added and removed entries move it. None if neither is known.
+	"""
+	try:
+		lastChange = font.lastChange
+	except:
+		lastChange = None
+	try:
+		counts = [len(font.kerning.get(master.id) or {}) for master in font.masters]
+	except:
+		counts = None
+	if lastChange is None and counts is None:
+		return None
+	return tuple([(lastChange, counts[i] if counts is not None else None) for i in range(len(font.masters))])
+
+def addKerning(plugin, font, mode, activeLayer, writingDirection, changeKey):
+	model = plugin.fontModel
+	leftGlyph = plugin.glyphModels['left']
+	rightGlyph = plugin.glyphModels['right']
+
+	# Kerning may have been edited in the meantime. The pair on display is read
+	# again in the masters whose change key moved since the pair was last read,
+	# without a change key in all masters.
+	kerningIndex = metrics.kerningIndex(model)
+	for i, master in enumerate(model.masters):
+		kerningIndex.refreshPair(master.id, leftGlyph, rightGlyph, changeKey[i] if changeKey is not None else None)
+
+	instanceKerning = None
+	if mode == 'instances' and metrics.pairHasKerning(model, leftGlyph, rightGlyph):
+		# Where instance kerning comes from: 'masters' (interpolated here from the
+		# masters' kerning) or 'proxy' (the interpolated font of each instance)
+		source = plugin.getPreference('instanceKerning')
+		# The kerning index only holds left-to-right kerning
+		if writingDirection == RTL:
+			source = 'proxy'
+		if source == 'proxy':
+			if hasattr(Glyphs, 'buildNumber') and Glyphs.buildNumber < 996:
+				kerningArea = Area(AREASTANDARDWIDTH, AREASTANDARDHEIGHT, title = 'Kerning', titleAlign = 'center')
+				kerningArea.infoText = 'Showing kerning for instances is\nsupported only in Glyph version 2.4.2\n(Build 996) or higher.\nPlease update Glyphs to the latest version.'
+				return kerningArea
+			instanceKerning = instanceKerningFromProxies(plugin, font, leftGlyph, rightGlyph, writingDirection)
+		else:
+			instanceKerning = metrics.interpolatedKerningForPairs(model, plugin.visibleInstances, [(leftGlyph, rightGlyph)])[0]
+			if DEBUGINSTANCEKERNING:
+				checkInstanceKerning(plugin, font, leftGlyph, rightGlyph, writingDirection, instanceKerning)
 
-	elif mode == 'instances':
-		# instanceMasters = [x[0] for x in layers[0][1].sortedInterpolationValues]
-		# mastersAdded = []
-		for instanceCount, instance, layer in layers:
-			sbValue2 = None
-			if action == 'sidebearings':
-				if sideOfGlyph == 'left':
-					sbValue = layer.LSB
-					if layersWithoutDeviations:
-						sbValue2 = layersWithoutDeviations[instanceCount].LSB
-				elif sideOfGlyph == 'right':
-					sbValue = layer.RSB
-					if layersWithoutDeviations:
-						sbValue2 = layersWithoutDeviations[instanceCount].RSB
-					# print(sbValue)
-			elif action == 'width':
-				sbValue = layer.width
-				if layersWithoutDeviations:
-					sbValue2 = layersWithoutDeviations[instanceCount].width
-			elif action == 'bboxw':
-				sbValue = layer.bounds.size.width
-				if layersWithoutDeviations:
-					sbValue2 = layersWithoutDeviations[instanceCount].bounds.size.width
-			elif action == 'bboxh':
-				sbValue = layer.bounds.size.height
-				if layersWithoutDeviations:
-					sbValue2 = layersWithoutDeviations[instanceCount].bounds.size.height
-			elif action == 'bboxt':
-				sbValue = layer.bounds.origin.y + layer.bounds.size.height
-				if layersWithoutDeviations:
-					sbValue2 = layersWithoutDeviations[instanceCount].bounds.origin.y + layersWithoutDeviations[instanceCount].bounds.size.height
-			elif action == 'bboxb':
-				sbValue = layer.bounds.origin.y
-				if layersWithoutDeviations:
-					sbValue2 = layersWithoutDeviations[instanceCount].bounds.origin.y
-			# Empty layer
-			if sbValue == 0:
-				try:
-					# GLYPHS 3
-					if not layer.shapes:
-						sbValue = None
-				except:
-					# GLYPHS 2
-					if not layer.paths and not layer.components:
-						sbValue = None
-
-			value = Value(instanceCount, sbValue)
-
-			# Value is valid
-			if sbValue != None:
-				if instance.active:
-					value.color = ACTIVECOLOR
-					value.label = int(round(sbValue))
-				else:
-					value.color = INACTIVECOLOR
-					value.label = None
+	return metrics.addKerning(leftGlyph, rightGlyph, mode, plugin.visibleInstances, plugin.masterValues, activeLayer, selectedMasterId = font.selectedFontMaster.id, instanceKerning = instanceKerning)
 
-				# Add second value
-				if sbValue != None and sbValue2 != None and sbValue != sbValue2 and abs(sbValue - sbValue2) > 1.0:
-					value.color = DEVIATIONORIGINALCOLOR
-					value.y2 = value.y
-					value.y = sbValue2
-					# print('Devitation', abs(sbValue - sbValue2))
+def kerningPanel(plugin, font, mode, leftGlyph, rightGlyph, activeLayer, writingDirection, panelsKey):
+	"""\
+	Kerning area of the pair. Computed again only when the glyphs or the
+	kerning changed, and then at most at the scheduler's rate.
+	"""
+	identity = (leftGlyph.name, rightGlyph.name, mode, layerKey(activeLayer), font.selectedFontMaster.id, writingDirection) + panelsKey
+	changeKey = kerningChangeKey(font)
+	# What the area shows: the glyphs' versions, the models on display (they
+	# lag behind while the side panels are deferred) and the kerning's state.
+	# Without a change signal for the kerning, it can't be told apart.
+	content = None
+	if changeKey is not None:
+		content = (plugin.glyphVersions.key(leftGlyph), plugin.glyphVersions.key(rightGlyph), plugin.glyphModels['left'], plugin.glyphModels['right'], changeKey)
+	cached = plugin.areaCache.get('kerning')
+	if content is not None and cached is not None and cached[:2] == (identity, content):
+		plugin.scheduler.remember('kerning', identity, cached[2])
+		return cached[2]
+
+	def compute():
+		area = addKerning(plugin, font, mode, activeLayer, writingDirection, changeKey)
+		plugin.areaCache['kerning'] = (identity, content, area)
+		return area
+	return plugin.scheduler.run('kerning', identity, compute)
+
+def glyphData(plugin, glyph, mode):
+	"""\
+	(glyph model, interpolated layers, layers without deviations) of the glyph.
+	Doesn't depend on the side of the cursor, so the same glyph on both sides
+	is only read and interpolated once.
+	"""
+	# Where instance layers come from: 'proxy' (the interpolated font of each instance)
+	# or 'masters' (interpolated here from the master and brace layers' metrics)
+	source = plugin.getPreference('instanceLayers')
+	version = plugin.glyphVersions.key(glyph)
+	key = (glyph.name, mode, source, plugin.cacheKeys.version('setup'))
+	cached = plugin.glyphDataCache.get(key)
+	hit = cached is not None and cached[0] == version
+	plugin.cacheKeys.count('glyphData', hit)
+	if not hit:
+		instrumentation = plugin.instrumentation
+		with instrumentation.stage('snapshot'):
+			modelGlyph = glyphModel(glyph, plugin.fontModel)
+		layers = []
+		layersWithoutDeviations = []
+		if mode == 'instances' and source == 'masters':
+			with instrumentation.stage('interpolation'):
+				layers = [(i, instance, snapshotLayer(layer)) for i, instance, layer in metrics.interpolatedLayers(modelGlyph, plugin.visibleInstances)]
+			with instrumentation.stage('deviationLayers'):
+				layersWithoutDeviations = snapshotLayers(metrics.layersWithoutDeviations(modelGlyph, plugin.visibleInstances))
+		elif mode == 'instances':
+			# Snapshot interpolated layers
+			with instrumentation.stage('interpolation'):
+				layers = [(i, plugin.visibleInstances[i], layerMetrics) for i, layerMetrics in enumerate(interpolatedLayersForGlyph(plugin, glyph))]
+			# Snapshot layers without deviations
+			with instrumentation.stage('deviationLayers'):
+				layersWithoutDeviations = layersWithoutDeviationsForGlyph(plugin, glyph)
+		cached = (version, modelGlyph, layers, layersWithoutDeviations)
+		plugin.glyphDataCache.put(key, cached)
+	return cached[1:]
+
+def sideColor(side):
+	if side == 'left':
+		return NSColor.windowBackgroundColor().blendedColorWithFraction_ofColor_(0.05, NSColor.blueColor()) # (230, 235, 240)
+	else:
+		return NSColor.windowBackgroundColor().blendedColorWithFraction_ofColor_(0.05, NSColor.redColor()) # (240, 235, 230)
 
-			# Value is empty
-			else:
-				value.color = (128, 128, 128)
-				value.label = None
-
-			value.associatedObject = instance
-			#print(action, value)
-			sbArea.addValue(value)
-
-		# Add masters
-		sbArea.addMasterValues(masterValues, font, activeLayer, glyphSideOnDisplay)
-
-	return sbArea
-
-def getKerning(master, leftGlyph, rightGlyph):
-	font = leftGlyph.parent
-	_kerning = font.kerningForPair(master.id, leftGlyph.rightKerningKey, rightGlyph.leftKerningKey)
-	kerningExceptionLeft = font.kerningForPair(master.id, leftGlyph.name, rightGlyph.rightKerningKey)
-	kerningExceptionRight = font.kerningForPair(master.id, leftGlyph.rightKerningKey, rightGlyph.name)
-	kerningExceptionBoth = font.kerningForPair(master.id, leftGlyph.name, rightGlyph.name)
-	exception = False
-	if _kerning > 1000000000:
-		_kerning = 0
-	if kerningExceptionLeft < 1000000000:
-		_kerning = kerningExceptionLeft
-		exception = True
-	if kerningExceptionRight < 1000000000:
-		_kerning = kerningExceptionRight
-		exception = True
-	if kerningExceptionBoth < 1000000000:
-		_kerning = kerningExceptionBoth
-		exception = True
-	return (_kerning, exception)
-
-def addKerning(display, plugin, leftGlyph, rightGlyph, mode, masterValues, activeLayer, writingDirection):
-	font = leftGlyph.parent
-	kerningArea = Area(AREASTANDARDWIDTH, AREASTANDARDHEIGHT, title = 'Kerning', titleAlign = 'center')
+# Preferences the glyph and kerning panels depend on
+PANELPREFERENCES = ('mode',) + tuple(sorted(set([action for action, name, sideOfGlyph in GLYPHPANELS]))) + ('instanceLayers', 'instanceKerning')
 
-	for master in font.masters:
-		pairHasKerning = False
-		kerning = font.kerningForPair(master.id, leftGlyph.rightKerningKey, rightGlyph.leftKerningKey)
-		if kerning != None and kerning > 10000000000:
-			kerning = 0
-		if kerning != None and kerning != 0:
-			pairHasKerning = True
-			break
-
-	if pairHasKerning:
-		if mode == 'masters':
-			for i, master in enumerate(font.masters):
-				kerning, exception = getKerning(master, leftGlyph, rightGlyph)
-				value = Value(i, kerning)
-				value.label = int(kerning)
-				kerningArea.addValue(value)
-				if master.id == font.selectedFontMaster.id:
-					value.size = POINTSIZELARGE
-				if exception:
-					value.color = (229, 53, 45)
-				elif kerning < 0:
-					value.color = (0, 158, 224)
-				elif kerning > 0:
-					value.color = (248, 179, 52)
-				else:
-					value.color = (128, 128, 128)
+def currentPanelsKey(plugin):
+	"""\
+	What the panels depend on besides the glyphs: the values of PANELPREFERENCES and the font setup.
+	Other preferences can change without computing any panel again.
+	"""
+	return tuple([plugin.getPreference(name) for name in PANELPREFERENCES]) + (plugin.cacheKeys.version('setup'),)
 
-		elif mode == 'instances':
-			if hasattr(Glyphs, 'buildNumber') and Glyphs.buildNumber < 996:
-				kerningArea.infoText = 'Showing kerning for instances is\nsupported only in Glyph version 2.4.2\n(Build 996) or higher.\nPlease update Glyphs to the latest version.'
-			else:
-				instanceCount = 0
-				for instance in font.instances:
-					if instance.showInPanel(plugin):
-						a = instance.interpolatedFontProxy.glyphForName_(leftGlyph.name)
-						b = instance.interpolatedFontProxy.glyphForName_(rightGlyph.name)
-						masterID = instance.interpolatedFontProxy.fontMasterAtIndex_(0).valueForKey_("id")
-						# print(hasattr(instance.interpolatedFontProxy,) 'kerningForFontMasterID_firstGlyph_secondGlyph_')
-						# print(hasattr(instance.interpolatedFontProxy,) 'kerningForFontMasterID_LeftKey_RightKey_direction_')
-						# print(hasattr(instance.interpolatedFontProxy,) 'kerningForFontMasterID_firstGlyph_secondGlyph_direction_')
-						sbValue = instance.interpolatedFontProxy.kerningForFontMasterID_firstGlyph_secondGlyph_direction_(masterID, a, b, writingDirection)
-						# print(sbValue)
-						if sbValue > 9999999999999:
-							sbValue = 0
-						value = Value(instanceCount, sbValue)
-						# Value is valid
-						if sbValue != None:
-							if instance.active:
-								if sbValue < 0:
-									value.color = (0, 158, 224)
-								elif sbValue > 0:
-									value.color = (248, 179, 52)
-								value.label = int(round(sbValue))
-							else:
-								value.color = INACTIVECOLOR
-								value.label = None
-						# Value is empty
-						else:
-							value.color = (128, 128, 128)
-							value.label = None
-						instanceCount += 1
-						kerningArea.addValue(value)
+def panelsCacheKey(glyph, side, key):
+	"""\
+	Key of the glyph's panels in the glyph cache. Doesn't contain the glyph's
+	version, so a new version replaces the entry of the old one.
+	"""
+	return (side, glyph.name) + key
 
-				# Add masters
-				kerningArea.addMasterValues(masterValues, font, activeLayer, None)
+def hasPanels(plugin, glyph, side, version, key):
+	"""\
+	True if the glyph cache holds the panels of this version of the glyph
+	"""
+	cached = plugin.glyphCache.peek(panelsCacheKey(glyph, side, key))
+	return cached is not None and cached[0] == version
 
-	return kerningArea
+def glyphPanels(plugin, glyph, side, mode, activeLayer, version, key):
+	"""\
+	(glyph model, areas) of the glyph on one side of the cursor, looked up in the glyph cache.
+	version: the glyph's version key, key: (active layer key,) + currentPanelsKey()
+	"""
+	cacheKey = panelsCacheKey(glyph, side, key)
+	cached = plugin.glyphCache.get(cacheKey)
+	hit = cached is not None and cached[0] == version
+	plugin.cacheKeys.count(side, hit)
+	if not hit:
+		modelGlyph, layers, layersWithoutDeviations = glyphData(plugin, glyph, mode)
+
+		masterValues = plugin.masterValues
+		if mode == 'instances':
+			# Add brace layers to masters
+			masterValues = metrics.braceMasterValues(modelGlyph, layers, plugin.masterValues, activeLayer)
+
+		# Draw
+		actions = [action for action, name, sideOfGlyph in GLYPHPANELS if plugin.getPreference(action)]
+		areas = metrics.glyphAreas(modelGlyph, layers, layersWithoutDeviations, masterValues, side, mode, actions, plugin.names, activeLayer = activeLayer, bgColor = sideColor(side))
+		cached = (version, modelGlyph, areas)
+		plugin.glyphCache.put(cacheKey, cached)
+	return cached[1:]
+
+def sideAreas(plugin, glyph, side, mode, activeLayer, version, key):
+	# While the glyph is being edited, its panels are computed at most at the
+	# scheduler's rate, the last ones stay on display in between
+	identity = (glyph.name, mode) + key
+	if hasPanels(plugin, glyph, side, version, key):
+		cached = glyphPanels(plugin, glyph, side, mode, activeLayer, version, key)
+		plugin.scheduler.remember(side, identity, cached)
+	elif inBackground(plugin, mode):
+		# The last panels of the glyph stay on display until the new ones arrive
+		cached = plugin.scheduler.last(side, identity)
+		if cached is None:
+			stale = plugin.glyphCache.peek(panelsCacheKey(glyph, side, key))
+			if stale is not None:
+				cached = stale[1:]
+		# One job per side, started at most at the scheduler's rate
+		if plugin.scheduler.due(side, identity) or (cached is None and side not in plugin.placeholders):
+			backgroundPanels(plugin, glyph, side, mode, activeLayer, version, key)
+			plugin.scheduler.started(side, identity)
+		if cached is None:
+			cached = plugin.placeholders[side][1]
+	else:
+		cached = plugin.scheduler.run(side, identity, lambda: glyphPanels(plugin, glyph, side, mode, activeLayer, version, key))
+	modelGlyph, areas = cached
+	plugin.glyphModels[side] = modelGlyph
+	return areas
 
-def addInterpolation(display, font, mode, title):
-	instancesArea = Area(AREASTANDARDWIDTH, AREASTANDARDHEIGHT, title, 'center')
+def backgroundPanels(plugin, glyph, side, mode, activeLayer, version, key):
+	"""\
+	Start computing the glyph's panels on a worker thread, return a placeholder until they arrive.
+	A job started before for the same side is cancelled.
+	"""
+	jobKey = (panelsCacheKey(glyph, side, key), version)
+	placeholder = None
+	if side in plugin.placeholders and plugin.placeholders[side][0] == jobKey:
+		placeholder = plugin.placeholders[side][1]
+	if placeholder is None:
+		modelGlyph = submitPanels(plugin, glyph, side, mode, activeLayer, version, key, side)
+		area = Area(AREASTANDARDWIDTH, AREASTANDARDHEIGHT, title = glyph.name, titleAlign = 'center', bgColor = sideColor(side))
+		area.infoText = Glyphs.localize({'en': 'Computing…', 'de': 'Berechne…'})
+		placeholder = (modelGlyph, [area])
+		plugin.placeholders[side] = (jobKey, placeholder)
+	return placeholder
+
+def submitPanels(plugin, glyph, side, mode, activeLayer, version, key, slot):
+	"""\
+	Submit the job computing the glyph's panels to the worker, replacing the
+	job of slot. Returns the glyph model. The worker gets a snapshot of the font
+	model with a copy of the glyph, the main thread keeps changing the model.
+	"""
+	with plugin.instrumentation.stage('snapshot'):
+		modelGlyph = glyphModel(glyph, plugin.fontModel)
+		snapshot = plugin.fontModel.snapshot([modelGlyph])
+	instances = [snapshot.instances[plugin.fontModel.instances.index(instance)] for instance in plugin.visibleInstances]
+	actions = [action for action, name, sideOfGlyph in GLYPHPANELS if plugin.getPreference(action)]
+	if activeLayer is not None:
+		activeLayer = Layer(activeLayer.layerId, activeLayer.associatedMasterId)
+	job = functools.partial(snapshotPanels, modelGlyph, snapshot.glyphs[glyph.name], instances, list(plugin.masterValues), side, mode, actions, dict(plugin.names), activeLayer, sideColor(side))
+	plugin.background.submit((panelsCacheKey(glyph, side, key), version), job, slot = slot)
+	return modelGlyph
+
+def snapshotPanels(modelGlyph, snapshotGlyph, *arguments):
+	"""\
+	Runs on the worker: (glyph model, areas) with the areas computed from the
+	snapshot's copy of the glyph
+	"""
+	return (modelGlyph, metrics.glyphPanels(snapshotGlyph, *arguments)[1])
 
-	if mode == 'masters':
-		for i, master in enumerate(font.masters):
-			masterWeightValue = weightValueForMaster(master)
-			value = Value(masterWeightValue, masterWeightValue)
-			value.label = int(masterWeightValue)
-			instancesArea.addValue(value)
-			if master.id == font.selectedFontMaster.id:
-				value.size = POINTSIZELARGE
+def inBackground(plugin, mode):
+	"""\
+	Whether panels are computed on the worker. Only for panels that don't read
+	the instance proxies, which live on the main thread, so that both ways give
+	the same panels.
+	"""
+	return plugin.getPreference('computeMode') == 'background' and (mode != 'instances' or plugin.getPreference('instanceLayers') == 'masters')
 
-	elif mode == 'instances':
-		glyphMasterLayers = font.masterLayers
-		# extend masters list with interpolatable values
-		for masterLayer in glyphMasterLayers:
-			masterLayer.append(masterLayer[0]) # masterLayer[1].weightValue ?! masterLayer is list of [weightValue, master]
+def collectBackground(plugin):
+	"""\
+	Move finished background panels into the glyph cache. True if there were any.
+	"""
+	finished = plugin.background.collect()
+	for key, result in finished:
+		cacheKey, version = key
+		plugin.glyphCache.put(cacheKey, (version,) + tuple(result))
+	# Placeholders of finished jobs go, failed jobs get started again
+	for side, (key, placeholder) in list(plugin.placeholders.items()):
+		if not plugin.background.isRunning(key):
+			del plugin.placeholders[side]
+	return bool(finished)
+
+def computed(plugin):
+	if collectBackground(plugin):
+		Glyphs.redraw()
 
-		# Cache
-		compareString = str(font.selectedFontMaster) + str(font.selectedLayers[0]) + str(glyphMasterLayers)
-		key = 'interpolation'
-		if not key in areaCache or compareString != areaCache[key]['compareString']:
-			drawValuesInInterpolationSpace(font, display, instancesArea, glyphMasterLayers, positiveColor = (234, 102, 50))
-			areaCache[key] = {
-				'compareString': compareString,
-				'area': instancesArea,
-			}
-		else:
-			instancesArea = areaCache[key]['area']
-	return instancesArea
+def deliverBackground(plugin):
+	"""\
+	Called on the worker thread when a job finished
+	"""
+	plugin.performSelectorOnMainThread_withObject_waitUntilDone_('computed:', None, False)
 
-def weightValueForMaster(master):
+def cachedTabLayers(tab):
+	"""\
+	The layout manager's layers of the tab, without copying them
+	"""
 	try:
 		# GLYPHS 3
-		weightAxisID = None
-		font = master.font
-		for a in font.axes:
-			if a.axisTag() == "wght":
-				weightAxisID = a.axisId()
-				break
-		if weightAxisID:
-			return master.axisValueValueForId_(weightAxisID)
-		else:
-			# return the value of the first axis:
-			return master.axes[0]
+		return tab.graphicView().layoutManager().cachedLayers()
 	except:
 		# GLYPHS 2
-		return master.weightValue
+		return tab.graphicView().layoutManager().cachedGlyphs()
 
-def weightValueForInstance(instance):
-	try:
-		# GLYPHS 3
-		weightAxisID = None
-		font = instance.font
-		for a in font.axes:
-			if a.axisTag() == "wght":
-				weightAxisID = a.axisId()
-				break
-		if weightAxisID:
-			return instance.axisValueValueForId_(weightAxisID)
+def resolveTabGlyph(layer):
+	"""\
+	Glyph of a layer of the tab, None for line breaks and other non-glyphs
+	"""
+	glyph = layer.parent
+	if 'GSGlyph' in glyph.__class__.__name__:
+		return glyph
+	return None
+
+def tabTextEdited(plugin, start, oldEnd, newEnd):
+	if plugin.traceRecorder is not None:
+		plugin.traceRecorder.textEdit(start, oldEnd, newEnd)
+
+def updateTabLayers(plugin, font, tab):
+	"""\
+	Start the frame of plugin.tabLayers. The tab's layers are only fetched from
+	its layout manager when a position is looked up. While a trace is recorded,
+	edits of the tab's text are found for it.
+	"""
+	if plugin.traceRecorder is not None:
+		key = (tab, font.selectedFontMaster.id, tuple(tab.features))
+		changes = plugin.tabChanges
+		if key != changes.key:
+			changes.reset(key, tab.text)
 		else:
-			# return value of the first axis:
-			return instance.coordinateForAxisIndex_(0)
-	except:
-		# GLYPHS 2
-		return instance.weightValue
+			changes.compare(tab.text)
+		changes.flush()
+	plugin.tabLayers.update(functools.partial(cachedTabLayers, tab))
+
+def tabGlyph(plugin, index):
+	"""\
+	(glyph, layer) at index of the tab, (None, None) for line breaks and other non-glyphs
+	"""
+	return plugin.tabLayers.get(index, (None, None))
+
+def prefetchGlyph(plugin, side, index, mode, panelsKey, offset):
+	"""\
+	Compute the panels of the glyph at index of the tab in two steps for the
+	Prefetcher: reading and interpolating the glyph, then its panels.
+	In background mode they are submitted to the worker instead, in a slot
+	per side and offset from the cursor.
+	"""
+	glyph, layer = tabGlyph(plugin, index)
+	if glyph:
+		version = plugin.glyphVersions.key(glyph)
+		key = (layerKey(layer),) + panelsKey
+		if not hasPanels(plugin, glyph, side, version, key):
+			if inBackground(plugin, mode):
+				submitPanels(plugin, glyph, side, mode, layer, version, key, ('prefetch', side, offset))
+			else:
+				glyphData(plugin, glyph, mode)
+				yield
+				glyphPanels(plugin, glyph, side, mode, layer, version, key)
+
+def schedulePrefetch(plugin, tab, textCursor, mode, panelsKey):
+	"""\
+	Queue the glyphs around the text cursor for computation in idle time.
+	Replaces (cancels) whatever was queued before.
+	"""
+	jobs = []
+	for position in neighbourPositions(textCursor, PREFETCHDISTANCE, len(plugin.tabLayers)):
+		for side, index in (('left', position - 1), ('right', position)):
+			# Change order for RTL
+			if tab.direction == RTL:
+				side = 'right' if side == 'left' else 'left'
+			jobs.append(functools.partial(prefetchGlyph, plugin, side, index, mode, panelsKey, position - textCursor))
+	plugin.prefetcher.schedule(jobs)
+	NSObject.cancelPreviousPerformRequestsWithTarget_selector_object_(plugin, 'prefetch:', None)
+	if jobs:
+		plugin.performSelector_withObject_afterDelay_('prefetch:', None, PREFETCHDELAY)
+
+def prefetch(plugin):
+	if plugin.prefetcher.runSlice():
+		plugin.performSelector_withObject_afterDelay_('prefetch:', None, PREFETCHDELAY)
+
+def scheduleSettle(plugin):
+	"""\
+	Compute the panels that were left stale once edits pause for SETTLEDELAY
+	"""
+	NSObject.cancelPreviousPerformRequestsWithTarget_selector_object_(plugin, 'settle:', None)
+	if plugin.scheduler.pending:
+		plugin.performSelector_withObject_afterDelay_('settle:', None, SETTLEDELAY)
+
+def settle(plugin):
+	if plugin.scheduler.settle():
+		Glyphs.redraw()
 
 def foreground(plugin, layer):
 	try:
-		calcTime = time.time()
+		plugin.instrumentation.beginFrame()
+		if plugin.traceRecorder is not None:
+			plugin.traceRecorder.beginFrame()
 		layer = plugin.controller.graphicView().activeLayer()
 		if layer:
 			font = layer.parent.parent
@@ -1056,59 +858,30 @@ def foreground(plugin, layer):
 			# Settings
 			mode = plugin.getPreference('mode') # masters or instances
 			# Prepare layers cache
-			currentTabString = str(font.selectedFontMaster) + ','.join(tab.features) + tab.text
-			if plugin.tabString != currentTabString:
-				plugin.tabString = currentTabString
-				plugin.tabLayers = tab.composedLayers
+			updateTabLayers(plugin, font, tab)
 			textCursor = tab.textCursor
 			# print(font#tab, tab.graphicView())
 			if font.tool == 'TextTool' or font.tool == 'SelectTool':
-				# Prepare values of masters
-				activeInstances = font.visibleInstances(plugin)
-				fontMastersString = str(font.masters) + str(activeInstances) + str(plugin.getPreference('onlyActiveInstances'))
-
-				if plugin.mastersChangedString != fontMastersString:
-					plugin.mastersChangedString = fontMastersString
-					plugin.masterValues = []
-					mastersAdded = []
-
-					if font.instances:
-						instanceMasters = [x[0] for x in font.instances[0].sortedInterpolationValues]
-						instanceCount = 0
-
-						for instance in font.instances:
-							if instance.showInPanel(plugin):
-								for master in font.masters:
-									# print("instance.instanceInterpolations", type(instance.instanceInterpolations.keys()), instance.instanceInterpolations.keys())
-									if len(instance.instanceInterpolations) == 1 and master.id in instance.instanceInterpolations:
-										if weightValueForInstance(activeInstances[0]) <= weightValueForMaster(master) <= weightValueForInstance(activeInstances[-1]):
-											mastersAdded.append(master)
-											value = Value(instanceCount, 0)
-											value.size = UNSELECTEDMASTERSIZE
-											value.color = UNSELECTEDMASTERCOLOR
-											value.layer = 'background'
-											value.associatedObject = master
-											plugin.masterValues.append(value)
-											# instanceCount += 1
-
-								newInstanceMasters = [x[0] for x in instance.sortedInterpolationValues]
-								if not newInstanceMasters[0] in mastersAdded and len(newInstanceMasters) == 2 and instanceMasters != newInstanceMasters:
-									if weightValueForInstance(activeInstances[0]) <= weightValueForMaster(newInstanceMasters[0]) <= weightValueForInstance(activeInstances[-1]):
-										mastersAdded.append(newInstanceMasters[0])
-										x = instanceCount - .5
-										y = 0
-										instanceMasters = newInstanceMasters
-										value = Value(x, y)
-										value.size = UNSELECTEDMASTERSIZE
-										value.color = UNSELECTEDMASTERCOLOR
-										value.layer = 'background'
-										value.associatedObject = newInstanceMasters[0]
-										plugin.masterValues.append(value)
-								instanceCount += 1
+				# Prepare font model and values of masters
+				table = axisTable(font)
+				if plugin.cacheKeys.changed('setup', fontSetupKey(plugin, font, table)):
+					with plugin.instrumentation.stage('snapshot'):
+						plugin.fontModel = fontModel(font, table)
+					plugin.visibleInstances = [plugin.fontModel.instances[i] for i, instance in enumerate(font.instances) if instance.showInPanel(plugin)]
+					plugin.instanceProxies = instanceProxies(plugin, font)
+					plugin.masterValues = metrics.masterValues(plugin.fontModel, plugin.visibleInstances)
+					# Entries of the old setup can't be hit anymore
+					plugin.background.cancel()
+					plugin.placeholders = {}
+					plugin.glyphCache.clear()
+					plugin.glyphDataCache.clear()
+					plugin.deviationFreeCache.clear()
+
+				collectBackground(plugin)
 
 				# Add interpolation space panel
 				if plugin.getPreference('interpolation'):
-					font.tempData()['spaceBarAreas'].append([addInterpolation(display, font, mode, plugin.names['interpolation'])])
+					font.tempData()['spaceBarAreas'].append([addInterpolation(plugin, font, mode, plugin.names['interpolation'])])
 
 				# Prepare glyphs for display
 				leftGlyph = None
@@ -1116,239 +889,47 @@ def foreground(plugin, layer):
 				leftLayer = None
 				rightLayer = None
 
-				try:
-					# GLYPHS 3
-					cachedGlyphs = tab.graphicView().layoutManager().cachedLayers()
-				except:
-					# GLYPHS 2
-					cachedGlyphs = tab.graphicView().layoutManager().cachedGlyphs()
-
 				# Catch left and right glyphs
-				if tab and tab.textRange == 0 and textCursor > 0 and tab.text[textCursor-1] != '\n' and len(plugin.tabLayers) >= 1 and 'GSGlyph' in plugin.tabLayers[textCursor - 1].parent.__class__.__name__:
-					leftGlyph = plugin.tabLayers[textCursor - 1].parent
-					leftLayer = cachedGlyphs[textCursor - 1]
-
-				if tab and tab.textRange == 0 and 0 <= textCursor < len(tab.text) and len(plugin.tabLayers) >= 1 and 'GSGlyph' in plugin.tabLayers[textCursor].parent.__class__.__name__:
-					rightGlyph = plugin.tabLayers[textCursor].parent
-					rightLayer = cachedGlyphs[textCursor]
+				if tab and tab.textRange == 0:
+					leftGlyph, leftLayer = tabGlyph(plugin, textCursor - 1)
+					rightGlyph, rightLayer = tabGlyph(plugin, textCursor)
 
 				# Change order for RTL
 				if tab.direction == RTL:
 					leftGlyph, rightGlyph = rightGlyph, leftGlyph
 					leftLayer, rightLayer = rightLayer, leftLayer
 
-				preferencesString = str([plugin.getPreference(z) for z in plugin.names.keys()])
+				# Data stage: the panels depend on content and some preferences only,
+				# resizing and zooming just lay them out and render them again
+				panelsKey = currentPanelsKey(plugin)
 
 				# Left Glyph
+				if leftGlyph:
+					leftAreas = sideAreas(plugin, leftGlyph, 'left', mode, leftLayer, plugin.glyphVersions.key(leftGlyph), (layerKey(leftLayer),) + panelsKey)
+
+				# Right Glyph
+				if rightGlyph:
+					rightAreas = sideAreas(plugin, rightGlyph, 'right', mode, rightLayer, plugin.glyphVersions.key(rightGlyph), (layerKey(rightLayer),) + panelsKey)
 
-				# Add brace layers to masters
 				if leftGlyph:
-					changeString = leftGlyph.changeString + str(leftLayer) + str(rightLayer) + preferencesString + str(font.activeInstances) + str(tab.viewPort.size.width) + str(tab.viewPort.size.height)
-					if not 'left' in plugin.glyphChangeStrings or plugin.glyphChangeStrings['left'] != changeString:
-
-						plugin.glyphChangeStrings['left'] = changeString
-						plugin.areaCache['left'] = []
-
-						# Prepare interpolated layers
-						leftLayers = []
-						instanceCount = 0
-						for instance in font.instances:
-
-							if instance.showInPanel(plugin):
-								if instance.showInPanel(plugin):
-									if Glyphs.buildNumber >= 1056:
-										try:
-											# GLYPHS 3
-											layer = instance.interpolatedFontProxy.glyphForName_(leftGlyph.name).layerForId_(instance.interpolatedFontProxy.fontMasterID())
-										except:
-											# GLYPHS 2
-											layer = instance.interpolatedFontProxy.glyphForName_(leftGlyph.name).layerForKey_(instance.interpolatedFontProxy.fontMasterID())
-										
-									else:
-										if hasattr(leftGlyph, 'interpolate_decompose_error_'):
-											layer = leftGlyph.interpolate_decompose_error_(instance, True, None)
-										elif hasattr(leftGlyph, 'interpolate_keepSmart_error_'):
-											layer = leftGlyph.interpolate_keepSmart_error_(instance, True, None)
-									leftLayers.append((instanceCount, instance, layer))
-									instanceCount += 1
-
-						# Prepare layers without deviations
-						leftLayersWithoutDeviations = []
-						glyphHasDeviations = False
-						for layer in leftGlyph.layers:
-							if '[' in layer.name or ']' in layer.name or '{' in layer.name:
-								glyphHasDeviations = True
-								break
-						if glyphHasDeviations:
-							glyph = copy.copy(leftGlyph)
-							glyph.name = 'test1'
-							glyph.parent = font
-							for i, layer in enumerate(copy.copy(glyph.layers)):
-								if '[' in layer.name or ']' in layer.name or '{' in layer.name:
-									del glyph.layers[layer.layerId]
-							for layer in glyph.layers:
-								layer.decomposeComponents()
-							for instance in font.instances:
-								if instance.showInPanel(plugin):
-									if instance.showInPanel(plugin):
-										if hasattr(glyph, 'interpolate_decompose_error_'):
-											layer = glyph.interpolate_decompose_error_(instance, True, None)
-										elif hasattr(glyph, 'interpolate_keepSmart_error_'):
-											layer = glyph.interpolate_keepSmart_error_(instance, True, None)
-										leftLayersWithoutDeviations.append(layer)
-
-						masterValues = copy.copy(plugin.masterValues)
-						for layer in leftGlyph.layers:
-							if '{' in layer.name and '}' in layer.name:
-								interpolationValues = map(int, layer.name.split('{')[1].split('}')[0].split(','))
-
-								if len(interpolationValues) == 1:
-									for instanceCount, instance, _layer in leftLayers:
-										if instanceCount < len(leftLayers) - 1:
-											if weightValueForInstance(leftLayers[instanceCount][1]) <= interpolationValues[0] <= weightValueForInstance(leftLayers[instanceCount + 1][1]):
-												value = Value(instanceCount + .5, 0)
-												value.size = UNSELECTEDMASTERSIZE
-												value.color = UNSELECTEDMASTERCOLOR
-												value.layer = 'background'
-												if leftLayer == layer:
-													value.associatedObject = layer
-												masterValues.insert(0, value)
-
-								elif len(interpolationValues) == 2:
-									for instanceCount, instance, _layer in leftLayers:
-										if instanceCount < len(leftLayers) - 1:
-											if leftLayers[instanceCount][1].widthValue == interpolationValues[1] and leftLayers[instanceCount + 1][1].widthValue == interpolationValues[1]:
-												if weightValueForInstance(leftLayers[instanceCount][1]) < interpolationValues[0] and weightValueForInstance(leftLayers[instanceCount + 1][1]) > interpolationValues[0]:
-													value = Value(instanceCount + .5, 0)
-													value.size = UNSELECTEDMASTERSIZE
-													value.color = UNSELECTEDMASTERCOLOR
-													value.layer = 'background'
-													if leftLayer == layer:
-														value.associatedObject = layer
-													masterValues.insert(0, value)
-
-						# Draw
-						areas = []
-
-						for action, name, sideOfGlyph in (
-							('sidebearings', 'LSB', 'left'),
-							('width', 'width', None),
-							('bboxw', 'bboxw', None),
-							('bboxh', 'bboxh', None),
-							('bboxt', 'bboxt', None),
-							('bboxb', 'bboxb', None),
-							('sidebearings', 'RSB', 'right'),
-						):
-							if leftGlyph and plugin.getPreference(action):
-								leftBgColor = NSColor.windowBackgroundColor().blendedColorWithFraction_ofColor_(0.05, NSColor.blueColor()) # (230, 235, 240)
-								areas.append(addValues(plugin, action, leftLayers, leftLayersWithoutDeviations, masterValues, display, leftGlyph, sideOfGlyph, 'left', mode, title = plugin.names[name], activeLayer = leftLayer, bgColor = leftBgColor))
-						plugin.areaCache['left'] = areas
-					font.tempData()['spaceBarAreas'].append(plugin.areaCache['left'])
+					font.tempData()['spaceBarAreas'].append(leftAreas)
 
 				# Kerning
 				if leftGlyph and rightGlyph and plugin.getPreference('kerning'):
-					font.tempData()['spaceBarAreas'].append([addKerning(display, plugin, leftGlyph, rightGlyph, mode, plugin.masterValues, activeLayer = leftLayer, writingDirection = tab.direction)])
+					with plugin.instrumentation.stage('kerning'):
+						kerningArea = kerningPanel(plugin, font, mode, leftGlyph, rightGlyph, leftLayer, tab.direction, panelsKey)
+					font.tempData()['spaceBarAreas'].append([kerningArea])
 
-				# Right Glyph
 				if rightGlyph:
-					changeString = rightGlyph.changeString + str(leftLayer) + str(rightLayer) + preferencesString + str(font.activeInstances) + str(tab.viewPort.size.width) + str(tab.viewPort.size.height)
-					if not 'right' in plugin.glyphChangeStrings or plugin.glyphChangeStrings['right'] != changeString:
-						plugin.glyphChangeStrings['right'] = changeString
-						plugin.areaCache['right'] = []
-						# Prepare interpolated layers
-						rightLayers = []
-						instanceCount = 0
-						for instance in font.instances:
-							if instance.showInPanel(plugin):
-								if instance.showInPanel(plugin):
-									if Glyphs.buildNumber >= 1056:
-										try:
-											# GLYPHS 3
-											layer = instance.interpolatedFontProxy.glyphForName_(rightGlyph.name).layerForId_(instance.interpolatedFontProxy.fontMasterID())
-										except:
-											# GLYPHS 2
-											layer = instance.interpolatedFontProxy.glyphForName_(rightGlyph.name).layerForKey_(instance.interpolatedFontProxy.fontMasterID())
-									else:
-										if hasattr(rightGlyph, 'interpolate_keepSmart_error_'):
-											layer = rightGlyph.interpolate_keepSmart_error_(instance, True, None)
-										elif hasattr(rightGlyph, 'interpolate_decompose_error_'):
-											layer = rightGlyph.interpolate_decompose_error_(instance, True, None)
-									rightLayers.append((instanceCount, instance, layer))
-									instanceCount += 1
-
-						# Prepare layers without deviations
-						rightLayersWithoutDeviations = []
-						glyphHasDeviations = False
-						for layer in rightGlyph.layers:
-							if '[' in layer.name or ']' in layer.name or '{' in layer.name:
-								glyphHasDeviations = True
-								break
-						if glyphHasDeviations:
-							glyph = copy.copy(rightGlyph)
-							glyph.name = 'test1'
-							glyph.parent = font
-							for i, layer in enumerate(copy.copy(glyph.layers)):
-								if '[' in layer.name or ']' in layer.name or '{' in layer.name:
-									del glyph.layers[layer.layerId]
-							for layer in glyph.layers:
-								layer.decomposeComponents()
-							for instance in font.instances:
-								if instance.showInPanel(plugin):
-									if instance.showInPanel(plugin):
-										if hasattr(glyph, 'interpolate_decompose_error_'):
-											layer = glyph.interpolate_decompose_error_(instance, True, None)
-										elif hasattr(glyph, 'interpolate_keepSmart_error_'):
-											layer = glyph.interpolate_keepSmart_error_(instance, True, None)
-										rightLayersWithoutDeviations.append(layer)
-
-						# Add brace layers to masters
-						masterValues = copy.copy(plugin.masterValues)
-						for layer in rightGlyph.layers:
-							if '{' in layer.name and '}' in layer.name:
-								interpolationValues = map(int, layer.name.split('{')[1].split('}')[0].split(','))
-
-								if len(interpolationValues) == 1:
-									for instanceCount, instance, _layer in rightLayers:
-										if instanceCount < len(rightLayers) - 1:
-											if weightValueForInstance(rightLayers[instanceCount][1]) <= interpolationValues[0] <= weightValueForInstance(rightLayers[instanceCount + 1][1]):
-												value = Value(instanceCount + .5, 0)
-												value.size = UNSELECTEDMASTERSIZE
-												value.color = UNSELECTEDMASTERCOLOR
-												value.layer = 'background'
-												if rightLayer == layer:
-													value.associatedObject = layer
-												masterValues.insert(0, value)
-
-								elif len(interpolationValues) == 2:
-									for instanceCount, instance, _layer in rightLayers:
-										if instanceCount < len(rightLayers) - 1:
-											if rightLayers[instanceCount][1].widthValue == interpolationValues[1] and rightLayers[instanceCount + 1][1].widthValue == interpolationValues[1]:
-												if weightValueForInstance(rightLayers[instanceCount][1]) < interpolationValues[0] and weightValueForInstance(rightLayers[instanceCount + 1][1]) > interpolationValues[0]:
-													value = Value(instanceCount + .5, 0)
-													value.size = UNSELECTEDMASTERSIZE
-													value.color = UNSELECTEDMASTERCOLOR
-													value.layer = 'background'
-													if rightLayer == layer:
-														value.associatedObject = layer
-													masterValues.insert(0, value)
-
-						# Draw
-						areas = []
-						for action, name, sideOfGlyph in (
-							('sidebearings', 'LSB', 'left'),
-							('width', 'width', None),
-							('bboxw', 'bboxw', None),
-							('bboxh', 'bboxh', None),
-							('bboxt', 'bboxt', None),
-							('bboxb', 'bboxb', None),
-							('sidebearings', 'RSB', 'right'),
-						):
-							if rightGlyph and plugin.getPreference(action):
-								rightBgColor = NSColor.windowBackgroundColor().blendedColorWithFraction_ofColor_(0.05, NSColor.redColor()) # (240, 235, 230)
-								areas.append(addValues(plugin, action, rightLayers, rightLayersWithoutDeviations, masterValues, display, rightGlyph, sideOfGlyph, 'right', mode, title = plugin.names[name], activeLayer = rightLayer, bgColor = rightBgColor))
-						plugin.areaCache['right'] = areas
-					font.tempData()['spaceBarAreas'].append(plugin.areaCache['right'])
-				calcTime = time.time() - calcTime
+					font.tempData()['spaceBarAreas'].append(rightAreas)
+
+				# Neighbours of the cursor
+				if tab and tab.textRange == 0:
+					schedulePrefetch(plugin, tab, textCursor, mode, panelsKey)
+				scheduleSettle(plugin)
+
+				if plugin.traceRecorder is not None:
+					recordFrame(plugin, font, tab, leftGlyph and plugin.glyphModels['left'], rightGlyph and plugin.glyphModels['right'], leftLayer, rightLayer)
 
 			for i, subAreas in enumerate(font.tempData()['spaceBarAreas']):
 				for area in subAreas:
@@ -1356,30 +937,138 @@ def foreground(plugin, layer):
 				if i < len(font.tempData()['spaceBarAreas']) - 1:
 					display.addArea(Area(10, 0))
 
-			drawTime = time.time()
-
 			display.draw(font)
 
-			if NSHomeDirectory() == '/Users/yanone':
-				drawTime = time.time() - drawTime
+			if plugin.instrumentation.endFrame():
 				left = tab.viewPort.origin.x + PAGEMARGIN
 				top = tab.viewPort.origin.y + PAGEMARGIN
-				plugin.drawTextAtPoint('Calc: %ss, Draw: %ss, Total: %ss' % (str(calcTime)[:4], str(drawTime)[:4], str(calcTime + drawTime)[:4]), NSPoint(left, top + 10), fontSize = 10 * tab.scale, align = 'left', fontColor=NSColor.textColor())
+				plugin.drawTextAtPoint(plugin.instrumentation.summary(), NSPoint(left, top + 10), fontSize = 10 * tab.scale, align = 'left', fontColor=NSColor.textColor())
 
 	except:
 		print(traceback.format_exc())
+	# Frames that ended early aren't kept
+	plugin.instrumentation.current = None
+
+def recordFrame(plugin, font, tab, leftGlyph, rightGlyph, leftLayer, rightLayer):
+	"""\
+	Write what this redraw saw to the trace. leftGlyph and rightGlyph are the models on display.
+	"""
+	selectedLayer = None
+	if font.selectedLayers and font.selectedLayers[0] is not None:
+		selectedLayer = (font.selectedLayers[0].parent.name, font.selectedLayers[0].layerId)
+	viewPort = tab.viewPort
+	plugin.traceRecorder.frame(plugin.fontModel, plugin.visibleInstances, leftGlyph, rightGlyph, plugin.preferences,
+		cursor = tab.textCursor,
+		layers = (leftLayer.layerId if leftLayer else None, rightLayer.layerId if rightLayer else None),
+		selectedLayer = selectedLayer,
+		viewport = (viewPort.origin.x, viewPort.origin.y, viewPort.size.width, viewPort.size.height),
+		scale = tab.scale,
+		direction = tab.direction,
+		masterId = font.selectedFontMaster.id,
+	)
+
+def startTrace(plugin, path = None):
+	"""\
+	Record the following redraws to a trace file, by default on the Desktop. Returns the TraceRecorder.
+	"""
+	if path is None:
+		path = os.path.join(NSHomeDirectory(), 'Desktop', 'Space Bar Trace %s.jsonl' % time.strftime('%Y-%m-%d %H-%M-%S'))
+	stopTrace(plugin)
+	plugin.traceRecorder = TraceRecorder(path, version = VERSION)
+	# The first frame reads the text the edits are found against
+	plugin.tabChanges.reset(None)
+	Glyphs.redraw()
+	return plugin.traceRecorder
+
+def stopTrace(plugin):
+	"""\
+	Finish the trace being recorded. Returns its path, None if there was none.
+	"""
+	recorder = plugin.traceRecorder
+	if recorder is None:
+		return None
+	plugin.traceRecorder = None
+	recorder.close()
+	return recorder.path
+
+def startProfiling(plugin, frames = PROFILEFRAMES, directory = None):
+	"""\
+	Profile the next frames redraws, then write a pstats and a collapsed-stack file
+	to directory (by default the Desktop). Returns the ProfileCapture.
+	"""
+	if directory is None:
+		directory = os.path.join(NSHomeDirectory(), 'Desktop')
+	plugin.profileCapture = ProfileCapture(frames, directory)
+	Glyphs.redraw()
+	return plugin.profileCapture
+
+def profileCaptured(plugin):
+	pstatsPath, stacksPath = plugin.profileCapture.paths
+	print('Space Bar: profile of %s frames written to %s and %s' % (plugin.profileCapture.frames, pstatsPath, stacksPath))
+	NSWorkspace.sharedWorkspace().selectFile_inFileViewerRootedAtPath_(pstatsPath, '')
+
+def cacheStatistics(plugin):
+	"""\
+	Hits, misses and sizes of the caches, for the instrumentation report
+	"""
+	statistics = {'keys': plugin.cacheKeys.statistics()}
+	for name in ('glyphCache', 'glyphDataCache', 'deviationFreeCache', 'interpolatedLayerCache'):
+		cache = getattr(plugin, name)
+		statistics[name] = {'hits': cache.hits, 'misses': cache.misses, 'evictions': cache.evictions, 'size': len(cache), 'capacity': cache.capacity}
+	statistics['tabLayers'] = {'fetches': plugin.tabLayers.fetches, 'lookups': plugin.tabLayers.lookups}
+	statistics['tabChanges'] = {'edits': plugin.tabChanges.edits, 'comparisons': plugin.tabChanges.comparisons, 'resets': plugin.tabChanges.resets}
+	statistics['compositor'] = plugin.compositor.statistics()
+	statistics['scheduler'] = {'computed': plugin.scheduler.computed, 'deferred': plugin.scheduler.deferred}
+	if plugin.fontModel is not None and plugin.fontModel.kerningIndex is not None:
+		statistics['kerningIndex'] = {'hits': plugin.fontModel.kerningIndex.hits, 'misses': plugin.fontModel.kerningIndex.misses}
+	return statistics
+
+def exportInstrumentation(plugin, path = None):
+	"""\
+	Write the instrumentation report as JSON, by default to the Desktop. Returns the path.
+	"""
+	if path is None:
+		path = os.path.join(NSHomeDirectory(), 'Desktop', 'Space Bar Instrumentation %s.json' % time.strftime('%Y-%m-%d %H-%M-%S'))
+	return plugin.instrumentation.export(path, {'caches': cacheStatistics(plugin), 'version': VERSION})
 
 def start(plugin):
-	plugin.tabLayers = None
+	plugin.tabLayers = TabLayers(resolveTabGlyph)
+	# Edits of the current tab's text, for the trace
+	plugin.tabChanges = TextChanges()
+	plugin.tabChanges.addListener(functools.partial(tabTextEdited, plugin))
 	plugin.tabOtherLayers = None
-	plugin.tabString = None
 	plugin.mouseActiveObject = None
-	plugin.mastersChangedString = None
 
 	# Cache
-	plugin.glyphChangeStrings = {}
+	plugin.cacheKeys = CacheKeys()
+	plugin.glyphVersions = GlyphVersions()
 	plugin.areaCache = {}
-	plugin.mastersChangedString = ''
+	# {(side, glyphName, layer key) + currentPanelsKey(): (glyph version key, glyph model, areas)}
+	plugin.glyphCache = LRUCache(plugin.getPreference('glyphCacheSize') or GLYPHCACHESIZE)
+	# {(glyphName, mode, instanceLayers, setup version): (glyph version key, glyph model, layers, layers without deviations)}
+	plugin.glyphDataCache = LRUCache(plugin.getPreference('glyphCacheSize') or GLYPHCACHESIZE)
+	# {glyphName: (version key, master layer fingerprint, snapshots)}
+	plugin.deviationFreeCache = LRUCache(plugin.getPreference('glyphCacheSize') or GLYPHCACHESIZE)
+	plugin.prefetcher = Prefetcher(PREFETCHBUDGET)
+	plugin.instrumentation = Instrumentation(enabled = bool(plugin.getPreference('instrumentation')))
+	plugin.profileCapture = None
+	plugin.traceRecorder = None
+	computeRate = plugin.getPreference('computeRate')
+	plugin.scheduler = ComputeScheduler(COMPUTERATE if computeRate is None else computeRate)
+	plugin.background = BackgroundCompute(ThreadExecutor(), deliver = functools.partial(deliverBackground, plugin))
+	# {side: ((glyph cache key, version key), (glyph model, placeholder areas))} of the panels being computed in the background
+	plugin.placeholders = {}
+	plugin.compositor = Compositor()
+	plugin.barLayout = None
+
+	# Font model
+	plugin.fontModel = None
+	plugin.visibleInstances = []
+	plugin.instanceProxies = []
+	# {(instanceKey, glyphName): (glyph version key, LayerMetrics)}
+	plugin.interpolatedLayerCache = LRUCache(INTERPOLATEDLAYERCACHESIZE)
+	plugin.masterValues = []
+	plugin.glyphModels = {}
 
 def mouse(plugin, info):
 	return
@@ -1401,7 +1090,7 @@ def mouse(plugin, info):
 ############ Below imports stay with the main SpacingInvader() class ############
 
 from GlyphsApp.plugins import ReporterPlugin
-from AppKit import NSUserDefaults, NSHomeDirectory
+from AppKit import NSUserDefaults, NSHomeDirectory, NSOpenPanel, NSOKButton
 
 class SpacingInvader(ReporterPlugin):
 
@@ -1442,6 +1131,20 @@ class SpacingInvader(ReporterPlugin):
 			self.setPreference('width', False)
 		if self.getPreference('onlyActiveInstances') == None:
 			self.setPreference('onlyActiveInstances', False)
+		if self.getPreference('instanceKerning') == None:
+			self.setPreference('instanceKerning', 'masters')
+		if self.getPreference('instanceLayers') == None:
+			self.setPreference('instanceLayers', 'proxy')
+		if self.getPreference('glyphCacheSize') == None:
+			self.setPreference('glyphCacheSize', GLYPHCACHESIZE)
+		if self.getPreference('compositing') == None:
+			self.setPreference('compositing', True)
+		if self.getPreference('computeRate') == None:
+			self.setPreference('computeRate', COMPUTERATE)
+		if self.getPreference('computeMode') == None:
+			self.setPreference('computeMode', 'foreground')
+		if self.getPreference('instrumentation') == None:
+			self.setPreference('instrumentation', False)
 
 		self.names = {
 			'mode': 'Modus',
@@ -1567,6 +1270,32 @@ class SpacingInvader(ReporterPlugin):
 		# ---------- Separator
 		contextMenus.append({"menu": NSMenuItem.separatorItem()})
 
+		# Instrumentation
+		menu = NSMenuItem.alloc().initWithTitle_action_keyEquivalent_(Glyphs.localize({'en': 'Show Timings', 'de': 'Zeige Zeitmessung'}), self.callbackInstrumentation_, "")
+		if self.getPreference('instrumentation') == True:
+			menu.setState_(NSOnState)
+		contextMenus.append({"menu": menu})
+
+		menu = NSMenuItem.alloc().initWithTitle_action_keyEquivalent_(Glyphs.localize({'en': 'Export Timings...', 'de': 'Zeitmessung exportieren...'}), self.callbackExportInstrumentation_, "")
+		if self.getPreference('instrumentation') != True:
+			menu.setAction_(None)
+		contextMenus.append({"menu": menu})
+
+		# Profiler
+		menu = NSMenuItem.alloc().initWithTitle_action_keyEquivalent_(Glyphs.localize({'en': 'Profile Next %s Redraws...' % PROFILEFRAMES, 'de': 'Nächste %s Aktualisierungen profilieren...' % PROFILEFRAMES}), self.callbackProfile_, "")
+		if self.profileCapture is not None and self.profileCapture.active:
+			menu.setAction_(None)
+		contextMenus.append({"menu": menu})
+
+		# Session trace
+		menu = NSMenuItem.alloc().initWithTitle_action_keyEquivalent_(Glyphs.localize({'en': 'Record Trace', 'de': 'Sitzung aufzeichnen'}), self.callbackTrace_, "")
+		if self.traceRecorder is not None:
+			menu.setState_(NSOnState)
+		contextMenus.append({"menu": menu})
+
+		# ---------- Separator
+		contextMenus.append({"menu": NSMenuItem.separatorItem()})
+
 		# Website
 		menu = NSMenuItem.alloc().initWithTitle_action_keyEquivalent_(Glyphs.localize({'en': 'Space Bar Website...', 'de': 'Space Bar Webseite...'}), self.callbackGoToWebsite_, "")
 		contextMenus.append({"menu": menu})
@@ -1640,6 +1369,35 @@ class SpacingInvader(ReporterPlugin):
 		self.setPreference('bboxb', not self.getPreference('bboxb'))
 		Glyphs.redraw()
 
+	def callbackInstrumentation_(self, sender):
+		self.setPreference('instrumentation', not self.getPreference('instrumentation'))
+		self.instrumentation.enabled = bool(self.getPreference('instrumentation'))
+		self.instrumentation.reset()
+		Glyphs.redraw()
+
+	def callbackProfile_(self, sender):
+		panel = NSOpenPanel.openPanel()
+		panel.setCanChooseFiles_(False)
+		panel.setCanChooseDirectories_(True)
+		panel.setCanCreateDirectories_(True)
+		panel.setMessage_(Glyphs.localize({'en': 'Where should the profile be saved?', 'de': 'Wo soll das Profil gespeichert werden?'}))
+		if panel.runModal() == NSOKButton:
+			startProfiling(self, PROFILEFRAMES, panel.URL().path())
+
+	def callbackTrace_(self, sender):
+		if self.traceRecorder is None:
+			startTrace(self)
+		else:
+			frames = self.traceRecorder.frames
+			path = stopTrace(self)
+			print('Space Bar: trace of %s frames written to %s' % (frames, path))
+			NSWorkspace.sharedWorkspace().selectFile_inFileViewerRootedAtPath_(path, '')
+
+	def callbackExportInstrumentation_(self, sender):
+		path = exportInstrumentation(self)
+		print('Space Bar: timings written to %s' % path)
+		NSWorkspace.sharedWorkspace().selectFile_inFileViewerRootedAtPath_(path, '')
+
 	def allowed(self):
 		return True
 
@@ -1687,18 +1445,34 @@ class SpacingInvader(ReporterPlugin):
 		self.setPreference('bboxb', sender.get())
 		Glyphs.redraw()
 
+	@objc.python_method
+	def preferenceStore(self):
+		# settings() reads preferences before start() is called
+		if getattr(self, 'preferences', None) is None:
+			self.preferences = PreferenceStore(NSUserDefaults.standardUserDefaults())
+		return self.preferences
+
 	@objc.python_method
 	def getPreference(self, key):
-		return NSUserDefaults.standardUserDefaults().objectForKey_("de.yanone.spaceBar.%s" % (key))
+		return self.preferenceStore().get(key)
 
 	@objc.python_method
 	def setPreference(self, key, value):
-		NSUserDefaults.standardUserDefaults().setObject_forKey_(value, "de.yanone.spaceBar.%s" % (key))
+		self.preferenceStore().set(key, value)
 
 	@objc.python_method
 	def start(self):
 		start(self)
 
+	def prefetch_(self, sender):
+		prefetch(self)
+
+	def settle_(self, sender):
+		settle(self)
+
+	def computed_(self, sender):
+		computed(self)
+
 	@objc.python_method
 	def foregroundInViewCoords(self, layer=None):
 		# print("__foregroundInViewCoords")
@@ -1706,5 +1480,9 @@ class SpacingInvader(ReporterPlugin):
 			if layer is None:
 				layer = self.controller.activeLayer
 			if layer != None:
-				foreground(self, layer)
-		# cProfile.runctx('foreground(self, layer)', globals(), locals())
+				if self.profileCapture is not None and self.profileCapture.active:
+					self.profileCapture.run(foreground, self, layer)
+					if not self.profileCapture.active:
+						profileCaptured(self)
+				else:
+					foreground(self, layer)
@@ -0,0 +1,82 @@
+# encoding: utf-8
+"""\
+Replays a session trace recorded with Space Bar's 'Record Trace' menu item
+(see spacinginvadercore.trace) without Glyphs.app, and compares the time each
+frame took in the session with the time it takes here:
+
+	python benchmarks/replay.py "Space Bar Trace 2020-04-01 12-00-00.jsonl"
+	python benchmarks/replay.py trace.jsonl --frames 120-180 --repeat 5 --output replay.json
+
+Times in milliseconds. Frames whose font state doesn't match the digest
+recorded with them are flagged: the trace is incomplete there.
+"""
+from __future__ import division, print_function, unicode_literals
+
+import os, sys, json, argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'SpaceBar.glyphsReporter', 'Contents', 'Resources'))
+
+from spacinginvadercore.trace import readTrace
+from spacinginvadercore.replay import TraceReplay
+
+
+def frameRange(text):
+	"""\
+	'120-180' or '7' as a set of frame indices
+	"""
+	if '-' in text:
+		first, last = text.split('-', 1)
+		return set(range(int(first), int(last) + 1))
+	return set([int(text)])
+
+def milliseconds(seconds):
+	if seconds is None:
+		return None
+	return round(seconds * 1000, 4)
+
+def main(arguments = None):
+	parser = argparse.ArgumentParser(description = 'Replays a Space Bar session trace headlessly and times its frames.')
+	parser.add_argument('trace', help = 'trace file (.jsonl)')
+	parser.add_argument('--frames', type = frameRange, help = 'frame index or range to replay, e.g. 120-180 (default: all)')
+	parser.add_argument('--repeat', type = int, default = 1, help = 'replay this many times, keeping the fastest time per frame')
+	parser.add_argument('--slowest', type = int, default = 10, help = 'number of slowest frames to list')
+	parser.add_argument('--output', help = 'JSON file to write the per-frame results to')
+	options = parser.parse_args(arguments)
+
+	records = list(readTrace(options.trace))
+	fastest = {}
+	for run in range(max(1, options.repeat)):
+		for result in TraceReplay(records).run(options.frames):
+			index = result['index']
+			if index not in fastest or (result['replayed'] or 0) < (fastest[index]['replayed'] or 0):
+				fastest[index] = result
+	results = [fastest[index] for index in sorted(fastest.keys())]
+
+	frames = []
+	for result in results:
+		frames.append({
+			'index': result['index'],
+			'recorded': milliseconds(result['recorded']),
+			'replayed': milliseconds(result['replayed']),
+			'matches': result['matches'],
+			'stages': dict([(stage, milliseconds(seconds)) for stage, seconds in result['stages'].items()]),
+		})
+
+	mismatches = [frame['index'] for frame in frames if not frame['matches']]
+	print('%s frames replayed, %s with a font state that differs from the recording' % (len(frames), len(mismatches)), file = sys.stderr)
+	for frame in sorted(frames, key = lambda frame: -(frame['recorded'] or frame['replayed'] or 0))[:options.slowest]:
+		print('frame %6s  recorded %8s ms  replayed %8s ms' % (frame['index'], frame['recorded'], frame['replayed']), file = sys.stderr)
+
+	report = {
+		'trace': options.trace,
+		'header': records[0] if records and records[0].get('type') == 'header' else None,
+		'repeat': options.repeat,
+		'mismatches': mismatches,
+		'frames': frames,
+	}
+	if options.output:
+		with open(options.output, 'w') as f:
+			json.dump(report, f, indent = 2, sort_keys = True)
+
+if __name__ == '__main__':
+	main()
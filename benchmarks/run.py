@@ -0,0 +1,169 @@
+# encoding: utf-8
+"""\
+Space Bar benchmarks
+
+Times the frame pipeline of the bar against synthetic fonts (see
+spacinginvadercore.synthetic), without Glyphs.app:
+
+	python benchmarks/run.py
+	python benchmarks/run.py --scenario manyInstances --frames 100 --output results.json
+
+A frame is what foreground() computes for a cursor position, see
+spacinginvadercore.replay.computeFrame(): the interpolation space panel, the
+panels of the glyphs left and right of the cursor, the kerning panel, the
+layout of the bar and the rendering of all areas into a RecordingBackend.
+The glyph and panel caches of the plugin are left out, so every frame is
+computed in full.
+
+cold: first frame on a freshly generated font, including the master values
+      and the plans and kerning index built on first use
+warm: the following frames, with the cursor moving through the text
+
+The glyphs around the cursor are looked up in the tab's layers through
+TabLayers, as the plugin does; 'tabLayers' is the time of those lookups
+(including fetching the layers once per frame), outside the frame.
+
+Results are written as JSON, times in milliseconds.
+"""
+from __future__ import division, print_function, unicode_literals
+
+import os, sys, json, platform, argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'SpaceBar.glyphsReporter', 'Contents', 'Resources'))
+
+from spacinginvadercore import RecordingBackend, Instrumentation, TabLayers, metrics, synthetic
+from spacinginvadercore.replay import computeFrame, clock
+
+# name: keyword arguments of syntheticFont(), plus 'text', the tab text length
+SCENARIOS = (
+	('baseline', {'masters': 2, 'instances': 5}),
+	('manyInstances', {'masters': 2, 'instances': 30}),
+	('manyMasters', {'masters': 8, 'instances': 15}),
+	('twoAxes', {'masters': 4, 'instances': 12, 'axes': 2}),
+	('fourAxes', {'masters': 8, 'instances': 12, 'axes': 4}),
+	('braceBracket', {'masters': 3, 'instances': 9, 'braceLayers': 2, 'bracketLayers': 2}),
+	('heavyKerning', {'masters': 4, 'instances': 9, 'glyphs': 400, 'kerningPairs': 20000, 'groups': 60}),
+	('longText', {'masters': 2, 'instances': 9, 'glyphs': 200, 'text': 5000}),
+)
+
+TEXTLENGTH = 200
+
+
+class TextLayers(object):
+	"""\
+	Layers of a tab showing text, as its layout manager lists them: the layer
+	of the selected master of each character's glyph, looked up on access
+	"""
+	def __init__(self, font, text):
+		self.font = font
+		self.text = text
+		self.masterId = font.masters[0].id
+
+	def __len__(self):
+		return len(self.text)
+
+	def __getitem__(self, index):
+		return self.font.glyphs[self.text[index]].layers[self.masterId]
+
+def frame(font, tabLayers, cursor, mode, masterValues, instrumentation, backend, lookups):
+	"""\
+	One frame for the cursor between positions cursor - 1 and cursor of the tab.
+	Appends the time of looking up the glyphs to lookups.
+	"""
+	start = clock()
+	leftGlyph, leftLayer = tabLayers.get(cursor - 1, (None, None))
+	rightGlyph, rightLayer = tabLayers.get(cursor, (None, None))
+	lookups.append(clock() - start)
+	return computeFrame(font, font.instances, masterValues, leftGlyph, rightGlyph, mode, instrumentation, backend, leftLayer = leftLayer, rightLayer = rightLayer)
+
+def milliseconds(values):
+	"""\
+	{'median', 'mean', 'min', 'max'} of values in seconds, in milliseconds
+	"""
+	values = sorted(values)
+	middle = len(values) // 2
+	median = values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2.0
+	return {
+		'median': round(median * 1000, 4),
+		'mean': round(sum(values) / len(values) * 1000, 4),
+		'min': round(values[0] * 1000, 4),
+		'max': round(values[-1] * 1000, 4),
+	}
+
+def runScenario(name, parameters, mode, frames, coldRuns, seed):
+	parameters = dict(parameters)
+	textLength = parameters.pop('text', TEXTLENGTH)
+	backend = RecordingBackend()
+	lookups = []
+
+	# Cold: a fresh font each time, generated outside the timing
+	cold = []
+	for run in range(coldRuns):
+		font = synthetic.syntheticFont(seed = seed + run, **parameters)
+		text = synthetic.syntheticText(font, textLength, seed = seed + run)
+		layers = TextLayers(font, text)
+		tabLayers = TabLayers()
+		tabLayers.update(lambda: layers)
+		instrumentation = Instrumentation(enabled = True, clock = clock)
+		start = clock()
+		masterValues = metrics.masterValues(font, font.instances)
+		frame(font, tabLayers, 1, mode, masterValues, instrumentation, backend, lookups)
+		cold.append(clock() - start)
+
+	# Warm: the last font, cursor moving through the text
+	instrumentation = Instrumentation(capacity = frames, enabled = True, clock = clock)
+	lookups = []
+	for i in range(frames):
+		tabLayers.update(lambda: layers)
+		frame(font, tabLayers, 1 + (i + 1) % (len(text) - 1), mode, masterValues, instrumentation, backend, lookups)
+	statistics = instrumentation.statistics()
+
+	return {
+		'scenario': name,
+		'mode': mode,
+		'parameters': dict(parameters, text = textLength),
+		'glyphLayers': sum([len(glyph.layers) for glyph in font.glyphs.values()]),
+		'cold': milliseconds(cold),
+		'warm': milliseconds([entry['total'] for entry in instrumentation.frames]),
+		'stages': dict([(stage, round(values['mean'] * 1000, 4)) for stage, values in statistics.items() if stage != 'frame']),
+		'drawCalls': len(backend.calls),
+		'tabLayers': dict(milliseconds(lookups), fetches = tabLayers.fetches, lookups = tabLayers.lookups),
+	}
+
+def main(arguments = None):
+	parser = argparse.ArgumentParser(description = 'Times the Space Bar frame pipeline against synthetic fonts.')
+	parser.add_argument('--scenario', action = 'append', choices = [name for name, parameters in SCENARIOS], help = 'scenario to run, repeatable (default: all)')
+	parser.add_argument('--mode', choices = ('masters', 'instances', 'both'), default = 'both')
+	parser.add_argument('--frames', type = int, default = 50, help = 'warm frames per scenario')
+	parser.add_argument('--cold', type = int, default = 5, help = 'cold frames per scenario, each on a fresh font')
+	parser.add_argument('--seed', type = int, default = 0)
+	parser.add_argument('--output', help = 'JSON file to write (default: stdout)')
+	options = parser.parse_args(arguments)
+
+	modes = ('masters', 'instances') if options.mode == 'both' else (options.mode,)
+	results = []
+	for name, parameters in SCENARIOS:
+		if options.scenario and name not in options.scenario:
+			continue
+		for mode in modes:
+			result = runScenario(name, parameters, mode, max(1, options.frames), max(1, options.cold), options.seed)
+			results.append(result)
+			print('%-14s %-9s cold %8.2f ms  warm %8.2f ms' % (name, mode, result['cold']['median'], result['warm']['median']), file = sys.stderr)
+
+	report = {
+		'python': platform.python_version(),
+		'platform': platform.platform(),
+		'numpy': metrics.numpy is not None,
+		'frames': options.frames,
+		'coldRuns': options.cold,
+		'seed': options.seed,
+		'results': results,
+	}
+	if options.output:
+		with open(options.output, 'w') as f:
+			json.dump(report, f, indent = 2, sort_keys = True)
+	else:
+		print(json.dumps(report, indent = 2, sort_keys = True))
+
+if __name__ == '__main__':
+	main()
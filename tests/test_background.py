@@ -0,0 +1,120 @@
+# encoding: utf-8
+"""\
+Background computation of glyph panels, run synchronously with
+ImmediateExecutor and ManualExecutor:
+
+	python -m pytest tests
+"""
+from __future__ import division, print_function, unicode_literals
+
+import os, sys, functools, unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'SpaceBar.glyphsReporter', 'Contents', 'Resources'))
+
+from spacinginvadercore import BackgroundCompute, ImmediateExecutor, ManualExecutor, ComputeScheduler, Instrumentation, metrics, synthetic
+from spacinginvadercore.replay import sidePanels, ACTIONS, NAMES
+
+
+def panelsJob(font, glyph, side = 'left'):
+	instances = list(font.instances)
+	masterValues = metrics.masterValues(font, instances)
+	activeLayer = glyph.layers[font.masters[0].id]
+	return functools.partial(metrics.glyphPanels, glyph, instances, masterValues, side, 'instances', list(ACTIONS), dict(NAMES), activeLayer)
+
+def values(areas):
+	return [[(value.x, value.y) for value in area.values.get('foreground', [])] for area in areas]
+
+
+class BackgroundComputeTest(unittest.TestCase):
+
+	def setUp(self):
+		self.font = synthetic.syntheticFont(masters = 3, instances = 7, braceLayers = 1, seed = 1)
+
+	def test_matchesForegroundComputation(self):
+		glyph = self.font.glyphs['n']
+		background = BackgroundCompute(ImmediateExecutor())
+		self.assertTrue(background.submit('n', panelsJob(self.font, glyph)))
+		[(key, (modelGlyph, areas))] = background.collect()
+		instances = list(self.font.instances)
+		expected = sidePanels(self.font, glyph, 'left', 'instances', instances, metrics.masterValues(self.font, instances), list(ACTIONS), dict(NAMES), glyph.layers[self.font.masters[0].id], Instrumentation())
+		self.assertEqual(key, 'n')
+		self.assertIs(modelGlyph, glyph)
+		self.assertEqual(values(areas), values(expected))
+
+	def test_jobRunsOncePerKey(self):
+		executor = ManualExecutor()
+		background = BackgroundCompute(executor)
+		self.assertTrue(background.submit('n', panelsJob(self.font, self.font.glyphs['n'])))
+		self.assertFalse(background.submit('n', panelsJob(self.font, self.font.glyphs['n'])))
+		self.assertEqual(background.collect(), [])
+		self.assertEqual(executor.run(), 1)
+		self.assertEqual([key for key, result in background.collect()], ['n'])
+
+	def test_newerJobReplacesQueuedJobOfSlot(self):
+		executor = ManualExecutor()
+		background = BackgroundCompute(executor)
+		for version in range(5):
+			background.submit(('n', version), panelsJob(self.font, self.font.glyphs['n']), slot = 'left')
+		background.submit(('o', 0), panelsJob(self.font, self.font.glyphs['o'], 'right'), slot = 'right')
+		self.assertEqual(sorted(background.running.keys()), [('n', 4), ('o', 0)])
+		self.assertEqual(background.cancelled, 4)
+		executor.run()
+		self.assertEqual(sorted([key for key, result in background.collect()]), [('n', 4), ('o', 0)])
+		self.assertEqual(background.completed, 2)
+
+	def test_cancelDropsResults(self):
+		executor = ManualExecutor()
+		background = BackgroundCompute(executor)
+		background.submit('n', panelsJob(self.font, self.font.glyphs['n']), slot = 'left')
+		background.cancel()
+		executor.run()
+		self.assertEqual(background.collect(), [])
+		self.assertFalse(background.isRunning('n'))
+
+	def test_snapshotIsUnaffectedByChangesOfFont(self):
+		glyph = self.font.glyphs['n']
+		snapshot = self.font.snapshot([glyph])
+		executor = ManualExecutor()
+		background = BackgroundCompute(executor)
+		background.submit('n', panelsJob(snapshot, snapshot.glyphs['n']))
+		expected = values(panelsJob(self.font, glyph)()[1])
+		# The main thread edits the glyph and plans other panels meanwhile
+		for layer in glyph.layers:
+			layer.width += 50
+		metrics.masterValues(self.font, self.font.instances[:3])
+		executor.run()
+		[(key, (modelGlyph, areas))] = background.collect()
+		self.assertEqual(values(areas), expected)
+		self.assertEqual(list(snapshot.glyphs.keys()), ['n'])
+		self.assertIsNot(snapshot.interpolationPlans, self.font.interpolationPlans)
+
+
+class SchedulerTest(unittest.TestCase):
+
+	def setUp(self):
+		self.now = 0.0
+		self.scheduler = ComputeScheduler(10, clock = lambda: self.now)
+
+	def test_startsAtMostAtRate(self):
+		started = 0
+		for i in range(50):
+			self.now += 0.01
+			if self.scheduler.due('left', 'n'):
+				self.scheduler.started('left', 'n')
+				started += 1
+		self.assertEqual(started, 5)
+		self.assertEqual(self.scheduler.pending, set(['left']))
+		self.assertTrue(self.scheduler.settle())
+		self.assertTrue(self.scheduler.due('left', 'n'))
+
+	def test_startedKeepsLastResult(self):
+		self.scheduler.remember('left', 'n', 'panels')
+		self.scheduler.started('left', 'n')
+		self.assertEqual(self.scheduler.last('left', 'n'), 'panels')
+		self.scheduler.started('left', 'o')
+		self.assertEqual(self.scheduler.last('left', 'o'), None)
+		self.assertTrue(self.scheduler.due('left', 'n'))
+
+
+if __name__ == '__main__':
+	unittest.main()
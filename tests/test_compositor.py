@@ -0,0 +1,61 @@
+# encoding: utf-8
+"""\
+Which areas the compositor renders again:
+
+	python -m pytest tests
+"""
+from __future__ import division, print_function, unicode_literals
+
+import os, sys, unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'SpaceBar.glyphsReporter', 'Contents', 'Resources'))
+
+from spacinginvadercore import Area, Value, BarLayout, Compositor, AREASTANDARDWIDTH, AREASTANDARDHEIGHT
+
+
+def areas(values):
+	result = []
+	for title, y in values:
+		area = Area(AREASTANDARDWIDTH, AREASTANDARDHEIGHT, title = title)
+		area.addValue(Value(0, y))
+		result.append(area)
+	BarLayout(result, 1600).apply(result, 0, 1000)
+	return result
+
+def render(compositor, areas, layoutKey = 'layout', renderKey = (1.0, 'light')):
+	"""\
+	Titles of the areas the compositor has rendered, None for a blit of the bar image
+	"""
+	dirty = compositor.frame(areas, layoutKey, renderKey)
+	if dirty is None:
+		return None
+	for area in dirty:
+		area.image = 'image'
+	compositor.image = 'bar'
+	return [area.title for area in dirty]
+
+
+class CompositorTest(unittest.TestCase):
+
+	def setUp(self):
+		self.compositor = Compositor()
+		self.areas = areas([('LSB', 10), ('RSB', 20)])
+		render(self.compositor, self.areas)
+
+	def test_unchangedFrameIsBlit(self):
+		self.assertEqual(render(self.compositor, self.areas), None)
+
+	def test_changedAreaOnly(self):
+		self.areas[1].values['foreground'][0].y = 30
+		self.assertEqual(render(self.compositor, self.areas), ['RSB'])
+
+	def test_scaleAndAppearanceRenderAll(self):
+		self.assertEqual(render(self.compositor, self.areas, renderKey = (2.0, 'light')), ['LSB', 'RSB'])
+		self.assertEqual(render(self.compositor, self.areas, renderKey = (2.0, 'dark')), ['LSB', 'RSB'])
+
+	def test_layoutAloneKeepsImages(self):
+		self.assertEqual(render(self.compositor, self.areas, layoutKey = 'other'), [])
+
+
+if __name__ == '__main__':
+	unittest.main()
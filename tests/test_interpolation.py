@@ -0,0 +1,38 @@
+# encoding: utf-8
+"""\
+Piecewise linear interpolation along one axis:
+
+	python -m pytest tests
+"""
+from __future__ import division, print_function, unicode_literals
+
+import os, sys, unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'SpaceBar.glyphsReporter', 'Contents', 'Resources'))
+
+from spacinginvadercore.interpolation import InterpolateOnAxis, SegmentWeights, InterpolationPlan
+
+
+class InterpolationPlanTest(unittest.TestCase):
+
+	def test_matchesInterpolateOnAxis(self):
+		points = [(100, 40), (400, 55), (900, 90)]
+		instances = [0, 100, 250, 400, 700, 900, 1000]
+		plan = InterpolationPlan([location for location, value in points], instances)
+		expected = [InterpolateOnAxis(points, location) for location in instances]
+		self.assertEqual([round(value, 9) for value in plan.evaluate([value for location, value in points])], [round(value, 9) for value in expected])
+
+	def test_extrapolatesFromNearestPointOfZeroWidthSegment(self):
+		# Two points at each end, e.g. a master and a brace layer at the same weight
+		locations = [100, 100, 500, 900, 900]
+		self.assertEqual(SegmentWeights(locations, 50), [(0, 1.0)])
+		self.assertEqual(SegmentWeights(locations, 1000), [(4, 1.0)])
+		self.assertEqual(SegmentWeights(locations, 300), [(1, 0.5), (2, 0.5)])
+		points = list(zip(locations, [10, 20, 30, 40, 50]))
+		self.assertEqual(InterpolateOnAxis(points, 50), 10)
+		self.assertEqual(InterpolateOnAxis(points, 1000), 50)
+		self.assertEqual(InterpolationPlan(locations, [50, 1000]).evaluate([10, 20, 30, 40, 50]), [10, 50])
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,80 @@
+# encoding: utf-8
+"""\
+Kerning index: precedence of exceptions and class kerning, and reading
+pairs again after the font's kerning changed:
+
+	python -m pytest tests
+"""
+from __future__ import division, print_function, unicode_literals
+
+import os, sys, unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'SpaceBar.glyphsReporter', 'Contents', 'Resources'))
+
+from spacinginvadercore import Font, Axis, Master, Glyph, KerningIndex
+
+
+class CountingFont(Font):
+	"""\
+	Counts the kerning lookups
+	"""
+	lookups = 0
+
+	def kerningForPair(self, masterId, leftKey, rightKey):
+		self.lookups += 1
+		return Font.kerningForPair(self, masterId, leftKey, rightKey)
+
+
+class KerningIndexTest(unittest.TestCase):
+
+	def setUp(self):
+		self.font = CountingFont(axes = [Axis('Weight', 'wght')], masters = [Master('light', 'Light', [100]), Master('bold', 'Bold', [900])])
+		self.A = Glyph('A', leftKerningGroup = 'A', rightKerningGroup = 'A')
+		self.V = Glyph('V', leftKerningGroup = 'V', rightKerningGroup = 'V')
+		for glyph in (self.A, self.V):
+			self.font.addGlyph(glyph)
+		self.index = KerningIndex(self.font)
+
+	def test_precedence(self):
+		# name-name > class-name > name-class > class-class, each added below the ones before
+		for leftKey, rightKey, value in (('A', 'V', -10), ('@MMK_L_A', 'V', -20), ('A', '@MMK_R_V', -30), ('@MMK_L_A', '@MMK_R_V', -40)):
+			self.font.kerning.setdefault('light', {}).setdefault(leftKey, {})[rightKey] = value
+		expected = [(-10, True), (-20, True), (-30, True), (-40, False)]
+		for leftKey, rightKey in (('A', 'V'), ('@MMK_L_A', 'V'), ('A', '@MMK_R_V')):
+			self.assertEqual(KerningIndex(self.font).kerning('light', self.A, self.V), expected.pop(0))
+			del self.font.kerning['light'][leftKey][rightKey]
+		self.assertEqual(KerningIndex(self.font).kerning('light', self.A, self.V), expected.pop(0))
+		self.assertEqual(KerningIndex(self.font).kerning('bold', self.A, self.V), (0, False))
+
+	def test_glyphWithoutGroupIsNoException(self):
+		x = Glyph('x')
+		self.font.addGlyph(x)
+		self.font.kerning['light'] = {'x': {'@MMK_R_V': -15}}
+		self.assertEqual(self.index.kerning('light', x, self.V), (-15, False))
+
+	def test_refreshPairReadsOncePerChangeKey(self):
+		self.font.kerning['light'] = {'@MMK_L_A': {'@MMK_R_V': -40}}
+		self.assertEqual(self.index.kerning('light', self.A, self.V), (-40, False))
+		self.font.kerning['light']['@MMK_L_A']['@MMK_R_V'] = -60
+		self.font.lookups = 0
+		self.assertTrue(self.index.refreshPair('light', self.A, self.V, (1, 1)))
+		self.assertEqual(self.font.lookups, 4)
+		self.assertFalse(self.index.refreshPair('light', self.A, self.V, (1, 1)))
+		self.assertEqual(self.font.lookups, 4)
+		self.assertEqual(self.index.kerning('light', self.A, self.V), (-60, False))
+
+	def test_refreshPairKeepsOtherMasters(self):
+		self.font.kerning = {'light': {'A': {'V': -10}}, 'bold': {'A': {'V': -20}}}
+		self.index.kerning('light', self.A, self.V)
+		self.index.kerning('bold', self.A, self.V)
+		self.font.kerning['light']['A']['V'] = -15
+		self.index.refreshPair('light', self.A, self.V, (2, 1))
+		self.font.lookups = 0
+		self.assertEqual(self.index.kerning('light', self.A, self.V), (-15, True))
+		self.assertEqual(self.index.kerning('bold', self.A, self.V), (-20, True))
+		self.assertEqual(self.font.lookups, 0)
+		self.assertEqual((self.index.version('light'), self.index.version('bold')), (1, 0))
+
+
+if __name__ == '__main__':
+	unittest.main()
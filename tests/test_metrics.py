@@ -0,0 +1,96 @@
+# encoding: utf-8
+"""\
+Panels computed by the metrics core from a hand-made font model:
+
+	python -m pytest tests
+"""
+from __future__ import division, print_function, unicode_literals
+
+import os, sys, unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'SpaceBar.glyphsReporter', 'Contents', 'Resources'))
+
+from spacinginvadercore import Font, Axis, Master, Instance, Glyph, Layer, Rect, metrics, synthetic
+from spacinginvadercore.replay import NAMES
+
+
+def lightBoldFont():
+	"""\
+	Masters at weight 100 and 900, instances between and beyond them, and a
+	glyph whose width and LSB grow from 400 and 40 to 600 and 60
+	"""
+	font = Font(axes = [Axis('Weight', 'wght')])
+	font.addMaster(Master('light', 'Light', [100]))
+	font.addMaster(Master('bold', 'Bold', [900]))
+	for name, weight, interpolations in (('Light', 100, {'light': 1.0}), ('Medium', 500, {'light': 0.5, 'bold': 0.5}), ('Bold', 900, {'bold': 1.0}), ('Black', 1000, {'light': -0.125, 'bold': 1.125})):
+		font.addInstance(Instance(name, [weight], interpolations))
+	glyph = Glyph('n')
+	glyph.addLayer(Layer('light', name = 'Light', width = 400, bounds = Rect(40, 0, 320, 500), shapes = ['shape']))
+	glyph.addLayer(Layer('bold', name = 'Bold', width = 600, bounds = Rect(60, 0, 480, 520), shapes = ['shape']))
+	font.addGlyph(glyph)
+	for name, group in (('A', 'A'), ('V', 'V'), ('o', None)):
+		font.addGlyph(Glyph(name, leftKerningGroup = group, rightKerningGroup = group))
+	# Class kerning, an exception in the bold master only, and a pair kerned in the light master only
+	font.kerning = {
+		'light': {'@MMK_L_A': {'@MMK_R_V': -40}, 'o': {'@MMK_R_V': -10}},
+		'bold': {'@MMK_L_A': {'@MMK_R_V': -80, 'V': -100}},
+	}
+	return font
+
+def ys(area):
+	return [value.y for value in area.values['foreground']]
+
+
+class MetricsTest(unittest.TestCase):
+
+	def setUp(self):
+		self.font = lightBoldFont()
+		self.glyph = self.font.glyphs['n']
+		self.instances = list(self.font.instances)
+
+	def panels(self, mode, side = 'left'):
+		glyph, areas = metrics.glyphPanels(self.glyph, self.instances, metrics.masterValues(self.font, self.instances), side, mode, ['sidebearings', 'width'], dict(NAMES))
+		return areas
+
+	def test_instancePanels(self):
+		LSB, width, RSB = self.panels('instances')
+		self.assertEqual(ys(LSB), [40, 50, 60, 62.5])
+		self.assertEqual(ys(width), [400, 500, 600, 625])
+		self.assertEqual(ys(RSB), [40, 50, 60, 62.5])
+
+	def test_masterPanels(self):
+		LSB, width, RSB = self.panels('masters')
+		self.assertEqual(ys(width), [400, 600])
+		self.assertEqual(ys(LSB), [40, 60])
+
+	def test_interpolationSpace(self):
+		area = metrics.addInterpolation(self.font, 'instances', 'Interpolation Space', selectedMasterId = 'bold')
+		self.assertEqual(ys(area), [100, 500, 900, 1000])
+		masters = area.values['background']
+		self.assertEqual([(value.x, value.y) for value in masters], [(0, 100), (2, 900)])
+		self.assertEqual([value.x for value in masters if value.size == metrics.SELECTEDMASTERSIZE], [2])
+
+
+class InstanceKerningTest(unittest.TestCase):
+
+	def test_interpolatedKerning(self):
+		font = lightBoldFont()
+		A, V, o = font.glyphs['A'], font.glyphs['V'], font.glyphs['o']
+		kerning = metrics.interpolatedKerningForPairs(font, font.instances, [(A, V), (o, V), (V, A)])
+		self.assertEqual(kerning, [[-40, -70, -100, -107.5], [-10, -5, 0, 1.25], [0, 0, 0, 0]])
+		self.assertEqual(metrics.interpolatedKerning(font.instances[1], A, V), -70)
+
+	def test_matchesDesignspaceInterpolation(self):
+		# Instance kerning from the instances' master factors equals kerning interpolated in the designspace
+		font = synthetic.syntheticFont(masters = 5, instances = 9, axes = 2, kerningPairs = 200, seed = 3)
+		names = sorted(font.glyphs.keys())
+		pairs = [(font.glyphs[left], font.glyphs[right]) for left in names[:8] for right in names[:8]]
+		kerning = metrics.interpolatedKerningForPairs(font, font.instances, pairs)
+		plan = metrics.variationPlan(font, [master.axes for master in font.masters], font.instances)
+		for (leftGlyph, rightGlyph), values in zip(pairs, kerning):
+			expected = plan.evaluate([metrics.getKerning(master, leftGlyph, rightGlyph)[0] for master in font.masters])
+			self.assertEqual([round(value, 6) for value in values], [round(value, 6) for value in expected])
+
+
+if __name__ == '__main__':
+	unittest.main()
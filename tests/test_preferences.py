@@ -0,0 +1,71 @@
+# encoding: utf-8
+"""\
+Preferences served from memory and written through to a DictDefaults:
+
+	python -m pytest tests
+"""
+from __future__ import division, print_function, unicode_literals
+
+import os, sys, unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'SpaceBar.glyphsReporter', 'Contents', 'Resources'))
+
+from spacinginvadercore import PreferenceStore, DictDefaults
+from spacinginvadercore.preferences import PREFERENCEPREFIX
+
+
+class PreferenceStoreTest(unittest.TestCase):
+
+	def setUp(self):
+		self.defaults = DictDefaults({PREFERENCEPREFIX + 'mode': 'instances', PREFERENCEPREFIX + 'kerning': True, 'other.app.key': 1})
+		self.store = PreferenceStore(self.defaults)
+		self.notified = []
+		self.store.addObserver(self.notified.append)
+
+	def test_loadsOnce(self):
+		self.assertEqual(self.store.values, {'mode': 'instances', 'kerning': True})
+		self.assertEqual(self.defaults.reads, 1)
+		for i in range(10):
+			self.assertEqual(self.store.get('mode'), 'instances')
+			self.assertEqual(self.store.get('missing', 'default'), 'default')
+		self.assertEqual(self.defaults.reads, 1)
+
+	def test_writesThrough(self):
+		self.assertTrue(self.store.set('mode', 'masters'))
+		self.assertEqual(self.defaults.values[PREFERENCEPREFIX + 'mode'], 'masters')
+		self.assertTrue(self.store.set('kerning', None))
+		self.assertNotIn(PREFERENCEPREFIX + 'kerning', self.defaults.values)
+		self.assertEqual(self.store.get('kerning'), None)
+		self.assertEqual(self.defaults.writes, 2)
+		# A store loading from the same defaults sees the changes
+		self.assertEqual(PreferenceStore(self.defaults).values, {'mode': 'masters'})
+
+	def test_versionMovesOnChangesOnly(self):
+		version = self.store.version
+		self.assertFalse(self.store.set('mode', 'instances'))
+		self.assertFalse(self.store.set('missing', None))
+		self.assertEqual((self.store.version, self.defaults.writes), (version, 0))
+		self.store.set('mode', 'masters')
+		self.store.set('width', True)
+		self.assertEqual(self.store.version, version + 2)
+
+	def test_observers(self):
+		self.store.set('mode', 'masters')
+		self.store.set('mode', 'masters')
+		self.assertEqual(self.notified, ['mode'])
+		self.store.removeObserver(self.notified.append)
+		self.store.set('mode', 'instances')
+		self.assertEqual(self.notified, ['mode'])
+
+	def test_loadPicksUpOutsideChanges(self):
+		version = self.store.version
+		self.store.load()
+		self.assertEqual((self.store.version, self.notified), (version, []))
+		self.defaults.setObject_forKey_(False, PREFERENCEPREFIX + 'kerning')
+		self.store.load()
+		self.assertEqual(self.store.get('kerning'), False)
+		self.assertEqual((self.store.version, self.notified), (version + 1, [None]))
+
+
+if __name__ == '__main__':
+	unittest.main()
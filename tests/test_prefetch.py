@@ -0,0 +1,84 @@
+# encoding: utf-8
+"""\
+Time-boxed prefetching, with a clock that the jobs advance:
+
+	python -m pytest tests
+"""
+from __future__ import division, print_function, unicode_literals
+
+import os, sys, unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'SpaceBar.glyphsReporter', 'Contents', 'Resources'))
+
+from spacinginvadercore import Prefetcher, neighbourPositions
+
+
+class PrefetcherTest(unittest.TestCase):
+
+	def setUp(self):
+		self.now = 0.0
+		self.done = []
+		self.prefetcher = Prefetcher(0.01, clock = lambda: self.now)
+
+	def work(self, seconds, name):
+		self.now += seconds
+		self.done.append(name)
+
+	def job(self, name, steps, seconds):
+		"""\
+		A job of steps steps of seconds each
+		"""
+		def job():
+			for step in range(steps - 1):
+				self.work(seconds, (name, step))
+				yield
+			self.work(seconds, (name, steps - 1))
+		return job
+
+	def runSlice(self):
+		start = self.now
+		pending = self.prefetcher.runSlice()
+		return pending, self.now - start
+
+	def test_slicesStayWithinBudget(self):
+		self.prefetcher.schedule([self.job(name, 3, 0.003) for name in 'abcd'])
+		durations = []
+		pending = True
+		while pending:
+			pending, duration = self.runSlice()
+			durations.append(duration)
+		self.assertEqual(len(self.done), 12)
+		self.assertEqual(self.done[:4], [('a', 0), ('a', 1), ('a', 2), ('b', 0)])
+		self.assertTrue(max(durations) <= 0.01 + 1e-9, durations)
+		self.assertEqual(self.prefetcher.completed, 4)
+
+	def test_firstStepOfSliceAlwaysRuns(self):
+		self.prefetcher.schedule([self.job('a', 2, 0.02), self.job('b', 1, 0.001)])
+		self.assertEqual(self.runSlice(), (True, 0.02))
+		self.assertEqual(self.done, [('a', 0)])
+		self.runSlice()
+		self.assertEqual(self.done, [('a', 0), ('a', 1)])
+
+	def test_plainCallablesAreOneStep(self):
+		self.prefetcher.schedule([lambda: self.work(0.004, 'a'), lambda: self.work(0.004, 'b'), lambda: self.work(0.004, 'c')])
+		pending, duration = self.runSlice()
+		self.assertTrue(pending)
+		self.assertEqual(self.done, ['a', 'b'])
+		self.assertEqual(duration, 0.008)
+
+	def test_scheduleDuringSliceStopsIt(self):
+		def replace():
+			self.work(0.001, 'a')
+			self.prefetcher.schedule([lambda: self.work(0.001, 'new')])
+		self.prefetcher.schedule([replace, lambda: self.work(0.001, 'b')])
+		self.assertTrue(self.prefetcher.runSlice())
+		self.assertEqual(self.done, ['a'])
+		self.assertFalse(self.prefetcher.runSlice())
+		self.assertEqual(self.done, ['a', 'new'])
+
+	def test_neighbourPositions(self):
+		self.assertEqual(neighbourPositions(1, 3, 3), [2, 0, 3])
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,76 @@
+# encoding: utf-8
+"""\
+Batching of the drawing calls of areas, recorded with RecordingBackend:
+
+	python -m pytest tests
+"""
+from __future__ import division, print_function, unicode_literals
+
+import os, sys, unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'SpaceBar.glyphsReporter', 'Contents', 'Resources'))
+
+from spacinginvadercore import Area, Value, RecordingBackend, renderArea, AREASTANDARDWIDTH, AREASTANDARDHEIGHT
+
+
+def panel(count, labels = True):
+	"""\
+	A titled area of count instance values above zero, one of them empty and
+	one with a deviation, and two master dots in the background
+	"""
+	area = Area(AREASTANDARDWIDTH, AREASTANDARDHEIGHT, title = 'LSB')
+	for i in range(count):
+		value = Value(i, 10 + i * 5, label = (10 + i * 5) if labels else None)
+		if i == 1:
+			value.y2 = value.y + 20
+		if i == count - 1:
+			value.y = None
+			value.label = None
+		area.addValue(value)
+	for x in (0, count / 2.0):
+		area.addValue(Value(x, 20, layer = 'background'))
+	return area
+
+def render(areas):
+	backend = RecordingBackend()
+	for i, area in enumerate(areas):
+		area.left = i * (AREASTANDARDWIDTH + 10)
+		area.top = 200
+		renderArea(area, backend, area.position())
+	return backend
+
+
+class RenderAreaTest(unittest.TestCase):
+
+	def test_panelIsBatched(self):
+		backend = render([panel(7, labels = False)])
+		self.assertEqual(backend.counts(), {
+			'fillRoundedRect': 1,
+			'drawText': 1,
+			# Background dots, then deviation dots, filled and hollow dots of the values
+			'drawOvals': 4,
+			# All connecting lines at once
+			'strokeLines': 1,
+		})
+		self.assertEqual([(arguments[1], arguments[2], len(arguments[0])) for method, arguments in backend.calls if method == 'drawOvals'], [('dot', True, 2), ('deviationDot', True, 1), ('dot', True, 6), ('dot', False, 1)])
+		[(method, (segments, color, width))] = [call for call in backend.calls if call[0] == 'strokeLines']
+		# Six segments between seven dots, plus the two to the deviating end
+		self.assertEqual(len(segments), 8)
+
+	def test_callsDontGrowWithValues(self):
+		small = render([panel(5, labels = False)]).counts()
+		large = render([panel(50, labels = False)]).counts()
+		self.assertEqual(small, large)
+
+	def test_knownSetOfAreas(self):
+		info = Area(AREASTANDARDWIDTH, AREASTANDARDHEIGHT, title = 'Kerning', titleAlign = 'center', infoText = 'No kerning')
+		areas = [panel(7), Area(10, 0), info, panel(4)]
+		backend = render(areas)
+		# Two panels of 4 calls plus one text per label (6 and 3 non-empty values), the
+		# info area's background, title and text, nothing for the spacer
+		self.assertEqual(backend.counts(), {'fillRoundedRect': 3, 'drawText': 2 + 6 + 3 + 2, 'drawOvals': 8, 'strokeLines': 2})
+		self.assertEqual(len(backend.calls), 3 + 13 + 8 + 2)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,76 @@
+# encoding: utf-8
+"""\
+Tab layers looked up by position, fetched once per frame on first use:
+
+	python -m pytest tests
+"""
+from __future__ import division, print_function, unicode_literals
+
+import os, sys, unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'SpaceBar.glyphsReporter', 'Contents', 'Resources'))
+
+from spacinginvadercore import TabLayers, Glyph, Layer
+
+
+def tabLayers(names):
+	"""\
+	Master layers of glyphs named by names, None for a line break
+	"""
+	layers = []
+	for name in names:
+		layer = Layer('m01')
+		if name is not None:
+			Glyph(name, [layer])
+		layers.append(layer)
+	return layers
+
+
+class TabLayersTest(unittest.TestCase):
+
+	def setUp(self):
+		self.fetched = []
+		self.layers = tabLayers(['n', 'o', None, 'f_i'])
+		self.tabLayers = TabLayers()
+
+	def fetch(self):
+		self.fetched.append(len(self.layers))
+		return self.layers
+
+	def test_fetchedOnFirstUseInFrame(self):
+		self.tabLayers.update(self.fetch)
+		self.assertEqual(self.fetched, [])
+		self.assertEqual(self.tabLayers.get(0)[0].name, 'n')
+		self.assertEqual(self.tabLayers.get(1)[0].name, 'o')
+		self.assertEqual(len(self.tabLayers), 4)
+		self.assertEqual(self.fetched, [4])
+		# A frame that doesn't look up positions doesn't fetch
+		self.tabLayers.update(self.fetch)
+		self.tabLayers.update(self.fetch)
+		self.tabLayers.get(0)
+		self.assertEqual(self.fetched, [4, 4])
+
+	def test_glyphIsLayersParent(self):
+		self.tabLayers.update(self.fetch)
+		self.tabLayers.get(3)
+		# Typing 'f' before the ligature: the layer at a position now belongs to another glyph
+		self.layers = tabLayers(['n', 'o', None, 'f', 'f_i'])
+		self.tabLayers.update(self.fetch)
+		for index, name in enumerate(['n', 'o', None, 'f', 'f_i']):
+			entry = self.tabLayers.get(index)
+			if name is None:
+				self.assertEqual(entry, None)
+			else:
+				glyph, layer = entry
+				self.assertEqual(glyph.name, name)
+				self.assertIs(layer.parent, glyph)
+
+	def test_outOfRange(self):
+		self.assertEqual(self.tabLayers.get(0, 'default'), 'default')
+		self.tabLayers.update(self.fetch)
+		self.assertEqual(self.tabLayers.get(-1, (None, None)), (None, None))
+		self.assertEqual(self.tabLayers.get(4), None)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,93 @@
+# encoding: utf-8
+"""\
+Round trip of a session trace: recorded on a synthetic font, replayed
+headlessly, with the font state and the drawing of each frame compared:
+
+	python -m pytest tests
+"""
+from __future__ import division, print_function, unicode_literals
+
+import io, os, sys, json, unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'SpaceBar.glyphsReporter', 'Contents', 'Resources'))
+
+from spacinginvadercore import TraceRecorder, TraceReplay, PreferenceStore, DictDefaults, Instrumentation, RecordingBackend, computeFrame, metrics, synthetic
+from spacinginvadercore.preferences import PREFERENCEPREFIX
+from spacinginvadercore.replay import ACTIONS
+
+# Cursor positions in the text, one per frame
+CURSORS = (1, 2, 3, 3, 3, 4, 4, 5, 6)
+PREFERENCES = dict([(PREFERENCEPREFIX + action, True) for action in ACTIONS] + [(PREFERENCEPREFIX + 'kerning', True), (PREFERENCEPREFIX + 'interpolation', True), (PREFERENCEPREFIX + 'mode', 'instances')])
+
+
+class Clock(object):
+	def __init__(self):
+		self.now = 0.0
+
+	def __call__(self):
+		self.now += 0.001
+		return self.now
+
+
+class TraceRoundTripTest(unittest.TestCase):
+
+	def setUp(self):
+		self.font = synthetic.syntheticFont(masters = 3, instances = 7, braceLayers = 1, seed = 2)
+		self.text = synthetic.syntheticText(self.font, 12, seed = 2)
+		self.preferences = PreferenceStore(DictDefaults(PREFERENCES))
+		self.masterId = self.font.masters[1].id
+
+	def record(self):
+		"""\
+		(records, frames): a session moving the cursor through the text, with
+		a glyph, a kerning pair and a preference edited while it rests. frames
+		holds the RecordingBackend calls of computeFrame() on the original font.
+		"""
+		stream = io.StringIO()
+		recorder = TraceRecorder(stream = stream, version = 'test', clock = Clock())
+		instances = list(self.font.instances)
+		frames = []
+		for frame, cursor in enumerate(CURSORS):
+			left, right = self.font.glyphs[self.text[cursor - 1]], self.font.glyphs[self.text[cursor]]
+			if frame == 3:
+				right.layers[self.masterId].width += 20
+			if frame == 4:
+				self.font.setKerningForPair(self.masterId, left.rightKerningKey, right.leftKerningKey, -77)
+			if frame == 6:
+				self.preferences.set(ACTIONS[0], False)
+			recorder.beginFrame()
+			recorder.frame(self.font, instances, left, right, self.preferences, cursor = cursor, layers = (self.masterId, self.masterId), masterId = self.masterId)
+
+			backend = RecordingBackend()
+			computeFrame(self.font, instances, metrics.masterValues(self.font, instances), left, right, 'instances', Instrumentation(), backend,
+				actions = [action for action in ACTIONS if self.preferences.get(action)],
+				leftLayer = left.layers[self.masterId], rightLayer = right.layers[self.masterId], selectedMasterId = self.masterId)
+			frames.append(backend.calls)
+		return [json.loads(line) for line in stream.getvalue().splitlines()], frames
+
+	def test_replayMatchesRecording(self):
+		records, frames = self.record()
+		self.assertEqual(records[0]['type'], 'header')
+		self.assertEqual([record['edits'] for record in records if record.get('edits')], [[['glyph', self.text[3]]], [['kerning', self.masterId, self.text[2], self.text[3]]], ['preferences']])
+
+		class Replayed(RecordingBackend):
+			def clear(self):
+				self.calls = []
+				replayed.append(self.calls)
+		replayed = []
+		results = TraceReplay(records, backend = Replayed()).run()
+		self.assertEqual(len(results), len(CURSORS))
+		self.assertTrue(all([result['matches'] for result in results]))
+		self.assertEqual([result['digest'] for result in results], [record['digest'] for record in records if record['type'] == 'frame'])
+		self.assertEqual(replayed, frames)
+
+	def test_missingRecordIsFlagged(self):
+		records, frames = self.record()
+		editedGlyph = [record for record in records if record['type'] == 'glyph' and record['name'] == self.text[3]][-1]
+		records.remove(editedGlyph)
+		results = TraceReplay(records).run()
+		self.assertEqual([result['index'] for result in results if not result['matches']], [3, 4, 5, 6])
+
+
+if __name__ == '__main__':
+	unittest.main()
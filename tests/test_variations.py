@@ -0,0 +1,86 @@
+# encoding: utf-8
+"""\
+Checks the variation model against fontTools.varLib.models.VariationModel
+with extrapolation. The comparison is skipped when fontTools isn't installed:
+
+	python -m pytest tests
+"""
+from __future__ import division, print_function, unicode_literals
+
+import os, sys, random, unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'SpaceBar.glyphsReporter', 'Contents', 'Resources'))
+
+from spacinginvadercore.variations import VariationPlan, normalizeLocation
+
+try:
+	from fontTools.varLib import models
+except ImportError:
+	models = None
+
+AXISNAMES = ('wght', 'wdth', 'opsz')
+SETUPS = 300
+
+
+def randomSetup(rng, axes):
+	"""\
+	(master locations, instance locations, default location): a master at the
+	default, one at each axis end, and a few sparse masters anywhere
+	"""
+	ranges = []
+	for axis in range(axes):
+		lower = rng.randint(0, 400)
+		upper = lower + rng.randint(100, 800)
+		ranges.append((lower, rng.choice((lower, upper, rng.randint(lower + 1, upper - 1))), upper))
+	default = tuple([default for lower, default, upper in ranges])
+	masters = [default]
+	for axis, (lower, value, upper) in enumerate(ranges):
+		for end in (lower, upper):
+			if end != value:
+				location = list(default)
+				location[axis] = end
+				masters.append(tuple(location))
+	for i in range(rng.randint(0, 4)):
+		location = tuple([rng.randint(lower, upper) for lower, default, upper in ranges])
+		if location not in masters:
+			masters.append(location)
+	# Instances inside and outside of the masters
+	instances = [tuple([rng.uniform(lower - 100, upper + 100) for lower, default, upper in ranges]) for i in range(10)]
+	return masters, instances, default
+
+
+@unittest.skipIf(models is None, 'fontTools is not installed')
+class VariationPlanTest(unittest.TestCase):
+
+	def assertMatchesFontTools(self, masters, instances, default, values):
+		plan = VariationPlan(masters, instances, default)
+		normalized = [dict([(AXISNAMES[axis], value) for axis, value in normalizeLocation(location, plan.axisRanges).items()]) for location in masters]
+		model = models.VariationModel(normalized, axisOrder = list(AXISNAMES[:len(default)]), extrapolate = True)
+		for instance, value in zip(instances, plan.evaluate(values)):
+			location = dict([(AXISNAMES[axis], value) for axis, value in normalizeLocation(instance, plan.axisRanges).items()])
+			self.assertAlmostEqual(value, model.interpolateFromMasters(location, values), places = 9)
+
+	def test_randomSetups(self):
+		rng = random.Random(0)
+		for i in range(SETUPS):
+			masters, instances, default = randomSetup(rng, 2 + i % 2)
+			values = [rng.uniform(-500, 500) for location in masters]
+			self.assertMatchesFontTools(masters, instances, default, values)
+
+
+class VariationPlanMastersTest(unittest.TestCase):
+
+	def test_mastersReproduceTheirValues(self):
+		masters = [(100, 75), (900, 75), (100, 125), (900, 125), (400, 100)]
+		values = [10, 50, -30, 20, 5]
+		self.assertEqual([round(value, 9) for value in VariationPlan(masters, masters, masters[0]).evaluate(values)], values)
+
+	def test_pointPositions(self):
+		# Instances along the diagonal of a weight/width designspace
+		masters = [(100, 75), (900, 125), (100, 125), (900, 75), (500, 100), (500, 75)]
+		instances = [(100, 75), (300, 87.5), (700, 112.5), (900, 125)]
+		self.assertEqual(VariationPlan(masters, instances, masters[0]).pointPositions, [[0], [3], [], [], [1.5], []])
+
+
+if __name__ == '__main__':
+	unittest.main()